@@ -0,0 +1,77 @@
+"""
+Order latency across access-token expiry: refreshing only on 401 against
+the proactive background refresh, over benchmarks/rest_stub.py issuing
+short-lived tokens.
+
+    python -m benchmarks.bench_auth --token-ttl 2 --login-latency-ms 50 --seconds 10
+"""
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks.standins import standins
+
+
+def run(threads, seconds, login_latency):
+    # Imported inside the stand-in block: marketdata.config reads the MARKETDATA_* overrides at import.
+    from marketdata import config
+    from marketdata.blitz_api_client import BlitzAPIClient
+    from marketdata.metrics import LatencyHistogram
+
+    logging.getLogger().setLevel(logging.ERROR)
+    order = {"instrumentId": 1, "side": "BUY", "quantity": 1, "price": 100.0, "orderType": "LIMIT"}
+    print(f"threads={threads} seconds={seconds} login latency={login_latency * 1e3:.0f}ms")
+
+    for label, auto_refresh in (("refresh on 401", False), ("proactive refresh", True)):
+        config.TOKEN_AUTO_REFRESH = auto_refresh
+        client = BlitzAPIClient("bench-app", "bench-user").warmup()
+        histogram = LatencyHistogram()
+        counts = {"orders": 0, "waited": 0, "failed": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker():
+            done = waited = failed = 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                result = client.place_order(order)
+                elapsed = time.perf_counter() - start
+                histogram.record(elapsed)
+                done += 1
+                waited += elapsed >= login_latency
+                failed += result["status_code"] != 200
+                time.sleep(0.005)
+            with lock:
+                counts["orders"] += done
+                counts["waited"] += waited
+                counts["failed"] += failed
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        client.close()
+
+        stats = histogram.snapshot()
+        print(f"  {label:<20}orders={counts['orders']:,} p50={stats['p50'] * 1e3:.2f}ms "
+              f"p99={stats['p99'] * 1e3:.2f}ms max={stats['max'] * 1e3:.1f}ms "
+              f"waited on login={counts['waited']} failed={counts['failed']} "
+              f"logins={client.get_auth_stats()['logins']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--token-ttl", type=float, default=2.0, help="seconds until the stub's tokens expire")
+    parser.add_argument("--login-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    rest_args = ("--token-ttl", args.token_ttl, "--login-latency-ms", args.login_latency_ms)
+    with standins(rest_args=rest_args, feed=False):
+        run(args.threads, args.seconds, args.login_latency_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
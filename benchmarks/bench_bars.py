@@ -0,0 +1,68 @@
+"""
+Bar aggregator throughput at full feed rate.
+
+    python -m benchmarks.bench_bars --instruments 5000 --ticks 1000000
+"""
+import argparse
+import random
+import time
+
+from marketdata.bars import BarAggregator
+from marketdata.proto import marketdata_pb2
+
+
+def synthetic_ticks(instruments, ticks, late_fraction, seed=11):
+    rng = random.Random(seed)
+    ids = [1010010000000000 + i for i in range(instruments)]
+    ltt = 1_700_000_000
+    out = []
+    for i in range(ticks):
+        if i % instruments == 0:
+            ltt += 1
+        tick_ltt = ltt - rng.randint(1, 5) if rng.random() < late_fraction else ltt
+        out.append((rng.choice(ids), 100.0 + rng.random(), rng.randint(1, 500), tick_ltt))
+    return out
+
+
+def run(instruments, ticks, timeframes, late_fraction):
+    stream = synthetic_ticks(instruments, ticks, late_fraction)
+    bars = []
+    aggregator = BarAggregator(timeframes=timeframes, ring_size=256, on_bar=bars.append)
+
+    start = time.perf_counter()
+    add_tick = aggregator.add_tick
+    for instrument_id, price, quantity, ltt in stream:
+        add_tick(instrument_id, price, quantity, ltt)
+    elapsed = time.perf_counter() - start
+    print(f"instruments={instruments} ticks={ticks} timeframes={timeframes}")
+    print(f"  add_tick:   {ticks / elapsed:,.0f} ticks/s ({elapsed:.3f}s, {len(bars):,} bars closed)")
+
+    messages = []
+    for instrument_id, price, quantity, ltt in stream[:min(ticks, 200000)]:
+        md_message = marketdata_pb2.MarketDataMessageBase(MessageCode=1506)
+        md_message.TickData.InstrumentID = instrument_id
+        md_message.TickData.LTP = price
+        md_message.TickData.LTQ = quantity
+        md_message.TickData.LTT = ltt
+        messages.append(md_message)
+    aggregator = BarAggregator(timeframes=timeframes, ring_size=256)
+    start = time.perf_counter()
+    for md_message in messages:
+        aggregator.on_message(md_message)
+    elapsed = time.perf_counter() - start
+    print(f"  on_message: {len(messages) / elapsed:,.0f} msgs/s (decoded TickData)")
+    print(f"  {aggregator.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instruments", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=1000000)
+    parser.add_argument("--timeframes", default="1,60,300", help="comma-separated seconds")
+    parser.add_argument("--late", type=float, default=0.01, help="fraction of out-of-order ticks")
+    args = parser.parse_args()
+    run(args.instruments, args.ticks, tuple(int(t) for t in args.timeframes.split(",")), args.late)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Basket order entry: a serial place_order/cancel_order loop against
+BlitzAPIClient.place_many/cancel_many, over benchmarks/rest_stub.py.
+
+    python -m benchmarks.bench_basket --legs 40 --latency-ms 5
+    python -m benchmarks.bench_basket --legs 40 --latency-ms 5 --workers 20
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.standins import standins
+
+
+def run(legs, workers, rounds):
+    # Imported inside the stand-in block: marketdata.config reads the MARKETDATA_* overrides at import.
+    from benchmarks.feed_server import BASE_INSTRUMENT_ID
+    from marketdata.blitz_api_client import BlitzAPIClient
+
+    logging.getLogger().setLevel(logging.WARNING)
+    client = BlitzAPIClient("bench-app", "bench-user")
+    orders = [{"instrumentId": BASE_INSTRUMENT_ID + i, "side": "BUY", "quantity": 1, "price": 100.0,
+               "orderType": "LIMIT"} for i in range(legs)]
+    cancels = [(order["instrumentId"], i + 1) for i, order in enumerate(orders)]
+    client.place_many(orders)  # open the pooled connections outside the timed rounds
+
+    print(f"legs={legs} workers={workers or 'default'} rounds={rounds}")
+    for label, send_one, basket, legs_in in (
+        ("place", client.place_order, lambda: client.place_many(orders, workers), [(order,) for order in orders]),
+        ("cancel", client.cancel_order, lambda: client.cancel_many(cancels, workers), cancels),
+    ):
+        serial_best = basket_best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            last_sent = 0.0
+            for args in legs_in:
+                last_sent = time.perf_counter() - start
+                send_one(*args)
+            elapsed = time.perf_counter() - start
+            if serial_best is None or elapsed < serial_best[0]:
+                serial_best = (elapsed, last_sent)
+
+            result = basket()
+            if result["failed"]:
+                print(f"    {result['failed']} leg(s) failed")
+            if basket_best is None or result["elapsed"] < basket_best[0]:
+                basket_best = (result["elapsed"], max(leg["started"] for leg in result["results"]))
+
+        print(f"  {label + ' (serial loop)':<30}{serial_best[0] * 1e3:>9.1f} ms  "
+              f"last leg sent +{serial_best[1] * 1e3:.1f} ms")
+        print(f"  {label + ' (basket)':<30}{basket_best[0] * 1e3:>9.1f} ms  "
+              f"last leg sent +{basket_best[1] * 1e3:.1f} ms  x{serial_best[0] / basket_best[0]:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--legs", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=0, help="basket concurrency, 0 for BASKET_MAX_WORKERS")
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="server-side delay per response")
+    args = parser.parse_args()
+    with standins(rest_args=("--latency-ms", args.latency_ms), feed=False):
+        run(args.legs, args.workers or None, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
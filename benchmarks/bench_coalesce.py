@@ -0,0 +1,103 @@
+"""
+Fan-in load on get_ltp: many threads each asking for a few instruments,
+sent one request per call against coalesced into shared requests, plus one
+oversized call against a server that caps the list length, over
+benchmarks/rest_stub.py.
+
+    python -m benchmarks.bench_coalesce --threads 32 --per-call 5 --latency-ms 2
+    python -m benchmarks.bench_coalesce --window-ms 1 --large 10000 --max-ids 1000
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+
+from benchmarks.standins import standins
+
+
+def fan_in(client, instrument_ids, threads, per_call, seconds):
+    from marketdata.metrics import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    counts = [0, 0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            wanted = rng.sample(instrument_ids, per_call)
+            start = time.perf_counter()
+            try:
+                response = client.get_ltp(wanted)
+                errors += len(response["data"]) != per_call
+            except Exception:
+                errors += 1
+            histogram.record(time.perf_counter() - start)
+            done += 1
+        with lock:
+            counts[0] += done
+            counts[1] += errors
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counts[0], counts[1], time.perf_counter() - start, histogram.snapshot()
+
+
+def run(threads, per_call, seconds, window, large, chunk_size):
+    # Imported inside the stand-in block: marketdata.config reads the MARKETDATA_* overrides at import.
+    from benchmarks.feed_server import BASE_INSTRUMENT_ID
+    from marketdata.market_data import MarketDataClient
+
+    logging.getLogger().setLevel(logging.ERROR)
+    instrument_ids = list(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + max(1000, large)))
+    print(f"threads={threads} instruments/call={per_call} seconds={seconds} window={window * 1e3:.1f}ms")
+
+    for label, coalesce in (("one request per call", False), ("coalesced", True)):
+        client = MarketDataClient("bench-app", "bench-user").warmup(websocket=False, instruments=False)
+        if coalesce:
+            client.enable_coalescing(window=window)
+        calls, errors, wall, stats = fan_in(client, instrument_ids[:1000], threads, per_call, seconds)
+        requests = client.get_coalescing_stats()["requests"]
+        print(f"  {label:<22}{calls / wall:>9,.0f} calls/s  REST requests={requests:,} "
+              f"({calls / max(requests, 1):.1f} calls each)  p50={stats['p50'] * 1e3:.2f}ms "
+              f"p99={stats['p99'] * 1e3:.2f}ms errors={errors}")
+
+    if large:
+        print(f"one get_ltp for {large:,} instruments")
+        for label, size in (("single request", large), (f"chunks of {chunk_size}", chunk_size)):
+            client = MarketDataClient("bench-app", "bench-user").warmup(websocket=False, instruments=False)
+            client.enable_coalescing(window=0.0, chunk_size=size)
+            start = time.perf_counter()
+            try:
+                response = client.get_ltp(instrument_ids[:large])
+                outcome = f"{len(response['data']):,} records"
+            except Exception as e:
+                outcome = f"failed: {str(e)[:60]}"
+            print(f"  {label:<22}{(time.perf_counter() - start) * 1e3:>9.1f} ms  {outcome}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--per-call", type=int, default=5, help="instruments per get_ltp call")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--window-ms", type=float, default=2.0, help="coalescing window")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="server-side delay per response")
+    parser.add_argument("--large", type=int, default=10000, help="instruments in the oversized call, 0 to skip")
+    parser.add_argument("--max-ids", type=int, default=1000, help="server's InstrumentIds limit")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    rest_args = ("--instruments", max(args.large, 1000), "--latency-ms", args.latency_ms, "--max-ids", args.max_ids)
+    with standins(rest_args=rest_args, feed=False):
+        run(args.threads, args.per_call, args.seconds, args.window_ms / 1000, args.large, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-frame decode cost: the default websocket path against wire.FastDecoder
+(binary frames, message reuse, interest filtering, flat tuples).
+
+    python -m benchmarks.bench_decode --frames 200000 --interest 0.1
+    python -m benchmarks.bench_decode --subtypes tick,touchline
+"""
+import argparse
+import base64
+import random
+import time
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID, SUBTYPES, build_message
+from marketdata.proto import marketdata_pb2
+from marketdata.wire import FastDecoder, flatten
+
+
+def synthetic_payloads(count, subtypes, instruments, seed=11):
+    rng = random.Random(seed)
+    return [
+        build_message(subtypes[i % len(subtypes)], BASE_INSTRUMENT_ID + rng.randrange(instruments), rng)
+        .SerializeToString()
+        for i in range(count)
+    ]
+
+
+def baseline(frame):
+    """What on_message did before the fast path: base64, fresh message, full parse."""
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.ParseFromString(base64.b64decode(frame))
+    return md_message
+
+
+def copy_message(md_message):
+    """What a consumer keeping messages must do once they are reused."""
+    copy = marketdata_pb2.MarketDataMessageBase()
+    copy.CopyFrom(md_message)
+    return copy
+
+
+def timed(label, decode, frames, reference=None):
+    for frame in frames:  # warm-up pass: steady state of a long-running feed
+        decode(frame)
+    start = time.perf_counter()
+    delivered = 0
+    for frame in frames:
+        if decode(frame) is not None:
+            delivered += 1
+    elapsed = time.perf_counter() - start
+    per_frame = elapsed / len(frames) * 1e9
+    speedup = f"  x{reference / per_frame:.2f}" if reference else ""
+    print(f"  {label:<34}{per_frame:>8,.0f} ns/frame {len(frames) / elapsed:>12,.0f} frames/s "
+          f"delivered={delivered:,}{speedup}")
+    return per_frame
+
+
+def run(count, subtypes, instruments, interest_fraction):
+    payloads = synthetic_payloads(count, subtypes, instruments)
+    text = [base64.b64encode(payload).decode("ascii") for payload in payloads]
+    interest = range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + max(1, int(instruments * interest_fraction)))
+    print(f"frames={count} subtypes={','.join(subtypes)} instruments={instruments} "
+          f"interest={interest_fraction:.0%}")
+
+    reference = timed("baseline (text)", baseline, text)
+    timed("fast, reuse (text)", FastDecoder().decode, text, reference)
+    timed("fast, reuse (binary)", FastDecoder().decode, payloads, reference)
+
+    decoder = FastDecoder()
+    kept = timed("fast + keep a copy (binary)", lambda frame: copy_message(decoder.decode(frame)), payloads)
+    timed("fast + keep flat tuples (binary)", lambda frame: flatten(decoder.decode(frame)), payloads, kept)
+
+    decoder = FastDecoder(instrument_ids=interest)
+    timed("fast, interest filter (text)", decoder.decode, text, reference)
+    decoder = FastDecoder(instrument_ids=interest)
+    timed("fast, interest filter (binary)", decoder.decode, payloads, reference)
+    print(f"    filter stats: {decoder.get_stats()}")
+
+    wanted = [SUBTYPES[subtypes[0]][0]]
+    timed(f"fast, only {wanted[0]} (text)", FastDecoder(subtypes=wanted).decode, text, reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--subtypes", default=",".join(SUBTYPES), help=f"comma-separated: {', '.join(SUBTYPES)}")
+    parser.add_argument("--instruments", type=int, default=2000)
+    parser.add_argument("--interest", type=float, default=0.1, help="fraction of instruments the consumer wants")
+    args = parser.parse_args()
+    run(args.frames, args.subtypes.split(","), args.instruments, args.interest)
+
+
+if __name__ == "__main__":
+    main()
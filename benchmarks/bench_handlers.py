@@ -0,0 +1,76 @@
+"""
+Typed handler routing against the hand-written WhichOneof switch, and the
+effect of not decoding subtypes nobody handles.
+
+    python -m benchmarks.bench_handlers --frames 200000 --watched 50
+"""
+import argparse
+import random
+import time
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID, SUBTYPES, build_message
+from marketdata.handlers import HandlerRegistry
+from marketdata.wire import FastDecoder, frame_payload, parse_payload
+
+
+def run(count, instruments, watched):
+    rng = random.Random(5)
+    names = list(SUBTYPES)
+    payloads = [
+        build_message(names[i % len(names)], BASE_INSTRUMENT_ID + rng.randrange(instruments), rng).SerializeToString()
+        for i in range(count)
+    ]
+    watched_ids = set(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + watched))
+    hits = [0]
+
+    def on_tick(body):
+        hits[0] += 1
+
+    # What consumers write today: decode everything, switch, look up the instrument.
+    def switch(md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype == "TickData":
+            body = md_message.TickData
+            if body.InstrumentID in watched_ids:
+                on_tick(body)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        switch(parse_payload(frame_payload(payload)))
+    manual = time.perf_counter() - start
+    manual_hits, hits[0] = hits[0], 0
+
+    registry = HandlerRegistry()
+    registry.add("TickData", on_tick, instrument_ids=watched_ids)
+    start = time.perf_counter()
+    for payload in payloads:
+        registry.dispatch(parse_payload(frame_payload(payload)))
+    routed = time.perf_counter() - start
+    routed_hits, hits[0] = hits[0], 0
+
+    decoder = FastDecoder(subtypes=registry.subtypes(), reuse=False)
+    start = time.perf_counter()
+    for payload in payloads:
+        md_message = decoder.decode(payload)
+        if md_message is not None:
+            registry.dispatch(md_message)
+    skipped = time.perf_counter() - start
+
+    print(f"frames={count} subtypes={len(names)} instruments={instruments} watched={watched}")
+    for label, elapsed, delivered in (("decode all + WhichOneof switch", manual, manual_hits),
+                                      ("decode all + HandlerRegistry", routed, routed_hits),
+                                      ("decode handled subtypes only", skipped, hits[0])):
+        print(f"  {label:<32}{elapsed / count * 1e9:>8,.0f} ns/frame  delivered={delivered:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--instruments", type=int, default=2000)
+    parser.add_argument("--watched", type=int, default=50, help="instruments with a TickData handler")
+    args = parser.parse_args()
+    run(args.frames, args.instruments, args.watched)
+
+
+if __name__ == "__main__":
+    main()
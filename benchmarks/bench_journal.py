@@ -0,0 +1,74 @@
+"""
+Tick journal recording cost and max-speed replay throughput.
+
+    python -m benchmarks.bench_journal --frames 500000
+"""
+import argparse
+import base64
+import random
+import shutil
+import tempfile
+import time
+
+from marketdata.journal import JournalReplay, TickJournal
+from marketdata.proto import marketdata_pb2
+
+
+def synthetic_frames(count, instruments=2000, seed=7):
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        md_message = marketdata_pb2.MarketDataMessageBase(MessageCode=1506)
+        md_message.TickData.InstrumentID = 1010010000000000 + rng.randrange(instruments)
+        md_message.TickData.LTP = 100.0 + rng.random()
+        md_message.TickData.LTQ = rng.randint(1, 500)
+        md_message.TickData.LTT = 1_700_000_000 + i // 1000
+        frames.append(base64.b64encode(md_message.SerializeToString()).decode("ascii"))
+    return frames
+
+
+def run(count, segment_mb, keep):
+    frames = synthetic_frames(count)
+    directory = tempfile.mkdtemp(prefix="mdjournal-")
+    try:
+        journal = TickJournal(directory, segment_bytes=segment_mb * 1024 * 1024).start()
+        record = journal.record
+        start = time.perf_counter()
+        for frame in frames:
+            record(frame)
+        reader_elapsed = time.perf_counter() - start
+        journal.close()
+        total_elapsed = time.perf_counter() - start
+        stats = journal.get_stats()
+        print(f"frames={count} segments={stats['segments']} bytes={stats['bytes']:,}")
+        print(f"  record():  {reader_elapsed / count * 1e9:,.0f} ns/frame on the reader thread")
+        print(f"  written:   {count / total_elapsed:,.0f} frames/s end to end")
+
+        replay = JournalReplay(directory)
+        start = time.perf_counter()
+        raw = sum(1 for _ in replay.frames())
+        elapsed = time.perf_counter() - start
+        print(f"  scan:      {raw / elapsed:,.0f} frames/s (mmap, no decode)")
+
+        start = time.perf_counter()
+        replayed = replay.run(lambda md_message: None, speed=None)
+        elapsed = time.perf_counter() - start
+        print(f"  replay:    {replayed / elapsed:,.0f} msgs/s (decoded, max speed)")
+    finally:
+        if keep:
+            print(f"  journal kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=500000)
+    parser.add_argument("--segment-mb", type=int, default=16)
+    parser.add_argument("--keep", action="store_true", help="leave the journal files on disk")
+    args = parser.parse_args()
+    run(args.frames, args.segment_mb, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Order book throughput on a synthetic IncrementalUpdateMessage stream.
+
+    python -m benchmarks.bench_order_book --instruments 200 --messages 50000
+"""
+import argparse
+import random
+import time
+
+from marketdata.order_book import ACTION_CHANGE, ACTION_DELETE, ACTION_NEW, OrderBookManager
+from marketdata.proto import marketdata_pb2
+
+
+def synthetic_stream(instruments, messages, entries_per_message, depth, seed=7):
+    rng = random.Random(seed)
+    ids = [1010010000000000 + i for i in range(instruments)]
+    levels = {iid: [0, 0] for iid in ids}
+    stream = []
+    for _ in range(messages):
+        md_message = marketdata_pb2.MarketDataMessageBase(MessageCode=1505)
+        update = md_message.IncrementalUpdateMessage
+        for _ in range(entries_per_message):
+            iid = rng.choice(ids)
+            side = rng.randint(0, 1)
+            count = levels[iid][side]
+            roll = rng.random()
+            if count == 0 or (roll < 0.3 and count < depth):
+                action, position = ACTION_NEW, rng.randint(1, count + 1)
+                levels[iid][side] += 1
+            elif roll < 0.45:
+                action, position = ACTION_DELETE, rng.randint(1, count)
+                levels[iid][side] -= 1
+            else:
+                action, position = ACTION_CHANGE, rng.randint(1, count)
+            entry = update.MDEntriesList.add()
+            entry.MDUpdateAction = action
+            entry.MDEntryType = side
+            entry.InstrumentID = iid
+            entry.MDEntryPosition = position
+            entry.MDEntryPrice = 100.0 + rng.randint(-500, 500) * 0.05
+            entry.MDEntrySize = rng.randint(1, 5000)
+        stream.append(md_message)
+    return stream
+
+
+def run(instruments, messages, entries_per_message, depth):
+    stream = synthetic_stream(instruments, messages, entries_per_message, depth)
+    manager = OrderBookManager(depth=depth)
+
+    start = time.perf_counter()
+    for md_message in stream:
+        manager.apply(md_message)
+    elapsed = time.perf_counter() - start
+
+    updates = messages * entries_per_message
+    print(f"instruments={instruments} messages={messages} entries/msg={entries_per_message} depth={depth}")
+    print(f"  {updates / elapsed:,.0f} updates/s  ({messages / elapsed:,.0f} msgs/s, {elapsed:.3f}s)")
+
+    start = time.perf_counter()
+    reads = 0
+    for book in manager.books.values():
+        for _ in range(1000):
+            book.best_bid()
+            book.best_ask()
+            book.imbalance()
+            reads += 3
+    elapsed = time.perf_counter() - start
+    print(f"  {reads / elapsed:,.0f} top-of-book reads/s")
+    print(f"  {manager.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instruments", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--entries", type=int, default=4, help="MDEntries per message")
+    parser.add_argument("--depth", type=int, default=20)
+    args = parser.parse_args()
+    run(args.instruments, args.messages, args.entries, args.depth)
+
+
+if __name__ == "__main__":
+    main()
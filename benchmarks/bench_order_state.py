@@ -0,0 +1,74 @@
+"""
+Per-poll cost of a risk loop over a day's order list: re-reading the full
+get_orders listing each time against OrderStateBook reconciliation (one
+parse, changed records only) and lookups.
+
+    python -m benchmarks.bench_order_state --orders 20000 --changed 50
+"""
+import argparse
+import json
+import random
+import time
+
+from marketdata.order_state import OrderStateBook
+
+
+def listing(orders):
+    text = json.dumps({"status": "success", "data": orders})
+    return {"status_code": 200, "response_text": text, "response_json": None}
+
+
+def timed(label, func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"  {label:<42}{per_call * 1e6:>12,.1f} us")
+    return per_call
+
+
+def run(count, changed, instruments, rounds):
+    rng = random.Random(3)
+    orders = [{"BlitzOrderId": i, "exchangeOrderId": 10 ** 9 + i, "instrumentId": rng.randrange(instruments),
+               "orderStatus": rng.choice(("OPEN", "FILLED", "CANCELLED")), "price": 100.0, "quantity": 1,
+               "strategyId": "s1"} for i in range(count)]
+    book = OrderStateBook()
+    book.reconcile_orders(listing(orders))
+    probe = rng.randrange(instruments)
+
+    # Each poll sees ``changed`` orders move on.
+    polls = []
+    for _ in range(rounds):
+        for index in rng.sample(range(count), changed):
+            orders[index] = dict(orders[index], orderStatus=rng.choice(("OPEN", "FILLED", "CANCELLED")))
+        polls.append(listing(orders))
+    unchanged = polls[-1]
+
+    def full_reparse():
+        # get_orders parses the body into response_json; the loop then rebuilds its view from the text.
+        json.loads(unchanged["response_text"])
+        records = json.loads(unchanged["response_text"])["data"]
+        return [o for o in records if o["instrumentId"] == probe and o["orderStatus"] == "OPEN"]
+
+    print(f"orders={count} changed/poll={changed} instruments={instruments}")
+    timed("get_orders + re-parse + scan (today)", full_reparse, rounds)
+    pending = iter(polls)
+    timed(f"book.reconcile_orders ({changed} changed)", lambda: book.reconcile_orders(next(pending)), rounds)
+    timed("book.reconcile_orders (body unchanged)", lambda: book.reconcile_orders(unchanged), rounds)
+    timed("book.get_open_orders(instrument)", lambda: book.get_open_orders(probe), rounds)
+    timed("book.get_order(exchange_order_id=...)", lambda: book.get_order(exchange_order_id=10 ** 9 + 7), rounds)
+    print(f"    {book.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--changed", type=int, default=50, help="orders whose status changes between polls")
+    parser.add_argument("--instruments", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    run(args.orders, args.changed, args.instruments, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
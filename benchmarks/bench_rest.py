@@ -0,0 +1,94 @@
+"""
+REST throughput and latency of MarketDataClient and BlitzAPIClient against
+benchmarks/rest_stub.py.
+
+    python -m benchmarks.bench_rest --threads 8 --seconds 5
+    python -m benchmarks.bench_rest --latency-ms 2 --calls get_ltp,place_order
+"""
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks.standins import Usage, format_usage, standins
+
+CALLS = ("get_ltp", "get_quote", "place_order", "get_orders")
+
+
+def _calls(md_client, blitz_client, instrument_ids):
+    order = {"instrumentId": instrument_ids[0], "side": "BUY", "quantity": 1, "price": 100.0, "orderType": "LIMIT"}
+    return {
+        "get_ltp": lambda: md_client.get_ltp(instrument_ids),
+        "get_quote": lambda: md_client.get_quote(instrument_ids),
+        "place_order": lambda: blitz_client.place_order(order),
+        "get_orders": blitz_client.get_orders,
+    }
+
+
+def measure(call, threads, seconds):
+    """Run ``call`` in a closed loop on ``threads`` threads; returns (requests, errors, histogram, usage)."""
+    from marketdata.metrics import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    counts = [0, 0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                call()
+            except Exception:
+                errors += 1
+            histogram.record(time.perf_counter() - start)
+            done += 1
+        with lock:
+            counts[0] += done
+            counts[1] += errors
+
+    usage = Usage()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counts[0], counts[1], histogram, usage.report()
+
+
+def run(calls, threads, seconds, batch):
+    # Imported inside the stand-in block: marketdata.config reads the MARKETDATA_* overrides at import.
+    from benchmarks.feed_server import BASE_INSTRUMENT_ID
+    from marketdata.blitz_api_client import BlitzAPIClient
+    from marketdata.market_data import MarketDataClient
+
+    logging.getLogger().setLevel(logging.WARNING)
+    md_client = MarketDataClient("bench-app", "bench-user")
+    blitz_client = BlitzAPIClient("bench-app", "bench-user")
+    available = _calls(md_client, blitz_client, list(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + batch)))
+    available["get_ltp"]()  # load the instrument master outside the timed loop
+
+    print(f"threads={threads} seconds={seconds} instruments/request={batch}")
+    for name in calls:
+        requests, errors, histogram, usage = measure(available[name], threads, seconds)
+        stats = histogram.snapshot()
+        print(f"  {name:<12}{requests / usage['wall']:>10,.0f} req/s  p50={stats['p50'] * 1e3:.2f}ms "
+              f"p99={stats['p99'] * 1e3:.2f}ms errors={errors}  {format_usage(usage)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", default=",".join(CALLS), help=f"comma-separated: {', '.join(CALLS)}")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=10, help="instruments per get_ltp/get_quote request")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server-side delay per response")
+    args = parser.parse_args()
+    rest_args = ("--instruments", max(args.batch, 1000), "--latency-ms", args.latency_ms)
+    with standins(rest_args=rest_args, feed=False):
+        run(args.calls.split(","), args.threads, args.seconds, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Start-up cost of the SDK in a fresh interpreter: import time of the package
+and the clients, client construction, and the latency of the first get_ltp
+with and without warmup(), against benchmarks/rest_stub.py.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.standins import standins
+
+IMPORTS = (
+    ("python (no import)", "pass"),
+    ("import marketdata", "import marketdata"),
+    ("import marketdata.config", "import marketdata.config"),
+    ("from marketdata import MarketDataClient", "from marketdata import MarketDataClient"),
+    ("from marketdata import BlitzAPIClient", "from marketdata import BlitzAPIClient"),
+)
+
+FIRST_CALL = """
+import json, logging, sys, time
+start = time.perf_counter()
+from marketdata import MarketDataClient
+imported = time.perf_counter()
+logging.getLogger().setLevel(logging.WARNING)
+client = MarketDataClient("bench-app", "bench-user")
+constructed = time.perf_counter()
+if sys.argv[1] == "warmup":
+    client.warmup()
+warm = time.perf_counter()
+client.get_ltp(list(range(int(sys.argv[2]), int(sys.argv[2]) + 10)))
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "construct": constructed - imported,
+                  "warmup": warm - constructed, "first get_ltp": done - warm}))
+"""
+
+
+def _python(code, *args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, "-c", code, *map(str, args)], cwd=root, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def import_times(runs):
+    print(f"import time, fresh interpreter (median of {runs})")
+    timer = "import time; start = time.perf_counter(); {}; print(time.perf_counter() - start)"
+    for label, statement in IMPORTS:
+        samples = [float(_python(timer.format(statement))) for _ in range(runs)]
+        print(f"  {label:<44}{statistics.median(samples) * 1e3:>8.1f} ms")
+
+
+def first_call(runs):
+    from benchmarks.feed_server import BASE_INSTRUMENT_ID
+
+    print(f"first request, fresh interpreter (median of {runs})")
+    for mode in ("lazy", "warmup"):
+        samples = [json.loads(_python(FIRST_CALL, mode, BASE_INSTRUMENT_ID)) for _ in range(runs)]
+        phases = "  ".join(f"{phase}={statistics.median(s[phase] for s in samples) * 1e3:.1f}ms"
+                           for phase in samples[0])
+        print(f"  {mode:<8}{phases}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--login-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    import_times(args.runs)
+    with standins(rest_args=("--login-latency-ms", args.login_latency_ms), feed=False):
+        first_call(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+End-to-end streaming throughput and latency of MarketDataClient against the
+local stand-ins (benchmarks/feed_server.py and benchmarks/rest_stub.py).
+
+    python -m benchmarks.bench_stream --rate 20000 --instruments 1000 --seconds 10
+    python -m benchmarks.bench_stream --rate 0 --subtypes tick,touchline   # unthrottled
+    python -m benchmarks.bench_stream --rate 0 --binary --fast-decode --interest 0.1
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.standins import Usage, format_usage, standins
+
+
+def run(rate, instruments, subtypes, seconds, warmup, fast_decode=False, interest=1.0):
+    # Imported inside the stand-in block: marketdata.config reads the MARKETDATA_* overrides at import.
+    from benchmarks.feed_server import BASE_INSTRUMENT_ID
+    from marketdata.market_data import MarketDataClient
+
+    logging.getLogger().setLevel(logging.WARNING)
+    client = MarketDataClient("bench-app", "bench-user")
+    received = [0]
+
+    def on_tick(md_message):
+        received[0] += 1
+
+    client.on_message = on_tick
+    instrument_ids = list(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + instruments))
+    if fast_decode:
+        wanted = instrument_ids[:max(1, int(instruments * interest))] if interest < 1 else None
+        client.enable_fast_decode(wanted, reuse=True)  # on_tick keeps nothing
+    client.connect_ws()
+    client.subscribe_market_data(instrument_ids)
+
+    time.sleep(warmup)
+    client.enable_stream_stats()
+    client.get_stream_stats()  # start the per-second window here
+    usage = Usage()
+    time.sleep(seconds)
+    stats = client.get_stream_stats()
+    report = usage.report()
+    client.stop_websocket()
+
+    print(f"rate={rate or 'unthrottled'} instruments={instruments} subtypes={subtypes} seconds={seconds} "
+          f"fast_decode={fast_decode} interest={interest:.0%}")
+    print(f"  {stats['per_second']['messages']:,.0f} msgs/s, {stats['per_second']['bytes'] / 1e6:,.1f} MB/s, "
+          f"parse_errors={stats['parse_errors']} callback_errors={stats['callback_errors']}")
+    print(f"  delivered to on_message: {received[0]:,}")
+    print(f"  {format_usage(report)}")
+    print(f"  {'subtype':<26}{'msgs':>10}{'decode p50':>12}{'p99':>10}{'callback p50':>14}{'p99':>10}"
+          f"{'feed→recv p99':>15}")
+    for subtype, row in sorted(stats["subtypes"].items()):
+        decode, callback, wire = row["recv_to_decoded"], row["decoded_to_callback"], row["exchange_to_recv"]
+        print(f"  {subtype:<26}{row['messages']:>10,}"
+              f"{decode['p50'] * 1e6:>10.1f}us{decode['p99'] * 1e6:>8.1f}us"
+              f"{callback['p50'] * 1e6:>12.1f}us{callback['p99'] * 1e6:>8.1f}us"
+              f"{wire['p99'] * 1e3:>13.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=20000, help="feed msgs/s, 0 for unthrottled")
+    parser.add_argument("--instruments", type=int, default=1000)
+    parser.add_argument("--subtypes", default="ticker,touchline,depth,index,index_list,incremental,tick")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--binary", action="store_true", help="feed raw protobuf in binary frames")
+    parser.add_argument("--fast-decode", action="store_true", help="use wire.FastDecoder")
+    parser.add_argument("--interest", type=float, default=1.0,
+                        help="with --fast-decode, fraction of subscribed instruments kept")
+    args = parser.parse_args()
+    feed_args = ("--rate", args.rate, "--subtypes", args.subtypes) + (("--binary",) if args.binary else ())
+    rest_args = ("--instruments", args.instruments)
+    with standins(feed_args, rest_args):
+        run(args.rate, args.instruments, args.subtypes, args.seconds, args.warmup, args.fast_decode, args.interest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Local stand-in for the market data websocket.
+
+Speaks just enough RFC 6455 (stdlib only) to accept MarketDataWebSocketClient
+connections, honours {"action": "subscribe"|"unsubscribe"} frames and streams
+base64-encoded MarketDataMessageBase frames for every subtype (raw protobuf
+in binary frames with --binary).
+
+    python -m benchmarks.feed_server --port 8765 --rate 20000 --subtypes tick,touchline,depth
+
+Point the SDK at it with MARKETDATA_WS_URL=ws://127.0.0.1:8765/ws?key=
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import time
+
+from marketdata.proto import marketdata_pb2
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# subtype name -> (oneof field, MessageCode)
+SUBTYPES = {
+    "ticker": ("TickDataMessage", 1500),
+    "touchline": ("TouchLineDataMessage", 1501),
+    "depth": ("MarketDepthMessage", 1502),
+    "index": ("IndexDataMessage", 1503),
+    "index_list": ("IndexDataListMessage", 1504),
+    "incremental": ("IncrementalUpdateMessage", 1505),
+    "tick": ("TickData", 1506),
+}
+
+BASE_INSTRUMENT_ID = 1010010000000000
+
+
+# ----------------------------------------------------------------------
+# Synthetic messages
+# ----------------------------------------------------------------------
+def _fill_quote(body, instrument_id, rng, now_ms, levels=0):
+    price = 100.0 + (instrument_id % 1000) + rng.random()
+    body.InstrumentID = instrument_id
+    body.ExchangeSegment = 1
+    body.TimeStamp = now_ms
+    body.LTP = price
+    body.LTQ = rng.randint(1, 500)
+    body.LTT = now_ms
+    if levels:
+        body.ATP = price
+        body.VTT = rng.randint(1000, 10 ** 7)
+        body.TBQ = rng.randint(1000, 10 ** 6)
+        body.TSQ = rng.randint(1000, 10 ** 6)
+        body.Open = body.High = body.Low = body.Close = price
+        body.OI = rng.randint(0, 10 ** 6)
+        for level in range(levels):
+            body.BestBidLevel.add(Qty=rng.randint(1, 5000), Price=price - 0.05 * (level + 1), Orders=rng.randint(1, 50))
+            body.BestAskLevel.add(Qty=rng.randint(1, 5000), Price=price + 0.05 * (level + 1), Orders=rng.randint(1, 50))
+
+
+def _fill_index(index_data, instrument_id, rng, now_ms):
+    value = 20000.0 + rng.random() * 100
+    index_data.InstrumentID = instrument_id
+    index_data.ExchangeSegment = 1
+    index_data.IndexName = f"INDEX{instrument_id % 100}"
+    index_data.TimeStamp = now_ms
+    index_data.Last = value
+    index_data.Open = index_data.High = index_data.Low = index_data.Close = value
+
+
+def build_message(subtype, instrument_id, rng, now_ms=None):
+    """One synthetic MarketDataMessageBase of the given SUBTYPES key."""
+    field, code = SUBTYPES[subtype]
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    md_message = marketdata_pb2.MarketDataMessageBase(MessageCode=code)
+    if subtype == "tick":
+        body = md_message.TickData
+        body.InstrumentID = instrument_id
+        body.ExchangeSegment = 1
+        body.LTP = 100.0 + (instrument_id % 1000) + rng.random()
+        body.LTQ = rng.randint(1, 500)
+        body.LTT = now_ms
+    elif subtype == "ticker":
+        _fill_quote(md_message.TickDataMessage, instrument_id, rng, now_ms)
+    elif subtype == "touchline":
+        _fill_quote(md_message.TouchLineDataMessage, instrument_id, rng, now_ms, levels=1)
+    elif subtype == "depth":
+        _fill_quote(md_message.MarketDepthMessage, instrument_id, rng, now_ms, levels=5)
+    elif subtype == "index":
+        _fill_index(md_message.IndexDataMessage.IndexData, instrument_id, rng, now_ms)
+    elif subtype == "index_list":
+        for offset in range(5):
+            _fill_index(md_message.IndexDataListMessage.IndexDataList.add(), instrument_id + offset, rng, now_ms)
+    elif subtype == "incremental":
+        price = 100.0 + (instrument_id % 1000)
+        for side in (0, 1):
+            md_message.IncrementalUpdateMessage.MDEntriesList.add(
+                MDUpdateAction=1,
+                MDEntryType=side,
+                InstrumentID=instrument_id,
+                ExchangeSegment=1,
+                MDEntryPrice=price + (0.05 if side else -0.05) * rng.randint(1, 5),
+                MDEntrySize=rng.randint(1, 5000),
+                MDEntryTime=now_ms // 1000 % (1 << 31),
+                MDEntryPosition=rng.randint(0, 4),
+            )
+    return md_message
+
+
+def build_frame(subtype, instrument_id, rng, now_ms=None, binary=False):
+    """The base64 text payload the real feed sends for a synthetic message (raw protobuf with ``binary``)."""
+    payload = build_message(subtype, instrument_id, rng, now_ms).SerializeToString()
+    return payload if binary else base64.b64encode(payload)
+
+
+# ----------------------------------------------------------------------
+# RFC 6455 framing
+# ----------------------------------------------------------------------
+def encode_frame(payload, opcode=OP_TEXT):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader):
+    """Return (opcode, payload) of the next client frame."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+        payload = (int.from_bytes(payload, "big") ^ key).to_bytes(length, "big")
+    return first & 0x0F, payload
+
+
+async def handshake(reader, writer):
+    try:
+        request = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return False  # e.g. a plain TCP readiness probe
+    headers = {}
+    for line in request.split(b"\r\n")[1:]:
+        if b":" in line:
+            name, value = line.split(b":", 1)
+            headers[name.strip().lower()] = value.strip()
+    key = headers.get(b"sec-websocket-key")
+    if key is None:
+        writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+        return False
+    accept = base64.b64encode(hashlib.sha1(key + _GUID).digest())
+    writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+    await writer.drain()
+    return True
+
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+class FeedServer:
+    """
+    Streams synthetic frames to every connection at ``rate`` msgs/s (0 =
+    as fast as the socket drains), cycling through ``subtypes`` and the
+    connection's subscribed instruments. With ``broadcast`` each connection
+    gets ``instruments`` synthetic ids without subscribing.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, rate=10000, subtypes=tuple(SUBTYPES), instruments=0,
+                 broadcast=False, seed=1, binary=False):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.subtypes = tuple(subtypes)
+        self.instruments = instruments
+        self.broadcast = broadcast
+        self.seed = seed
+        self.binary = binary
+        self.connections = 0
+        self.sent = 0
+
+    async def _handle(self, reader, writer):
+        if not await handshake(reader, writer):
+            writer.close()
+            return
+        self.connections += 1
+        subscribed = {}
+        if self.broadcast:
+            subscribed.update(dict.fromkeys(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + self.instruments)))
+        closed = asyncio.Event()
+        sender = asyncio.ensure_future(self._stream(writer, subscribed, closed))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OP_CLOSE:
+                    writer.write(encode_frame(payload[:2], OP_CLOSE))
+                    break
+                if opcode == OP_PING:
+                    writer.write(encode_frame(payload, OP_PONG))
+                elif opcode == OP_TEXT and payload != b"ping":
+                    try:
+                        request = json.loads(payload)
+                    except ValueError:
+                        continue
+                    ids = request.get("instrumentIds") or []
+                    if request.get("action") == "subscribe":
+                        subscribed.update(dict.fromkeys(ids))
+                    elif request.get("action") == "unsubscribe":
+                        for instrument_id in ids:
+                            subscribed.pop(instrument_id, None)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            closed.set()
+            sender.cancel()
+            self.connections -= 1
+            writer.close()
+
+    async def _stream(self, writer, subscribed, closed):
+        rng = random.Random(self.seed)
+        subtypes = self.subtypes
+        started = time.perf_counter()
+        sent = 0
+        position = 0
+        binary = self.binary
+        opcode = OP_BINARY if binary else OP_TEXT
+        while not closed.is_set():
+            ids = list(subscribed)
+            if not ids:
+                await asyncio.sleep(0.01)
+                started, sent = time.perf_counter(), 0
+                continue
+            if self.rate:
+                due = int((time.perf_counter() - started) * self.rate) - sent
+                if due <= 0:
+                    await asyncio.sleep(0.001)
+                    continue
+                due = min(due, 2000)
+            else:
+                due = 256
+            now_ms = int(time.time() * 1000)
+            frames = []
+            for _ in range(due):
+                subtype = subtypes[position % len(subtypes)]
+                instrument_id = ids[(position // len(subtypes)) % len(ids)]
+                frames.append(encode_frame(build_frame(subtype, instrument_id, rng, now_ms, binary), opcode))
+                position += 1
+            writer.write(b"".join(frames))
+            sent += due
+            self.sent += due
+            try:
+                await writer.drain()
+            except ConnectionError:
+                return
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=int, default=10000, help="msgs/s per connection, 0 for unthrottled")
+    parser.add_argument("--subtypes", default=",".join(SUBTYPES), help=f"comma-separated: {', '.join(SUBTYPES)}")
+    parser.add_argument("--instruments", type=int, default=1000, help="instrument count for --broadcast")
+    parser.add_argument("--broadcast", action="store_true", help="stream without waiting for subscriptions")
+    parser.add_argument("--binary", action="store_true", help="send raw protobuf in binary frames")
+    args = parser.parse_args()
+    server = FeedServer(args.host, args.port, args.rate, args.subtypes.split(","), args.instruments, args.broadcast,
+                        binary=args.binary)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Local stand-in for the auth, /marketfeed/*, orders/* and instrument endpoints.
+
+    python -m benchmarks.rest_stub --port 8766 --instruments 5000 --latency-ms 0
+    python -m benchmarks.rest_stub --token-ttl 5 --login-latency-ms 50   # expiring JWTs, 401 after exp
+    python -m benchmarks.rest_stub --max-ids 1000   # 413 for larger get_ltp/get_quote lists
+
+Point the SDK at it with
+    MARKETDATA_AUTH_BASE_URL=http://127.0.0.1:8766/api_gateway/v1
+    MARKETDATA_API_BASE_URL=http://127.0.0.1:8766/md-api
+    MARKETDATA_INSTRUMENT_URL=http://127.0.0.1:8766/instruments/gz/download
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID
+
+
+def synthetic_instruments(count):
+    """Instrument master rows for ``count`` NSECM equities starting at BASE_INSTRUMENT_ID."""
+    return [
+        {
+            "instrumentId": BASE_INSTRUMENT_ID + i,
+            "exchangeSegment": "NSECM",
+            "instrumentName": f"SYM{i}",
+            "lotSize": 1,
+        }
+        for i in range(count)
+    ]
+
+
+class RestStub:
+    """
+    Serves canned JSON for every SDK REST call; ``latency`` adds a fixed delay
+    per request. With ``token_ttl`` logins issue JWT-shaped tokens that expire
+    after that many seconds, and requests carrying an expired token get 401.
+    ``max_ids`` rejects get_ltp/get_quote lists longer than that with 413.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8766, instruments=1000, latency=0.0, seed=1, token_ttl=0.0,
+                 login_latency=0.0, max_ids=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.login_latency = login_latency
+        self.max_ids = max_ids
+        self.requests = 0
+        self.logins = 0
+        self.rejected = 0
+        self._rng = random.Random(seed)
+        self._order_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        body = json.dumps(synthetic_instruments(instruments)).encode("utf-8")
+        self.instruments_gz = gzip.compress(body)
+        self.instruments_etag = hashlib.md5(body).hexdigest()
+        self.server = None
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+    def _quote(self, instrument_id):
+        price = 100.0 + instrument_id % 1000 + self._rng.random()
+        return {"instrumentId": instrument_id, "LTP": price, "LTQ": 10, "LTT": int(time.time()),
+                "Open": price, "High": price, "Low": price, "Close": price, "OI": 0}
+
+    def issue_token(self):
+        with self._lock:
+            self.logins += 1
+            serial = self.logins
+        if not self.token_ttl:
+            return "bench-token"
+        claims = {"sub": "bench-user", "jti": serial, "exp": time.time() + self.token_ttl}
+        encode = lambda part: base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+        return f"{encode({'alg': 'none'})}.{encode(claims)}.bench"
+
+    def token_valid(self, authorization):
+        if not self.token_ttl:
+            return True
+        try:
+            payload = (authorization or "").split(" ", 1)[1].split(".")[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            return time.time() < claims["exp"]
+        except (IndexError, KeyError, ValueError):
+            return False
+
+    def respond(self, method, path, body):
+        """Return (status, payload) for a request."""
+        if path.endswith("/api/app_login"):
+            if self.login_latency:
+                time.sleep(self.login_latency)
+            return 200, {"status": "success", "data": {"accessToken": self.issue_token()}}
+        if path.endswith("/marketfeed/ltp") or path.endswith("/marketfeed/quote"):
+            ids = (body or {}).get("InstrumentIds") or []
+            if self.max_ids and len(ids) > self.max_ids:
+                return 413, {"status": "error", "message": f"At most {self.max_ids} InstrumentIds per request"}
+            return 200, {"status": "success", "data": [self._quote(i) for i in ids]}
+        if path.endswith("/marketfeed/optionChain"):
+            return 200, {"status": "success", "data": []}
+        if path.endswith("/marketfeed/historicalData"):
+            start = int(time.time()) - 3600
+            candles = [[start + 60 * i, 100.0, 101.0, 99.0, 100.5, 1000, 0] for i in range(60)]
+            return 200, {"status": "success", "data": candles}
+        if path.endswith("orders/placeOrder") or path.endswith("orders/modifyOrder"):
+            with self._lock:
+                order_id = next(self._order_ids)
+            return 200, {"status": "success", "data": {"BlitzOrderId": order_id, "exchangeOrderId": order_id}}
+        if path.endswith("orders/cancelOrder"):
+            return 200, {"status": "success", "data": {}}
+        for suffix in ("orders", "positions", "trades", "strategy/statistics", "signals"):
+            if path.endswith(suffix):
+                return 200, {"status": "success", "data": []}
+        if "/orders/" in path or path.rsplit("/", 1)[-1].isdigit():
+            return 200, {"status": "success", "data": {}}
+        return 404, {"status": "error", "message": f"No stub for {method} {path}"}
+
+    # ------------------------------------------------------------------
+    # Server
+    # ------------------------------------------------------------------
+    def _handler(self):
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real gateway
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def _send(self, status, payload, content_type="application/json", headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                path = urlparse(self.path).path
+
+                if path.endswith("/gz/download"):
+                    if self.headers.get("If-None-Match") == stub.instruments_etag:
+                        self._send(304, b"", headers=[("ETag", stub.instruments_etag)])
+                    else:
+                        self._send(200, stub.instruments_gz, "application/gzip",
+                                   [("ETag", stub.instruments_etag)])
+                    return
+
+                if not path.endswith("/api/app_login") and not stub.token_valid(self.headers.get("Authorization")):
+                    stub.rejected += 1
+                    self._send(401, b'{"status": "error", "message": "Token expired"}')
+                    return
+
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                status, payload = stub.respond(self.command, path, body)
+                self._send(status, json.dumps(payload).encode("utf-8"))
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return _Handler
+
+    def start(self):
+        """Serve from a daemon thread; returns self."""
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--instruments", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay added to every response")
+    parser.add_argument("--token-ttl", type=float, default=0.0, help="seconds until issued tokens expire, 0 = never")
+    parser.add_argument("--login-latency-ms", type=float, default=0.0, help="extra delay on app_login")
+    parser.add_argument("--max-ids", type=int, default=0, help="reject longer get_ltp/get_quote lists, 0 = no limit")
+    args = parser.parse_args()
+    stub = RestStub(args.host, args.port, args.instruments, args.latency_ms / 1000, token_ttl=args.token_ttl,
+                    login_latency=args.login_latency_ms / 1000, max_ids=args.max_ids).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Start feed_server and rest_stub as subprocesses and point the SDK at them.
+
+The MARKETDATA_* variables are read when marketdata.config is imported, so
+benchmarks enter ``standins()`` before importing anything from marketdata.
+"""
+import contextlib
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stand-in exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Stand-in did not listen on port {port} within {timeout}s")
+
+
+def _spawn(module, port, *args):
+    command = [sys.executable, "-m", f"benchmarks.{module}", "--port", str(port), *map(str, args)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    _wait_for_port(port, process)
+    return process
+
+
+@contextlib.contextmanager
+def standins(feed_args=(), rest_args=(), feed=True):
+    """Run the stand-ins for the duration of the block with the environment pointing at them."""
+    rest_port = free_port()
+    processes = [_spawn("rest_stub", rest_port, *rest_args)]
+    cache_dir = tempfile.mkdtemp(prefix="marketdata-bench-")
+    rest_url = f"http://127.0.0.1:{rest_port}"
+    env = {
+        "MARKETDATA_AUTH_BASE_URL": f"{rest_url}/api_gateway/v1/",
+        "MARKETDATA_API_BASE_URL": f"{rest_url}/md-api/",
+        "MARKETDATA_INSTRUMENT_URL": f"{rest_url}/instruments/gz/download",
+        "MARKETDATA_CACHE_DIR": cache_dir,
+    }
+    try:
+        if feed:
+            feed_port = free_port()
+            processes.append(_spawn("feed_server", feed_port, *feed_args))
+            env["MARKETDATA_WS_URL"] = f"ws://127.0.0.1:{feed_port}/ws?key="
+        os.environ.update(env)
+        yield env
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(5)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+class Usage:
+    """CPU time and peak RSS of this process between construction and ``report()``."""
+
+    def __init__(self):
+        self._start = resource.getrusage(resource.RUSAGE_SELF)
+        self._wall = time.perf_counter()
+
+    def report(self):
+        end = resource.getrusage(resource.RUSAGE_SELF)
+        wall = time.perf_counter() - self._wall
+        cpu = (end.ru_utime - self._start.ru_utime) + (end.ru_stime - self._start.ru_stime)
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss_mb = end.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        return {"wall": wall, "cpu": cpu, "cpu_pct": 100.0 * cpu / wall if wall else 0.0, "max_rss_mb": rss_mb}
+
+
+def format_usage(usage):
+    return (f"cpu={usage['cpu']:.2f}s ({usage['cpu_pct']:.0f}% of one core) "
+            f"max_rss={usage['max_rss_mb']:.1f}MB")
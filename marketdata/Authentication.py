@@ -1,17 +1,51 @@
-import requests
+import base64
+import json
 import logging
+import threading
+import time
 
+from . import config, http_session
 from .config import AUTH_BASE_URL
 
 
+def token_expiry(token):
+    """The ``exp`` claim (epoch seconds) of a JWT access token, or None."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 class AuthClient:
-    def __init__(self, app_key: str, user_id: str):
+    """
+    Logs in and keeps the access token fresh.
+
+    Logins are single-flight: threads that hit an expired token together
+    trigger one login and share its result. When the token's lifetime is
+    known (JWT ``exp`` claim, or config.TOKEN_TTL) a background thread logs
+    in again ahead of expiry, and token listeners (the HTTP and websocket
+    clients) pick up the new token without waiting on a login.
+    """
+
+    def __init__(self, app_key: str, user_id: str, auto_refresh=None):
         self.app_key = app_key
         self.user_id = user_id
 
         self.auth_base_url = AUTH_BASE_URL.rstrip("/")
 
         self.access_token = None
+        self.expires_at = None
+        self.auto_refresh = config.TOKEN_AUTO_REFRESH if auto_refresh is None else auto_refresh
+        self.logins = 0
+
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._refresh_at = None
+        self._refresher = None
+        self._stop_event = threading.Event()
+        self._closed = False
 
     def _app_login(self):
         login_url = f"{self.auth_base_url}/api/app_login"
@@ -26,12 +60,12 @@ class AuthClient:
             "userId": self.user_id
         }
 
-        response = requests.post(login_url, json=payload, headers=headers)
+        response = http_session.request("POST", login_url, endpoint="/api/app_login", json=payload, headers=headers)
 
         if response.status_code == 200:
             json_response = response.json()
             if json_response.get("status") == "success":
-                self.access_token = json_response["data"]["accessToken"]
+                self._set_token(json_response["data"]["accessToken"])
                 logging.info("App login successful.")
             else:
                 raise Exception(
@@ -42,8 +76,100 @@ class AuthClient:
                 f"App login failed. Status Code: {response.status_code} - {response.text}"
             )
 
+    def _set_token(self, token):
+        now = time.time()
+        self.access_token = token
+        self.logins += 1
+        self.expires_at = token_expiry(token)
+        if self.expires_at is None and config.TOKEN_TTL:
+            self.expires_at = now + config.TOKEN_TTL
+        if self.expires_at is not None:
+            lifetime = self.expires_at - now
+            self._refresh_at = now + max(lifetime - config.TOKEN_REFRESH_MARGIN, lifetime / 2)
+        else:
+            self._refresh_at = None
+
+        for listener in list(self._listeners):
+            try:
+                listener(token)
+            except Exception as e:
+                logging.error(f"Token listener raised: {e}")
+
+        if self.auto_refresh and not self._closed and self._refresh_at is not None and self._refresher is None:
+            self._stop_event.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresh", daemon=True)
+            self._refresher.start()
+
     def get_access_token(self):
-        """Return the access token, logging in if necessary."""
-        if not self.access_token:
+        """Return the access token, logging in if there is none or it is about to expire."""
+        token = self.access_token
+        if token and (self._refresh_at is None or time.time() < self._refresh_at):
+            return token
+        if token and self._refresher is not None and time.time() < self.expires_at:
+            return token  # still valid; the background refresh is on its way
+        return self.refresh_access_token(stale_token=token)
+
+    def refresh_access_token(self, stale_token=None):
+        """
+        Log in again and return the new token, unless another thread already
+        replaced ``stale_token``, in which case its token is returned.
+        """
+        with self._lock:
+            if self.access_token is not None and self.access_token != stale_token:
+                return self.access_token
             self._app_login()
-        return self.access_token
+            return self.access_token
+
+    def add_token_listener(self, listener):
+        """Call ``listener(token)`` after every login."""
+        self._listeners.append(listener)
+
+    def remove_token_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _refresh_loop(self):
+        delay = 1.0
+        while True:
+            refresh_at = self._refresh_at
+            if refresh_at is None:
+                break
+            if self._stop_event.wait(max(refresh_at - time.time(), 0)):
+                break
+            if self._refresh_at != refresh_at:
+                continue  # a 401 handler already logged in
+            try:
+                self.refresh_access_token(stale_token=self.access_token)
+                delay = 1.0
+            except Exception as e:
+                logging.error(f"Background token refresh failed: {e}; retrying in {delay:.0f}s")
+                if self._stop_event.wait(delay):
+                    break
+                delay = min(delay * 2, 30)
+        with self._lock:
+            if self._refresher is threading.current_thread():
+                self._refresher = None
+
+    def stop_auto_refresh(self):
+        self._stop_event.set()
+        refresher = self._refresher
+        if refresher is None or refresher is threading.current_thread():
+            return
+        refresher.join(5)
+        # Joined outside the lock: the refresher takes it to log in. One that is
+        # still running stays registered, so _set_token cannot start a second.
+        with self._lock:
+            if self._refresher is refresher and not refresher.is_alive():
+                self._refresher = None
+
+    def close(self):
+        """Stop the background refresh for good; tokens are still refreshed on demand."""
+        self._closed = True
+        self.stop_auto_refresh()
+
+    def get_stats(self):
+        return {
+            "logins": self.logins,
+            "expires_in": self.expires_at - time.time() if self.expires_at else None,
+            "auto_refresh": self._refresher is not None,
+        }
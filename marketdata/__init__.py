@@ -1 +1,27 @@
-from .market_data import MarketDataClient
\ No newline at end of file
+"""
+Market data and order entry SDK.
+
+The clients are imported on first access, so ``import marketdata`` (and
+importing a single submodule such as ``marketdata.config``) stays cheap.
+"""
+import importlib
+
+_LAZY = {
+    "MarketDataClient": "market_data",
+    "BlitzAPIClient": "blitz_api_client",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,263 @@
+"""
+Asyncio clients for market data and order entry, built on aiohttp.
+
+    async with AsyncMarketDataClient(app_key, user_id) as client:
+        print(await client.get_ltp(["NSECM|RELIANCE"]))
+        async for md_message in client.stream(["NSECM|RELIANCE"]):
+            ...
+"""
+import asyncio
+import json
+import logging
+import random
+
+from . import config, instrument as instruments
+from .http_session import endpoint_timeout
+from .wire import frame_payload, parse_payload
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency: pip install marketdataSolution[async]
+    aiohttp = None
+
+
+class _AsyncBaseClient:
+    """Shared login, pooled aiohttp session and token refresh for the async clients."""
+
+    def __init__(self, app_key: str, user_id: str, api_base_url=None, auth_base_url=None, pool_size=None):
+        if aiohttp is None:
+            raise ImportError("The async clients require aiohttp: pip install aiohttp")
+        self.app_key = app_key
+        self.user_id = user_id
+        self.api_base_url = api_base_url or config.API_BASE_URL
+        self.auth_base_url = (auth_base_url or config.AUTH_BASE_URL).rstrip("/")
+        self.pool_size = pool_size or config.HTTP_POOL_SIZE
+        self.access_token = None
+        self._session = None
+        self._login_lock = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def connect(self):
+        """Open the connection pool and log in."""
+        await self._ensure_logged_in()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _app_login(self):
+        login_url = f"{self.auth_base_url}/api/app_login"
+        headers = {"Content-Type": "application/json", "Accept": "*/*"}
+        payload = {"appKey": self.app_key, "userId": self.user_id}
+
+        async with self._get_session().post(login_url, json=payload, headers=headers,
+                                            timeout=self._timeout("/api/app_login")) as response:
+            text = await response.text()
+            if response.status != 200:
+                raise Exception(f"App login failed. Status Code: {response.status} - {text}")
+            json_response = json.loads(text)
+            if json_response.get("status") != "success":
+                raise Exception(f"App login failed: {json_response.get('message', 'Unknown error')}")
+            self.access_token = json_response["data"]["accessToken"]
+            logging.info("App login successful.")
+
+    async def _ensure_logged_in(self, stale_token=None):
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            # Another task may already have replaced the stale token.
+            if self.access_token is None or self.access_token == stale_token:
+                await self._app_login()
+        return self.access_token
+
+    @staticmethod
+    def _timeout(endpoint):
+        timeout = endpoint_timeout(endpoint)
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    async def _raw_request(self, method, endpoint, payload=None, params=None):
+        """Send one request, refreshing the token once on 401. Returns (status, text, headers)."""
+        token = self.access_token or await self._ensure_logged_in()
+        for attempt in range(2):
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+                "Accept": "*/*"
+            }
+            async with self._get_session().request(
+                method, f"{self.api_base_url}{endpoint}", json=payload, params=params,
+                headers=headers, timeout=self._timeout(endpoint),
+            ) as response:
+                text = await response.text()
+                if response.status == 401 and attempt == 0:
+                    logging.warning("Access token expired. Refreshing token and retrying...")
+                    token = await self._ensure_logged_in(stale_token=token)
+                    continue
+                return response.status, text, dict(response.headers)
+
+    @staticmethod
+    async def _resolve_ids(items):
+        if instruments.INSTRUMENT_INDEX is None:
+            loop = asyncio.get_running_loop()
+            return (await loop.run_in_executor(None, instruments.resolve_instruments, items)).ids
+        return instruments.resolve_instruments(items).ids
+
+
+class AsyncMarketDataClient(_AsyncBaseClient):
+    """Async counterpart of MarketDataClient."""
+
+    def __init__(self, app_key: str, user_id: str, api_base_url=None, auth_base_url=None, ws_url=None,
+                 pool_size=None):
+        super().__init__(app_key, user_id, api_base_url, auth_base_url, pool_size)
+        self.web_base_url = ws_url or config.Web_Base_URL
+        self.ping_interval = 30
+        self._ws = None
+        self._subscribed = {}  # instrumentId -> None, kept in subscription order
+
+    async def _send_request(self, endpoint, payload):
+        status, text, _ = await self._raw_request("POST", endpoint, payload)
+        if status == 200:
+            return json.loads(text)
+        raise Exception(f"Request failed: {status} - {text}")
+
+    async def get_ltp(self, instrument):
+        instrument_ids = await self._resolve_ids(instrument)
+        return await self._send_request("/marketfeed/ltp", {"InstrumentIds": instrument_ids})
+
+    async def get_option_chain(self, symbol, expiry_date):
+        return await self._send_request("/marketfeed/optionChain", {"symbol": symbol, "expiryDate": expiry_date})
+
+    async def get_quote(self, instrument):
+        instrument_ids = await self._resolve_ids(instrument)
+        return await self._send_request("/marketfeed/quote", {"InstrumentIds": instrument_ids})
+
+    async def get_historical_data(self, instrument, from_date, to_date):
+        payload = {"Instrument": instrument, "from": from_date, "to": to_date}
+        return await self._send_request("/marketfeed/historicalData", payload)
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+    async def _send_subscription(self, action, instrument_ids):
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_str(json.dumps({"action": action, "instrumentIds": instrument_ids}))
+
+    async def subscribe(self, instrument):
+        instrument_ids = await self._resolve_ids(instrument)
+        self._subscribed.update(dict.fromkeys(instrument_ids))
+        await self._send_subscription("subscribe", instrument_ids)
+
+    async def unsubscribe(self, instrument):
+        instrument_ids = await self._resolve_ids(instrument)
+        for instrument_id in instrument_ids:
+            self._subscribed.pop(instrument_id, None)
+        await self._send_subscription("unsubscribe", instrument_ids)
+
+    async def _heartbeat(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                await ws.send_str("ping")
+            except Exception as e:
+                logging.warning(f"Ping failed: {e}")
+                return
+
+    async def stream(self, instrument=None, reconnect=True):
+        """
+        Async iterator of decoded MarketDataMessageBase messages.
+
+        Subscribes to ``instrument`` (plus anything passed to ``subscribe``)
+        and, with ``reconnect``, reconnects with jittered backoff and
+        re-sends the subscriptions after a disconnect.
+        """
+        if instrument is not None:
+            self._subscribed.update(dict.fromkeys(await self._resolve_ids(instrument)))
+
+        delay = 0.25
+        while True:
+            token = self.access_token or await self._ensure_logged_in()
+            try:
+                async with self._get_session().ws_connect(f"{self.web_base_url}{token}") as ws:
+                    self._ws = ws
+                    delay = 0.25
+                    if self._subscribed:
+                        await self._send_subscription("subscribe", list(self._subscribed))
+                    heartbeat = asyncio.ensure_future(self._heartbeat(ws))
+                    try:
+                        async for frame in ws:
+                            if frame.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                                try:
+                                    md_message = parse_payload(frame_payload(frame.data))
+                                except Exception as e:
+                                    logging.error(f"Failed to parse WebSocket message: {e}")
+                                    continue
+                                yield md_message
+                            elif frame.type == aiohttp.WSMsgType.ERROR:
+                                break
+                    finally:
+                        heartbeat.cancel()
+                        self._ws = None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"WebSocket Error: {e!r}")
+
+            if not reconnect:
+                return
+            logging.info(f"Reconnecting in {delay:.2f} seconds...")
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, 30)
+
+
+class AsyncBlitzAPIClient(_AsyncBaseClient):
+    """Async counterpart of BlitzAPIClient's order, position and trade calls."""
+
+    async def _send_request(self, endpoint, payload=None, method="POST", params=None):
+        try:
+            status, text, headers = await self._raw_request(method, endpoint, payload, params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Request failed: {e}")
+            return {"status_code": None, "response_text": str(e), "response_json": None, "headers": {}}
+        try:
+            response_json = json.loads(text) if text else None
+        except ValueError:
+            response_json = None
+        return {"status_code": status, "response_text": text, "response_json": response_json, "headers": headers}
+
+    async def get_orders(self):
+        return await self._send_request("orders", method="GET")
+
+    async def get_order_by_blitz_id(self, blitz_order_id: int):
+        return await self._send_request(f"orders/{blitz_order_id}", method="GET")
+
+    async def place_order(self, order_data: dict):
+        logging.info(f"Placing order: {order_data}")
+        return await self._send_request("orders/placeOrder", payload=order_data, method="POST")
+
+    async def modify_order(self, order_data: dict):
+        logging.info(f"Modifying order: {order_data}")
+        return await self._send_request("orders/modifyOrder", payload=order_data, method="PUT")
+
+    async def cancel_order(self, instrument_id: str, exchange_order_id: int):
+        logging.info(f"Cancelling order InstrumentId={instrument_id}, ExchangeOrderId={exchange_order_id}")
+        params = {"instrumentId": str(instrument_id), "exchangeOrderId": str(exchange_order_id)}
+        return await self._send_request("orders/cancelOrder", method="DELETE", params=params)
+
+    async def get_positions(self):
+        return await self._send_request("positions", method="GET")
+
+    async def get_trades(self):
+        return await self._send_request("trades", method="GET")
@@ -0,0 +1,218 @@
+from array import array
+from collections import namedtuple
+
+Bar = namedtuple("Bar", ["instrument_id", "timeframe", "start", "open", "high", "low", "close",
+                         "volume", "oi", "ticks"])
+
+_TICK_SUBTYPES = ("TickData", "TickDataMessage")
+_OI_SUBTYPES = ("TouchLineDataMessage", "MarketDepthMessage")
+
+# Per-bar columns: (attribute, typecode)
+_FIELDS = (
+    ("_start", "q"),
+    ("_first_ltt", "q"),
+    ("_last_ltt", "q"),
+    ("_open", "d"),
+    ("_high", "d"),
+    ("_low", "d"),
+    ("_close", "d"),
+    ("_volume", "q"),
+    ("_oi", "q"),
+    ("_ticks", "q"),
+    ("_closed", "b"),
+)
+
+
+class BarAggregator:
+    """
+    Incremental OHLCV+OI bars for many instruments and timeframes at once.
+
+    Every (instrument, timeframe) pair owns a ring of ``ring_size`` bars in
+    flat typed arrays; the newest slot is the bar being built. A tick costs
+    O(1) per timeframe: it either updates the open bar, or closes it (calling
+    ``on_bar``) and starts the next. Ticks are bucketed by LTT, so a late
+    tick that belongs to an earlier bar still in the ring amends that bar
+    instead of the current one (bars already emitted are not re-emitted);
+    open and close follow LTT order rather than arrival order.
+
+    ``ltt_scale`` converts LTT to seconds (e.g. 1000 for milliseconds);
+    timeframes are in seconds.
+    """
+
+    def __init__(self, timeframes=(1, 60, 300), ring_size=500, on_bar=None, ltt_scale=1):
+        self.timeframes = tuple(timeframes)
+        self.ring_size = ring_size
+        self.on_bar = on_bar
+        self.ltt_scale = ltt_scale
+
+        self._slots = {}                # instrumentId -> slot
+        self._instrument_ids = array("Q")
+        self._head = array("q")         # per (slot, timeframe): bars started so far, -1 if none
+        self._last_oi = array("q")      # per slot
+        for attr, code in _FIELDS:
+            setattr(self, attr, array(code))
+
+        self.ticks = 0
+        self.late_amended = 0
+        self.late_dropped = 0
+        self.bars_closed = 0
+
+    def _add_instrument(self, instrument_id):
+        slot = len(self._instrument_ids)
+        self._slots[instrument_id] = slot
+        self._instrument_ids.append(instrument_id)
+        self._last_oi.append(0)
+        count = len(self.timeframes)
+        self._head.extend([-1] * count)
+        size = count * self.ring_size
+        for attr, code in _FIELDS:
+            getattr(self, attr).extend(array(code, bytes(array(code).itemsize * size)))
+        return slot
+
+    # ------------------------------------------------------------------
+    # Input
+    # ------------------------------------------------------------------
+    def on_message(self, md_message):
+        """Listener for MarketDataClient: consumes TickData/TickDataMessage, plus OI from touchline/depth."""
+        subtype = md_message.WhichOneof("subtype")
+        if subtype in _TICK_SUBTYPES:
+            body = getattr(md_message, subtype)
+            self.add_tick(body.InstrumentID, body.LTP, body.LTQ, body.LTT)
+        elif subtype in _OI_SUBTYPES:
+            body = getattr(md_message, subtype)
+            self.set_oi(body.InstrumentID, body.OI)
+
+    def set_oi(self, instrument_id, oi):
+        slot = self._slots.get(instrument_id)
+        if slot is None:
+            slot = self._add_instrument(instrument_id)
+        self._last_oi[slot] = oi
+        ring = self.ring_size
+        for t in range(len(self.timeframes)):
+            base = slot * len(self.timeframes) + t
+            head = self._head[base]
+            if head >= 0:
+                self._oi[base * ring + head % ring] = oi
+
+    def add_tick(self, instrument_id, price, quantity, ltt):
+        slot = self._slots.get(instrument_id)
+        if slot is None:
+            slot = self._add_instrument(instrument_id)
+        self.ticks += 1
+
+        seconds = ltt // self.ltt_scale
+        ring = self.ring_size
+        heads = self._head
+        starts = self._start
+        count = len(self.timeframes)
+
+        for t, timeframe in enumerate(self.timeframes):
+            base = slot * count + t
+            bucket = seconds - seconds % timeframe
+            head = heads[base]
+            pos = base * ring + head % ring if head >= 0 else -1
+
+            if head < 0 or bucket > starts[pos]:
+                if head >= 0 and not self._closed[pos]:
+                    self._emit(base, pos, timeframe)
+                head += 1
+                heads[base] = head
+                self._open_bar(base * ring + head % ring, bucket, price, quantity, ltt, self._last_oi[slot])
+            elif bucket == starts[pos]:
+                self._update(pos, price, quantity, ltt)
+            else:
+                self._amend_late(base, head, bucket, price, quantity, ltt)
+
+    def _open_bar(self, pos, bucket, price, quantity, ltt, oi):
+        self._start[pos] = bucket
+        self._first_ltt[pos] = ltt
+        self._last_ltt[pos] = ltt
+        self._open[pos] = price
+        self._high[pos] = price
+        self._low[pos] = price
+        self._close[pos] = price
+        self._volume[pos] = quantity
+        self._oi[pos] = oi
+        self._ticks[pos] = 1
+        self._closed[pos] = 0
+
+    def _update(self, pos, price, quantity, ltt):
+        if price > self._high[pos]:
+            self._high[pos] = price
+        if price < self._low[pos]:
+            self._low[pos] = price
+        if ltt >= self._last_ltt[pos]:
+            self._last_ltt[pos] = ltt
+            self._close[pos] = price
+        if ltt < self._first_ltt[pos]:
+            self._first_ltt[pos] = ltt
+            self._open[pos] = price
+        self._volume[pos] += quantity
+        self._ticks[pos] += 1
+
+    def _amend_late(self, base, head, bucket, price, quantity, ltt):
+        ring = self.ring_size
+        for back in range(1, min(head, ring - 1) + 1):
+            pos = base * ring + (head - back) % ring
+            start = self._start[pos]
+            if start == bucket:
+                self._update(pos, price, quantity, ltt)
+                self.late_amended += 1
+                return
+            if start < bucket:
+                break
+        self.late_dropped += 1
+
+    def _emit(self, base, pos, timeframe):
+        self._closed[pos] = 1
+        self.bars_closed += 1
+        if self.on_bar is not None:
+            self.on_bar(self._bar(base, pos, timeframe))
+
+    def _bar(self, base, pos, timeframe):
+        return Bar(self._instrument_ids[base // len(self.timeframes)], timeframe, self._start[pos],
+                   self._open[pos], self._high[pos], self._low[pos], self._close[pos],
+                   self._volume[pos], self._oi[pos], self._ticks[pos])
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def close_until(self, ltt):
+        """Close every open bar whose interval ended at or before ``ltt`` (for quiet instruments)."""
+        seconds = ltt // self.ltt_scale
+        count = len(self.timeframes)
+        for slot in range(len(self._instrument_ids)):
+            for t, timeframe in enumerate(self.timeframes):
+                base = slot * count + t
+                head = self._head[base]
+                if head < 0:
+                    continue
+                pos = base * self.ring_size + head % self.ring_size
+                if not self._closed[pos] and self._start[pos] + timeframe <= seconds:
+                    self._emit(base, pos, timeframe)
+
+    def get_bars(self, instrument_id, timeframe, count=None, include_open=True):
+        """Most recent bars, oldest first; the last one is still forming when ``include_open``."""
+        slot = self._slots.get(instrument_id)
+        if slot is None:
+            return []
+        t = self.timeframes.index(timeframe)
+        base = slot * len(self.timeframes) + t
+        head = self._head[base]
+        available = min(head + 1, self.ring_size)
+        newest = head if include_open else head - 1
+        if not include_open:
+            available -= 1
+        if count is not None:
+            available = min(available, count)
+        return [self._bar(base, base * self.ring_size + index % self.ring_size, timeframe)
+                for index in range(newest - available + 1, newest + 1)]
+
+    def get_stats(self):
+        return {
+            "instruments": len(self._instrument_ids),
+            "ticks": self.ticks,
+            "bars_closed": self.bars_closed,
+            "late_amended": self.late_amended,
+            "late_dropped": self.late_dropped,
+        }
@@ -0,0 +1,162 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .utils import find_instrument_items, instrument_id_of_item, replace_instrument_items
+
+
+class _Batch:
+    def __init__(self):
+        self.ids = {}  # insertion-ordered set of instrumentIds
+        self.callers = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.response = None  # the single response when the batch went out as one request
+        self.template = None  # (response, path) the callers' slices are built from
+        self.records = {}
+        self.errors = {}
+        self.error = None
+        self.chunks = 0
+
+
+class RequestCoalescer:
+    """
+    Batching for the per-instrument /marketfeed calls (ltp, quote).
+
+    ``fetch(name, instrument_ids)`` does one REST call. Lists longer than
+    ``chunk_size`` are split and the chunks sent in parallel (at most
+    ``max_workers`` at a time). With a ``window`` > 0, calls for the same
+    endpoint that arrive within ``window`` seconds of the first are merged
+    into one request for the union of their instruments; the first caller
+    sends it, the others wait, and each gets a response holding only its
+    own instruments, in the order it asked for them. A batch that reaches
+    ``chunk_size * max_workers`` instruments goes out without waiting out
+    the window.
+
+    A caller whose instruments were in a chunk that failed gets that
+    chunk's exception; the rest of the batch is unaffected. A lone call
+    that fits in one chunk gets the response exactly as the server sent it.
+    """
+
+    def __init__(self, fetch, window=None, chunk_size=None, max_workers=None):
+        self.fetch = fetch
+        self.window = config.MARKETFEED_COALESCE_WINDOW if window is None else window
+        self.chunk_size = chunk_size or config.MARKETFEED_CHUNK_SIZE
+        self.max_workers = max_workers or config.MARKETFEED_MAX_WORKERS
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        self.calls = 0
+        self.batches = 0
+        self.merged = 0
+        self.requests = 0
+        self.failed = 0
+
+    def request(self, name, instrument_ids):
+        """The ``name`` response for ``instrument_ids``."""
+        if not self.window:
+            batch = _Batch()
+            batch.ids = dict.fromkeys(instrument_ids)
+            batch.callers = 1
+            with self._lock:
+                self.calls += 1
+            self._send(name, batch)
+            return self._slice(batch, instrument_ids)
+
+        with self._lock:
+            self.calls += 1
+            batch = self._pending.get(name)
+            leader = batch is None
+            if leader:
+                batch = self._pending[name] = _Batch()
+            else:
+                self.merged += 1
+            batch.ids.update(dict.fromkeys(instrument_ids))
+            batch.callers += 1
+            if len(batch.ids) >= self.chunk_size * self.max_workers:
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(name) is batch:
+                    del self._pending[name]
+            self._send(name, batch)
+        else:
+            batch.done.wait()
+        return self._slice(batch, instrument_ids)
+
+    def _send(self, name, batch):
+        try:
+            ids = list(batch.ids)
+            size = self.chunk_size
+            chunks = [ids[i:i + size] for i in range(0, len(ids), size)] or [ids]
+            batch.chunks = len(chunks)
+
+            def call(chunk):
+                try:
+                    return chunk, self.fetch(name, chunk), None
+                except Exception as e:
+                    return chunk, None, e
+
+            if len(chunks) == 1:
+                results = [call(chunks[0])]
+            else:
+                workers = min(self.max_workers, len(chunks), config.HTTP_POOL_SIZE)
+                logging.debug(f"/marketfeed/{name}: {len(ids)} instruments in {len(chunks)} chunk(s)")
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(call, chunks))
+
+            for chunk, response, error in results:
+                if error is not None:
+                    batch.errors.update(dict.fromkeys(chunk, error))
+                    batch.error = batch.error or error
+                    continue
+                if batch.response is None:
+                    batch.response = response
+                path, items = find_instrument_items(response)
+                if path is None:
+                    continue
+                if batch.template is None:
+                    batch.template = (response, path)
+                for item in items:
+                    batch.records[instrument_id_of_item(item)] = item
+
+            with self._lock:
+                self.batches += 1
+                self.requests += len(chunks)
+                self.failed += sum(1 for _, _, error in results if error is not None)
+        finally:
+            batch.done.set()
+
+    def _slice(self, batch, instrument_ids):
+        if batch.response is None and batch.error is not None:
+            raise batch.error
+        for instrument_id in instrument_ids:
+            error = batch.errors.get(instrument_id)
+            if error is not None:
+                raise error
+        if batch.callers == 1 and batch.chunks == 1:
+            return batch.response
+        if batch.template is None:
+            # Nothing to slice by; every caller gets the (first) response as sent.
+            logging.warning("Could not find per-instrument records in the /marketfeed response to split it")
+            return batch.response
+
+        records = batch.records
+        shared = batch.callers > 1
+        items = [dict(records[i]) if shared else records[i] for i in instrument_ids if i in records]
+        payload, path = batch.template
+        return replace_instrument_items(payload, path, items)
+
+    def get_stats(self):
+        return {
+            "window": self.window,
+            "chunk_size": self.chunk_size,
+            "calls": self.calls,
+            "merged": self.merged,
+            "batches": self.batches,
+            "requests": self.requests,
+            "failed": self.failed,
+        }
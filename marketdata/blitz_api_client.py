@@ -1,13 +1,14 @@
-import json
-import redis
 import requests
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from marketdata import config, http_session
 from marketdata.Authentication import AuthClient
-from marketdata.config import API_BASE_URL, REDIS_URL
-from marketdata.websocket_stream_handler import MarketDataWebSocketClient
-
-logging.basicConfig(level=logging.DEBUG)
+from marketdata.config import API_BASE_URL, BASKET_MAX_WORKERS, REDIS_URL
+from marketdata.order_state import (EXCHANGE_ORDER_KEYS, STRATEGY_KEYS, OrderStateBook, find_records,
+                                    is_open_order, record_field)
+from marketdata.utils import INSTRUMENT_ID_KEYS
 
 class BlitzAPIClient:
     def __init__(self, app_key: str, user_id: str):
@@ -18,25 +19,85 @@ class BlitzAPIClient:
         self.token = None 
         self.auth_client = AuthClient(app_key, user_id)
         self.access_token = None
+        self._refresh_lock = threading.Lock()
+        self._order_state = None
 
-          # Ensure logged in
-        self._ensure_logged_in()
+        # Login, the WebSocket client and Redis are set up on first use (or by warmup()).
+        self._ws_client = None
+        self._redis_client = None
+        self._redis_publisher = None
+        self.auth_client.add_token_listener(self._on_token)
+
+    @property
+    def ws_client(self):
+        if self._ws_client is None:
+            from marketdata.websocket_stream_handler import MarketDataWebSocketClient
 
-        # Initialize WebSocket
-        self.ws_client = MarketDataWebSocketClient(self.access_token)
-        self.ws_client.set_on_connect(self.on_connect)
-        self.ws_client.set_on_close(self.on_close)
+            ws_client = MarketDataWebSocketClient(self.access_token or self._ensure_logged_in())
+            ws_client.set_on_connect(self.on_connect)
+            ws_client.set_on_close(self.on_close)
+            self._ws_client = ws_client
+        return self._ws_client
 
-        # Initialize Redis
-        self.redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            import redis
+
+            self._redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        return self._redis_client
+
+    @property
+    def redis_publisher(self):
+        if self._redis_publisher is None:
+            from marketdata.redis_publisher import RedisPublisher
+
+            self._redis_publisher = RedisPublisher(self.redis_client).start()
+        return self._redis_publisher
+
+    def warmup(self, websocket=False, redis=False):
+        """
+        Do the deferred start-up work now instead of on the first order:
+        log in and open the HTTP pool, and optionally build the WebSocket
+        client (not connected) and the Redis publisher. Returns self.
+        """
+        self._ensure_logged_in()
+        http_session.get_session()
+        if websocket:
+            self.ws_client
+        if redis:
+            self.redis_publisher
+        return self
 
 
     # ---------------------------------------------------------------------
     # Authentication and Connection Management
     # ---------------------------------------------------------------------
+    def close(self):
+        """Stop the WebSocket, the Redis publisher and the token refresh thread."""
+        if self._ws_client:
+            self._ws_client.stop()
+        if self._redis_publisher:
+            self._redis_publisher.stop()
+        self.disable_order_state()
+        self.auth_client.remove_token_listener(self._on_token)
+        self.auth_client.close()
+
     def _ensure_logged_in(self):
         """Ensure the user is logged in and has a valid access token."""
         self.access_token = self.auth_client.get_access_token()
+        return self.access_token
+
+    def _refresh_token(self, stale_token):
+        """Log in again unless another thread already replaced ``stale_token``; True if the token changed."""
+        self.access_token = self.auth_client.refresh_access_token(stale_token)
+        return self.access_token != stale_token
+
+    def _on_token(self, token):
+        """Token listener: later requests and the next websocket reconnect use the new token."""
+        self.access_token = token
+        if self._ws_client:
+            self._ws_client.set_access_token(token)
 
     def _is_connected(self):
         """Check if the WebSocket connection is active."""
@@ -65,33 +126,31 @@ class BlitzAPIClient:
     # Common HTTP Helper
     # ---------------------------------------------------------------------
 
-    def _send_request(self, endpoint, payload=None, method="POST", params=None, retries=0):
+    def _send_request(self, endpoint, payload=None, method="POST", params=None, retries=0, retry_on_401=True,
+                      parse_json=True):
         MAX_RETRIES = 2
         url = f"{self.api_base_url}{endpoint}"
+        token = self.access_token or self._ensure_logged_in()
         headers = {
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
             "Accept": "*/*"
         }
 
         try:
-            if method == "POST":
-                response = requests.post(url, json=payload, headers=headers)
-            elif method == "PUT":
-                response = requests.put(url, json=payload, headers=headers)
-            elif method == "DELETE":
-                response = requests.delete(url, params=params, headers=headers)
-            elif method == "GET":
-                response = requests.get(url, params=params, headers=headers)
+            if method in ("POST", "PUT"):
+                response = http_session.request(method, url, endpoint=endpoint, json=payload, headers=headers)
+            elif method in ("DELETE", "GET"):
+                response = http_session.request(method, url, endpoint=endpoint, params=params, headers=headers)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
 
-            if response.status_code == 401 and retries < MAX_RETRIES:
+            if response.status_code == 401 and retry_on_401 and retries < MAX_RETRIES:
                 logging.warning("Access token expired. Refreshing token and retrying...")
-                self._ensure_logged_in()
-                return self._send_request(endpoint, payload, method, params, retries + 1)
+                self._refresh_token(token)
+                return self._send_request(endpoint, payload, method, params, retries + 1, parse_json=parse_json)
             try:
-                response_json = response.json() if response.text else None
+                response_json = response.json() if parse_json and response.text else None
             except ValueError:
                 response_json = None
             return {
@@ -111,6 +170,15 @@ class BlitzAPIClient:
             }
 
 
+    def get_http_stats(self):
+        """Per-endpoint request latency percentiles (p50/p90/p99) from the shared session layer."""
+        return http_session.get_latency_stats()
+
+    def get_auth_stats(self):
+        """Login count, seconds until the token expires and whether the background refresh is running."""
+        return self.auth_client.get_stats()
+
+
     # ---------------------------------------------------------------------
     # ORDER MANAGEMENT
     # ---------------------------------------------------------------------
@@ -119,7 +187,10 @@ class BlitzAPIClient:
         """Fetch all orders."""
         logging.info("Fetching all orders")
         endpoint = "orders"
-        return self._send_request(endpoint, method="GET")
+        result = self._send_request(endpoint, method="GET")
+        if self._order_state:
+            self._order_state.reconcile_orders(result)
+        return result
 
     def get_order_by_blitz_id(self, blitz_order_id: int):
         """Fetch a single order by BlitzOrderId."""
@@ -131,13 +202,19 @@ class BlitzAPIClient:
         """Place a new order."""
         logging.info(f"Placing order: {order_data}")
         endpoint = "orders/placeOrder"
-        return self._send_request(endpoint, payload=order_data, method="POST")
+        result = self._send_request(endpoint, payload=order_data, method="POST")
+        if self._order_state:
+            self._order_state.apply_placed(order_data, result)
+        return result
 
     def modify_order(self, order_data: dict):
         """Modify an existing order."""
         logging.info(f"Modifying order: {order_data}")
         endpoint = "orders/modifyOrder"
-        return self._send_request(endpoint, payload=order_data, method="PUT")
+        result = self._send_request(endpoint, payload=order_data, method="PUT")
+        if self._order_state:
+            self._order_state.apply_placed(order_data, result)
+        return result
 
     def cancel_order(self, instrument_id: str, exchange_order_id: int):
         """Cancel an order by instrumentId and exchangeOrderId."""
@@ -147,7 +224,134 @@ class BlitzAPIClient:
             "instrumentId": instrument_id,
             "exchangeOrderId": exchange_order_id
         }
-        return self._send_request(endpoint, method="DELETE", params=params)
+        result = self._send_request(endpoint, method="DELETE", params=params)
+        if self._order_state:
+            self._order_state.apply_cancelled(instrument_id, exchange_order_id, result)
+        return result
+
+
+    # ---------------------------------------------------------------------
+    # BASKET ORDERS
+    # ---------------------------------------------------------------------
+
+    def _run_basket(self, name, calls, max_workers=None):
+        """
+        Send ``(endpoint, payload, method, params)`` calls concurrently over the
+        shared connection pool, at most ``max_workers`` in flight.
+
+        A 401 on any leg refreshes the token once for the whole basket and
+        resends the legs it rejected. Results keep the input order; each is the
+        usual ``_send_request`` dict plus ``started`` (seconds after the basket
+        began) and ``elapsed`` (seconds the leg took, resend included).
+        """
+        basket_start = time.perf_counter()
+        state = {"refreshed": False, "refresh_failed": False}
+        if not self.access_token:
+            self._ensure_logged_in()  # once, before the legs fan out
+
+        def send(call):
+            start = time.perf_counter()
+            token = self.access_token
+            result = self._send_request(*call, retry_on_401=False)
+            if result["status_code"] == 401 and not state["refresh_failed"]:
+                with self._refresh_lock:
+                    first = not state["refreshed"]
+                    state["refreshed"] = True
+                if first:
+                    logging.warning(f"{name}: access token expired. Refreshing token once for the basket...")
+                # Single-flight: the first rejected leg logs in, the others block
+                # here until its token exists and then resend with it.
+                try:
+                    changed = self._refresh_token(token)
+                except Exception as e:
+                    state["refresh_failed"] = True
+                    logging.error(f"{name}: token refresh failed: {e}")
+                    changed = False
+                if changed:
+                    result = self._send_request(*call, retry_on_401=False)
+            result["started"] = start - basket_start
+            result["elapsed"] = time.perf_counter() - start
+            return result
+
+        results = []
+        if calls:
+            workers = min(max_workers or BASKET_MAX_WORKERS, len(calls), config.HTTP_POOL_SIZE)
+            logging.info(f"{name}: sending {len(calls)} leg(s) with {workers} worker(s)")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(send, calls))
+
+        succeeded = sum(1 for result in results if result["status_code"] and 200 <= result["status_code"] < 300)
+        return {
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "elapsed": time.perf_counter() - basket_start,
+            "token_refreshed": state["refreshed"],
+        }
+
+    def place_many(self, orders, max_workers=None):
+        """Place a basket of orders concurrently; see ``_run_basket`` for the result."""
+        calls = [("orders/placeOrder", order, "POST", None) for order in orders]
+        basket = self._run_basket("place_many", calls, max_workers)
+        if self._order_state:
+            for order, result in zip(orders, basket["results"]):
+                self._order_state.apply_placed(order, result)
+        return basket
+
+    def modify_many(self, orders, max_workers=None):
+        """Modify a basket of orders concurrently."""
+        calls = [("orders/modifyOrder", order, "PUT", None) for order in orders]
+        basket = self._run_basket("modify_many", calls, max_workers)
+        if self._order_state:
+            for order, result in zip(orders, basket["results"]):
+                self._order_state.apply_placed(order, result)
+        return basket
+
+    def cancel_many(self, cancels, max_workers=None):
+        """
+        Cancel orders concurrently. ``cancels`` holds ``(instrument_id,
+        exchange_order_id)`` pairs or order dicts as returned by ``get_orders``.
+        """
+        calls = []
+        for cancel in cancels:
+            if isinstance(cancel, dict):
+                instrument_id = record_field(cancel, INSTRUMENT_ID_KEYS)
+                exchange_order_id = record_field(cancel, EXCHANGE_ORDER_KEYS)
+            else:
+                instrument_id, exchange_order_id = cancel
+            params = {"instrumentId": instrument_id, "exchangeOrderId": exchange_order_id}
+            calls.append(("orders/cancelOrder", None, "DELETE", params))
+        basket = self._run_basket("cancel_many", calls, max_workers)
+        if self._order_state:
+            for (_, _, _, params), result in zip(calls, basket["results"]):
+                self._order_state.apply_cancelled(params["instrumentId"], params["exchangeOrderId"], result)
+        return basket
+
+    def cancel_all(self, instrument_id=None, strategy_id=None, max_workers=None):
+        """
+        Cancel every open order, or only those for ``instrument_id`` and/or
+        ``strategy_id``. Returns the ``cancel_many`` result, with the
+        ``get_orders`` result under ``"orders"`` if that call failed.
+        """
+        orders_result = self.get_orders()
+        if orders_result["status_code"] != 200:
+            logging.error(f"cancel_all: could not fetch orders ({orders_result['status_code']})")
+            result = self._run_basket("cancel_all", [])
+            result["orders"] = orders_result
+            return result
+
+        selected = []
+        for order in find_records(orders_result["response_json"]):
+            if not is_open_order(order):
+                continue
+            if instrument_id is not None and str(record_field(order, INSTRUMENT_ID_KEYS)) != str(instrument_id):
+                continue
+            if strategy_id is not None and str(record_field(order, STRATEGY_KEYS)) != str(strategy_id):
+                continue
+            selected.append(order)
+        logging.info(f"cancel_all: {len(selected)} open order(s) match "
+                     f"instrument_id={instrument_id}, strategy_id={strategy_id}")
+        return self.cancel_many(selected, max_workers)
 
 
     # ---------------------------------------------------------------------
@@ -158,7 +362,10 @@ class BlitzAPIClient:
         """Fetch all positions."""
         logging.info("Fetching positions")
         endpoint = "positions"
-        return self._send_request(endpoint, method="GET")
+        result = self._send_request(endpoint, method="GET")
+        if self._order_state:
+            self._order_state.reconcile_positions(result)
+        return result
     
     # ---------------------------------------------------------------------
     # STATICSTICS MANAGEMENT
@@ -180,15 +387,65 @@ class BlitzAPIClient:
         """Fetch all trades."""
         logging.info("Fetching trades")
         endpoint = "trades"
-        return self._send_request(endpoint, method="GET")
+        result = self._send_request(endpoint, method="GET")
+        if self._order_state:
+            self._order_state.reconcile_trades(result)
+        return result
+
+    # ---------------------------------------------------------------------
+    # LOCAL ORDER STATE
+    # ---------------------------------------------------------------------
+
+    def enable_order_state(self, redis_channel=None):
+        """
+        Keep an OrderStateBook in step with this client: order calls update
+        it as they return, get_orders/get_positions/get_trades reconcile it,
+        and ``redis_channel`` (optional) pushes JSON updates into it between
+        polls. Returns the book.
+        """
+        self.disable_order_state()
+        self._order_state = OrderStateBook()
+        if redis_channel:
+            self._order_state.attach_redis(self.redis_client, redis_channel)
+        return self._order_state
+
+    def disable_order_state(self):
+        if self._order_state:
+            self._order_state.detach_redis()
+            self._order_state = None
+
+    @property
+    def order_state(self):
+        return self._order_state
+
+    def sync_order_state(self, orders=True, positions=True, trades=True):
+        """
+        Poll the listings and reconcile the book. Response bodies identical
+        to the previous poll are neither parsed nor diffed. Returns the
+        added/changed/removed counts per listing.
+        """
+        if not self._order_state:
+            raise Exception("Order state is not enabled; call enable_order_state() first")
+        book = self._order_state
+        summary = {}
+        for name, wanted, reconcile in (("orders", orders, book.reconcile_orders),
+                                        ("positions", positions, book.reconcile_positions),
+                                        ("trades", trades, book.reconcile_trades)):
+            if wanted:
+                summary[name] = reconcile(self._send_request(name, method="GET", parse_json=False))
+        return summary
+
+    def get_order_state_stats(self):
+        return self._order_state.get_stats() if self._order_state else None
     
-    def _publish_to_redis(self, channel, data):
-        """Publish JSON data to a Redis channel."""
-        try:
-            self.redis_client.publish(channel, json.dumps(data))
-            logging.debug(f"Published to Redis channel {channel}: {data}")
-        except Exception as e:
-            logging.error(f"Failed to publish to Redis: {e}")
+    def _publish_to_redis(self, channel, data, encoding="json"):
+        """Queue data for the background Redis publisher; never blocks the caller."""
+        if not self.redis_publisher.publish(channel, data, encoding):
+            logging.warning(f"Redis publish queue full; dropped message for {channel}")
+
+    def get_redis_stats(self):
+        """Publisher queue depth, counters and enqueue-to-ack latency percentiles, or None before the first publish."""
+        return self._redis_publisher.get_stats() if self._redis_publisher else None
 
     def send_signal(self, signal_request: dict):
         """Send a signal to Blitz-API and publish to Redis."""
@@ -198,11 +455,5 @@ class BlitzAPIClient:
 
             # Publish to Redis if successful
         if result["status_code"] == 200:
-            try:
-                self.redis_client.publish("SignalChannel", json.dumps(signal_request))
-                logging.info("Signal published to Redis channel: SignalChannel")
-            except Exception as e:
-                logging.error(f"Failed to publish signal to Redis: {e}")
+            self._publish_to_redis("SignalChannel", signal_request)
         return result
-
-
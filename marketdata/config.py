@@ -1,3 +1,5 @@
+import os
+
 # API_BASE_URL = "http://api.aryafingroup.in:11025/md-api"
 # AUTH_BASE_URL = "http://api.aryafingroup.in:11025/api-server"
 # Web_Base_URL = f"ws://api.aryafingroup.in:11025/md-streaming/ws?key="
@@ -14,10 +16,70 @@
 
 
 # Production
-AUTH_BASE_URL = "http://180.179.156.97:9443/api_gateway/v1/"
-API_BASE_URL = "http://180.179.156.97:9443/md-api"
+# Every endpoint can be overridden from the environment (MARKETDATA_*), e.g. to
+# point the SDK at the local stand-ins in benchmarks/.
+AUTH_BASE_URL = os.environ.get("MARKETDATA_AUTH_BASE_URL", "http://180.179.156.97:9443/api_gateway/v1/")
+API_BASE_URL = os.environ.get("MARKETDATA_API_BASE_URL", "http://180.179.156.97:9443/md-api")
+
+Web_Base_URL = os.environ.get("MARKETDATA_WS_URL", f"ws://180.179.156.97:9443/md-streaming/ws?key=")
+
+REDIS_URL = os.environ.get("MARKETDATA_REDIS_URL", "redis://localhost:6379")
+INSTRUMENT_URL = os.environ.get("MARKETDATA_INSTRUMENT_URL",
+                                "http://uat.quantxpress.com/v1/api/instruments/gz/download")
+
+# Instrument master cache
+INSTRUMENT_CACHE_DIR = os.environ.get("MARKETDATA_CACHE_DIR",
+                                      os.path.join(os.path.expanduser("~"), ".cache", "marketdata"))
+INSTRUMENT_CACHE_TTL = 24 * 60 * 60  # seconds before the snapshot is revalidated
+
+# Historical data cache
+HISTORICAL_CACHE_DIR = os.path.join(INSTRUMENT_CACHE_DIR, "historical")
+HISTORICAL_MAX_WORKERS = 8
+
+# HTTP connection pooling
+HTTP_POOL_SIZE = 20
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+HTTP_ENDPOINT_TIMEOUTS = {
+    "orders/placeOrder": (3.05, 5),
+    "orders/modifyOrder": (3.05, 5),
+    "orders/cancelOrder": (3.05, 5),
+    "/marketfeed/historicalData": (3.05, 60),
+}
+HTTP_MAX_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.05  # seconds, doubled per attempt with full jitter
+HTTP_IDEMPOTENT_POST_ENDPOINTS = (
+    "/marketfeed/ltp",
+    "/marketfeed/quote",
+    "/marketfeed/optionChain",
+    "/marketfeed/historicalData",
+    "/api/app_login",
+)
+
+# Basket order calls (place_many/modify_many/cancel_many) in flight at once;
+# capped at HTTP_POOL_SIZE so every leg gets a pooled connection.
+BASKET_MAX_WORKERS = 10
+# get_ltp/get_quote: InstrumentIds per request (longer lists are split into
+# chunks sent in parallel) and the window in which concurrent calls for the
+# same endpoint are merged into one request; see batching.RequestCoalescer.
+MARKETFEED_CHUNK_SIZE = 500
+MARKETFEED_MAX_WORKERS = 4
+MARKETFEED_COALESCE_WINDOW = 0.0  # seconds; 0 sends every call on its own (MarketDataClient.enable_coalescing)
+
+# Background Redis publisher
+REDIS_PUBLISH_QUEUE_SIZE = 100000
+REDIS_PUBLISH_BATCH_SIZE = 500
+REDIS_PUBLISH_INTERVAL = 0.005  # seconds a partial batch may wait before it is flushed
+REDIS_STREAM_MAXLEN = 100000  # approximate MAXLEN trim for XADD
+
+# Cross-process last-value table (multiprocessing.shared_memory segment name)
+SHARED_STATE_NAME = "marketdata_lvt"
 
-Web_Base_URL = f"ws://180.179.156.97:9443/md-streaming/ws?key="
+# Websocket subscriptions and reconnect
+WS_SUBSCRIBE_CHUNK = 500  # instrumentIds per subscribe/unsubscribe frame
+WS_RECONNECT_INITIAL = 0.25  # seconds, doubled per failed attempt with jitter
+WS_RECONNECT_MAX = 30
 
-REDIS_URL = "redis://localhost:6379" 
-INSTRUMENT_URL = "http://uat.quantxpress.com/v1/api/instruments/gz/download"
+# Access tokens
+TOKEN_AUTO_REFRESH = True  # log in again in the background before the token expires
+TOKEN_REFRESH_MARGIN = 60  # seconds before expiry (at most half the token's lifetime)
+TOKEN_TTL = None  # seconds, for tokens without a JWT "exp" claim; None leaves them to 401 handling
@@ -0,0 +1,124 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .wire import instrument_id_of
+
+# Deltas and multi-instrument lists are passed through in order, never collapsed.
+PASSTHROUGH_SUBTYPES = ("IncrementalUpdateMessage", "IndexDataListMessage")
+
+
+class Conflator:
+    """
+    Latest-value delivery for consumers that cannot keep up with every tick.
+
+    ``submit`` keeps only the newest message per (InstrumentID, subtype); a
+    delivery thread hands the pending set to ``callback`` whenever the
+    previous delivery has returned, but no more often than every
+    ``interval`` seconds. With ``batch=True`` the callback receives the whole
+    set as a list, otherwise one message at a time. ``flush`` delivers
+    what is pending right away; ``stop`` flushes unless told not to.
+    """
+
+    def __init__(self, callback, interval=0.0, batch=False):
+        self.callback = callback
+        self.interval = interval
+        self.batch = batch
+
+        self._pending = OrderedDict()
+        self._unique = itertools.count()
+        self._cond = threading.Condition()
+        self._delivering = threading.Lock()  # one delivery at a time, thread or flush()
+        self._thread = None
+        self._running = False
+
+        self.received = 0
+        self.collapsed = 0
+        self.delivered = 0
+        self.callback_errors = 0
+
+    def submit(self, md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype in PASSTHROUGH_SUBTYPES:
+            key = ("passthrough", next(self._unique))
+        else:
+            key = (instrument_id_of(md_message, subtype), subtype)
+
+        with self._cond:
+            self.received += 1
+            if key in self._pending:
+                self.collapsed += 1
+            self._pending[key] = md_message
+            self._cond.notify()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5, flush=True):
+        """Stop the delivery thread, then deliver what is still pending unless ``flush`` is False."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Deliver the pending messages on the calling thread; returns how many."""
+        with self._delivering:
+            with self._cond:
+                pending, self._pending = self._pending, OrderedDict()
+            if pending:
+                self._deliver(list(pending.values()))
+        return len(pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+
+            started = time.monotonic()
+            with self._delivering:
+                with self._cond:
+                    pending, self._pending = self._pending, OrderedDict()
+                if pending:
+                    self._deliver(list(pending.values()))
+
+            if self.interval:
+                remaining = self.interval - (time.monotonic() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+    def _deliver(self, messages):
+        count = len(messages)
+        if self.batch:
+            messages = [messages]
+        for message in messages:
+            try:
+                self.callback(message)
+            except Exception as e:
+                self.callback_errors += 1
+                logging.error(f"Conflated callback raised: {e}")
+        self.delivered += count
+
+    def get_stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "received": self.received,
+            "collapsed": self.collapsed,
+            "delivered": self.delivered,
+            "pending": pending,
+            "callback_errors": self.callback_errors,
+        }
@@ -0,0 +1,347 @@
+import itertools
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from .wire import frame_payload, parse_payload, peek
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+CONFLATE = "conflate"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, CONFLATE)
+
+# Index lists and incremental updates carry several instruments each: they are
+# never conflated, and when sharding every shard gets its own instruments' entries.
+_MULTI_INSTRUMENT_SUBTYPES = {504, 505}
+
+_STOP = object()
+
+# A queued frame with its receive times, while StreamStats are being collected.
+_Received = namedtuple("_Received", ["item", "recv_wall_ns", "recv_ns"])
+
+
+class FrameRing:
+    """
+    Bounded FIFO of websocket frames with a selectable overflow policy.
+
+    ``block`` makes the producer wait for space, ``drop_oldest`` evicts the
+    head, and ``conflate`` replaces a queued frame with the same key in
+    place (falling back to evicting the head when every key is distinct).
+    """
+
+    def __init__(self, capacity, overflow=BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}. Use one of {OVERFLOW_POLICIES}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._items = OrderedDict() if overflow == CONFLATE else deque()
+        self._unique = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, key=None):
+        with self._cond:
+            if self._closed:
+                return False
+            items = self._items
+
+            if self.overflow == CONFLATE:
+                if key is None:
+                    key = ("unique", next(self._unique))
+                if key in items:
+                    items[key] = item
+                    self.conflated += 1
+                    return True
+                if len(items) >= self.capacity:
+                    items.popitem(last=False)
+                    self.dropped += 1
+                items[key] = item
+            else:
+                if len(items) >= self.capacity:
+                    if self.overflow == BLOCK:
+                        while len(items) >= self.capacity and not self._closed:
+                            self._cond.wait()
+                        if self._closed:
+                            return False
+                    else:
+                        items.popleft()
+                        self.dropped += 1
+                items.append(item)
+
+            self.enqueued += 1
+            if len(items) > self.max_depth:
+                self.max_depth = len(items)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """Block until an item is available; returns ``_STOP`` once closed and drained."""
+        with self._cond:
+            while not self._items:
+                if self._closed:
+                    return _STOP
+                self._cond.wait()
+            if self.overflow == CONFLATE:
+                item = self._items.popitem(last=False)[1]
+            else:
+                item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def _keep_own_entries(md_message, shard, shards):
+    """Strip a multi-instrument message down to this shard's instruments; False if none are left."""
+    subtype = md_message.WhichOneof("subtype")
+    if subtype == "IncrementalUpdateMessage":
+        entries = md_message.IncrementalUpdateMessage.MDEntriesList
+    elif subtype == "IndexDataListMessage":
+        entries = md_message.IndexDataListMessage.IndexDataList
+    else:
+        return True
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index].InstrumentID % shards != shard:
+            del entries[index]
+    return len(entries) > 0
+
+
+def _decode(item, peeked, shard, shards):
+    """
+    Parse a queued frame. Multi-instrument frames are queued on every shard
+    as a ``(payload,)`` tuple; None when such a frame has nothing for this one.
+    """
+    if type(item) is tuple:
+        md_message = parse_payload(item[0])
+        return md_message if _keep_own_entries(md_message, shard, shards) else None
+    return parse_payload(item if peeked else frame_payload(item))
+
+
+def _process_worker(queue, callback, peeked, shard, shards, dispatched, callback_errors):
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        try:
+            md_message = _decode(item, peeked, shard, shards)
+            if md_message is None:
+                continue
+            callback(md_message)
+            with dispatched.get_lock():
+                dispatched.value += 1
+        except Exception as e:
+            with callback_errors.get_lock():
+                callback_errors.value += 1
+            logging.error(f"Dispatch worker failed on message: {e}")
+
+
+def _check_process_callback(callback):
+    """Worker processes get the callback pickled; fail here rather than in the workers."""
+    if callback is None:
+        raise ValueError("use_processes=True needs a callback to run in the worker processes")
+    try:
+        pickle.dumps(callback)
+    except Exception as e:
+        raise ValueError(
+            f"use_processes=True needs a picklable callback, such as a module-level function; "
+            f"{callback!r} cannot be pickled: {e}"
+        ) from e
+
+
+class FrameDispatcher:
+    """
+    Moves decoding and user callbacks off the websocket reader thread.
+
+    The reader only calls ``submit``; worker threads (or processes) decode
+    ``MarketDataMessageBase`` frames and invoke the callback. With
+    ``ordered=True`` and several workers, frames are sharded by InstrumentID
+    so every instrument is delivered in arrival order. Index lists and
+    incremental updates, which cover several instruments, are queued on
+    every shard and each worker delivers only the entries for its own
+    instruments, so an instrument's updates stay in order with its
+    snapshots. Peeking at the InstrumentID (needed for ordering and conflation) costs the reader a
+    base64 decode plus a tag scan, never a full parse.
+
+    With ``stats`` (a StreamStats) set, thread workers record each message's
+    decode (including time queued), callback and end-to-end latencies from
+    the receive times passed to ``submit``.
+    """
+
+    def __init__(self, callback, workers=1, queue_size=10000, overflow=BLOCK, ordered=True, use_processes=False):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if use_processes:
+            _check_process_callback(callback)
+        self.callback = callback
+        self.workers = workers
+        self.ordered = ordered
+        self.use_processes = use_processes
+
+        self._sharded = ordered and workers > 1
+        self._peek = self._sharded or overflow == CONFLATE
+        shard_count = workers if self._sharded else 1
+        self._rings = [FrameRing(max(1, queue_size // shard_count), overflow) for _ in range(shard_count)]
+
+        self._threads = []
+        self._processes = []
+        self._lock = threading.Lock()
+        self.dispatched = 0
+        self.parse_errors = 0
+        self.callback_errors = 0
+        self._shared_dispatched = None
+        self._shared_errors = None
+        self._started = False
+        self.stats = None
+
+    # ------------------------------------------------------------------
+    # Reader side
+    # ------------------------------------------------------------------
+    def submit(self, frame, recv_wall_ns=None, recv_ns=None):
+        """Queue a frame; ``recv_*_ns`` are its time.time_ns()/perf_counter_ns() receive times, for stats."""
+        timed = recv_ns is not None and not self.use_processes
+        if not self._peek:
+            self._rings[0].put(_Received(frame, recv_wall_ns, recv_ns) if timed else frame)
+            return
+
+        try:
+            payload = frame_payload(frame)
+            _, subtype, instrument_id = peek(payload)
+        except Exception as e:
+            with self._lock:
+                self.parse_errors += 1
+            logging.error(f"Failed to parse WebSocket message: {e}")
+            return
+
+        if subtype in _MULTI_INSTRUMENT_SUBTYPES:
+            item = (payload,) if self._sharded else payload
+            if timed:
+                item = _Received(item, recv_wall_ns, recv_ns)
+            for ring in (self._rings if self._sharded else self._rings[:1]):
+                ring.put(item)
+            return
+        ring = self._rings[instrument_id % len(self._rings)] if self._sharded else self._rings[0]
+        ring.put(_Received(payload, recv_wall_ns, recv_ns) if timed else payload, (subtype, instrument_id))
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+
+        if self.use_processes:
+            self._shared_dispatched = multiprocessing.Value("Q", 0)
+            self._shared_errors = multiprocessing.Value("Q", 0)
+            shards = self._rings if self._sharded else self._rings * self.workers
+            for shard, ring in enumerate(shards):
+                queue = multiprocessing.Queue(maxsize=ring.capacity)
+                process = multiprocessing.Process(
+                    target=_process_worker,
+                    args=(queue, self.callback, self._peek, shard, len(self._rings), self._shared_dispatched,
+                          self._shared_errors),
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append((process, queue))
+                self._spawn(self._pump, ring, queue)
+        else:
+            shards = self._rings if self._sharded else self._rings * self.workers
+            for shard, ring in enumerate(shards):
+                self._spawn(self._run, ring, shard)
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _run(self, ring, shard):
+        shards = len(self._rings)
+        while True:
+            item = ring.get()
+            if item is _STOP:
+                return
+            received = None
+            if type(item) is _Received:
+                received, item = item, item.item
+            stats = self.stats
+            try:
+                md_message = _decode(item, self._peek, shard, shards)
+            except Exception as e:
+                with self._lock:
+                    self.parse_errors += 1
+                if stats is not None:
+                    stats.parse_errors += 1
+                logging.error(f"Failed to parse WebSocket message: {e}")
+                continue
+            if md_message is None:
+                continue
+            decoded_ns = time.perf_counter_ns()
+            try:
+                self.callback(md_message)
+                with self._lock:
+                    self.dispatched += 1
+            except Exception as e:
+                with self._lock:
+                    self.callback_errors += 1
+                if stats is not None:
+                    stats.callback_errors += 1
+                logging.error(f"Message callback raised: {e}")
+            if stats is not None and received is not None:
+                stats.record(md_message, received.recv_wall_ns, received.recv_ns, decoded_ns,
+                             time.perf_counter_ns())
+
+    def _pump(self, ring, queue):
+        while True:
+            item = ring.get()
+            if item is _STOP:
+                queue.put(None)
+                return
+            queue.put(item)
+
+    def stop(self, timeout=5):
+        for ring in self._rings:
+            ring.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        for process, _ in self._processes:
+            process.join(timeout)
+        self._threads = []
+        self._processes = []
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def get_stats(self):
+        dispatched = self.dispatched
+        callback_errors = self.callback_errors
+        if self._shared_dispatched is not None:
+            dispatched += self._shared_dispatched.value
+            callback_errors += self._shared_errors.value
+        return {
+            "depth": sum(len(ring) for ring in self._rings),
+            "shard_depths": [len(ring) for ring in self._rings],
+            "capacity": sum(ring.capacity for ring in self._rings),
+            "max_depth": max(ring.max_depth for ring in self._rings),
+            "enqueued": sum(ring.enqueued for ring in self._rings),
+            "dropped": sum(ring.dropped for ring in self._rings),
+            "conflated": sum(ring.conflated for ring in self._rings),
+            "dispatched": dispatched,
+            "parse_errors": self.parse_errors,
+            "callback_errors": callback_errors,
+        }
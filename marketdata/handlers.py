@@ -0,0 +1,148 @@
+import itertools
+import logging
+import threading
+
+from .instrument_index import SEGMENTS
+from .wire import SUBTYPE_NUMBERS
+
+# Subtypes delivered item by item instead of as one body.
+_UNPACK = {
+    "IndexDataMessage": lambda md_message: (md_message.IndexDataMessage.IndexData,),
+    "IndexDataListMessage": lambda md_message: md_message.IndexDataListMessage.IndexDataList,
+    "IncrementalUpdateMessage": lambda md_message: md_message.IncrementalUpdateMessage.MDEntriesList,
+}
+
+
+def _segment_code(segment):
+    if isinstance(segment, int):
+        return segment
+    try:
+        return SEGMENTS[segment]
+    except KeyError:
+        raise ValueError(f"Unknown exchange segment {segment!r}") from None
+
+
+class _Route:
+    """Handlers for one subtype, split by what they filter on."""
+
+    __slots__ = ("everything", "by_instrument", "by_segment", "unfiltered", "_merged")
+
+    def __init__(self, registrations):
+        everything = []
+        by_instrument = {}
+        by_segment = {}
+        for seq, handler, instrument_ids, segments in registrations:
+            entry = (seq, handler)
+            if instrument_ids is not None:
+                for instrument_id in instrument_ids:
+                    by_instrument.setdefault(instrument_id, []).append(entry)
+            elif segments is not None:
+                for segment in segments:
+                    by_segment.setdefault(segment, []).append(entry)
+            else:
+                everything.append(entry)
+        self.everything = everything
+        self.by_instrument = by_instrument
+        self.by_segment = by_segment
+        # Nothing filtered: the handler tuple does not depend on the item.
+        self.unfiltered = None if by_instrument or by_segment else tuple(h for _, h in everything)
+        self._merged = {}
+
+    def handlers_for(self, instrument_id, segment):
+        """Handlers for an item, in registration order; memoized per (instrument, segment)."""
+        key = (instrument_id, segment)
+        handlers = self._merged.get(key)
+        if handlers is None:
+            entries = self.everything + self.by_instrument.get(instrument_id, []) + self.by_segment.get(segment, [])
+            handlers = self._merged[key] = tuple(handler for _, handler in sorted(entries, key=lambda e: e[0]))
+        return handlers
+
+
+class HandlerRegistry:
+    """
+    Routes decoded messages to handlers registered per subtype.
+
+    A handler receives the typed body (``TickData``, ``MarketDepthMessage``,
+    ...); index messages and index lists are delivered as one ``IndexData``
+    per index and incremental updates as one ``MDEntries`` per entry, so
+    instrument and segment filters apply to every item. The dispatch table
+    is rebuilt on registration changes and swapped in whole, so dispatch
+    takes no lock.
+    """
+
+    def __init__(self):
+        self._registrations = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._table = {}
+        self.dispatched = 0
+        self.handler_errors = 0
+
+    def add(self, subtype, handler, instrument_ids=None, segments=None):
+        """Register ``handler`` and return a token for ``remove``; filter by instruments or segments, not both."""
+        if subtype not in SUBTYPE_NUMBERS:
+            raise ValueError(f"Unknown subtype {subtype!r}; expected one of {', '.join(SUBTYPE_NUMBERS)}")
+        if instrument_ids is not None and segments is not None:
+            raise ValueError("A handler can filter by instrument_ids or by segments, not both")
+        if instrument_ids is not None:
+            instrument_ids = frozenset(instrument_ids)
+        if segments is not None:
+            if isinstance(segments, (str, int)):
+                segments = [segments]
+            segments = frozenset(_segment_code(segment) for segment in segments)
+
+        with self._lock:
+            token = next(self._seq)
+            self._registrations[token] = (subtype, handler, instrument_ids, segments)
+            self._rebuild()
+        return token
+
+    def remove(self, token):
+        with self._lock:
+            if self._registrations.pop(token, None) is not None:
+                self._rebuild()
+
+    def clear(self):
+        with self._lock:
+            self._registrations.clear()
+            self._rebuild()
+
+    def _rebuild(self):
+        grouped = {}
+        for token, (subtype, handler, instrument_ids, segments) in sorted(self._registrations.items()):
+            grouped.setdefault(subtype, []).append((token, handler, instrument_ids, segments))
+        self._table = {subtype: _Route(registrations) for subtype, registrations in grouped.items()}
+
+    def subtypes(self):
+        """Subtypes with at least one handler."""
+        return set(self._table)
+
+    def __len__(self):
+        return len(self._registrations)
+
+    def dispatch(self, md_message):
+        subtype = md_message.WhichOneof("subtype")
+        route = self._table.get(subtype)
+        if route is None:
+            return
+        unpack = _UNPACK.get(subtype)
+        items = unpack(md_message) if unpack else (getattr(md_message, subtype),)
+        unfiltered = route.unfiltered
+        for item in items:
+            handlers = unfiltered if unfiltered is not None else route.handlers_for(item.InstrumentID,
+                                                                                     item.ExchangeSegment)
+            for handler in handlers:
+                try:
+                    handler(item)
+                except Exception as e:
+                    self.handler_errors += 1
+                    logging.error(f"{subtype} handler raised: {e}")
+            self.dispatched += 1
+
+    def get_stats(self):
+        return {
+            "handlers": len(self._registrations),
+            "subtypes": sorted(self._table),
+            "dispatched": self.dispatched,
+            "handler_errors": self.handler_errors,
+        }
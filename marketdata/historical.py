@@ -0,0 +1,266 @@
+import calendar
+import json
+import logging
+import os
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from .config import HISTORICAL_CACHE_DIR, HISTORICAL_MAX_WORKERS
+
+# Column names used when the server returns candles as positional lists.
+DEFAULT_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume", "oi")
+_CONTAINER_KEYS = ("data", "Data", "candles", "result", "Result")
+
+_MAGIC = b"MDCOL1\n"
+
+# Forms datetime.fromisoformat only accepts from Python 3.11: "Z", offsets
+# without a colon and fractions of other than 3 or 6 digits.
+_OFFSET = re.compile(r"(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)([+-]\d{2}):?(\d{2})$")
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+# ----------------------------------------------------------------------
+# Response parsing
+# ----------------------------------------------------------------------
+def _is_time_column(name):
+    name = name.lower()
+    return "time" in name or "date" in name
+
+
+def _normalize_iso(text):
+    """Rewrite an ISO 8601 timestamp into the subset datetime.fromisoformat accepts on Python 3.8-3.10."""
+    text = text.replace("Z", "+00:00")
+    text = _OFFSET.sub(r"\1\2:\3", text)
+    return _FRACTION.sub(lambda match: "." + match.group(1)[:6].ljust(6, "0"), text)
+
+
+def to_epoch(value):
+    """Epoch seconds for an ISO date/datetime string or number; naive values are taken as UTC."""
+    if isinstance(value, (int, float)):
+        return int(value // 1000) if value > 10 ** 11 else int(value)
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = datetime.fromisoformat(_normalize_iso(text))
+    if parsed.tzinfo is None:
+        return calendar.timegm(parsed.timetuple())
+    return int(parsed.timestamp())
+
+
+def _find_records(payload):
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for key in _CONTAINER_KEYS:
+            if key in payload:
+                found = _find_records(payload[key])
+                if found is not None:
+                    return found
+        for value in payload.values():
+            if isinstance(value, list):
+                return value
+    return None
+
+
+def records_to_columns(payload):
+    """Convert a historicalData response into ``{column: array}`` (times as epoch seconds)."""
+    records = _find_records(payload) or []
+    if not records:
+        return {}
+
+    if isinstance(records[0], dict):
+        names = list(records[0].keys())
+        rows = [[record.get(name) for name in names] for record in records]
+    else:
+        names = list(DEFAULT_COLUMNS[:len(records[0])])
+        names += [f"col{i}" for i in range(len(names), len(records[0]))]
+        rows = records
+
+    columns = {}
+    for position, name in enumerate(names):
+        values = [row[position] for row in rows]
+        try:
+            if _is_time_column(name):
+                columns[name] = array("q", (to_epoch(v) for v in values))
+            else:
+                columns[name] = array("d", (float(v) if v is not None else float("nan") for v in values))
+        except (TypeError, ValueError):
+            logging.warning(f"Dropping historical column {name}: values are not numeric or timestamps")
+    return columns
+
+
+def _time_column(columns):
+    for name, values in columns.items():
+        if values.typecode == "q" and _is_time_column(name):
+            return name
+    return None
+
+
+# ----------------------------------------------------------------------
+# Columnar cache
+# ----------------------------------------------------------------------
+class HistoricalDataCache:
+    """
+    On-disk columnar cache with one file per instrument per calendar month.
+
+    Each file is a JSON header line (column names, typecodes, row count)
+    followed by the raw bytes of every column, so a month loads with one
+    read and no parsing.
+    """
+
+    def __init__(self, cache_dir=HISTORICAL_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def path(self, instrument, period):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(instrument))
+        return os.path.join(self.cache_dir, safe, f"{period}.col")
+
+    def read(self, instrument, period):
+        try:
+            with open(self.path(instrument, period), "rb") as f:
+                if f.readline() != _MAGIC:
+                    return None
+                header = json.loads(f.readline())
+                columns = {}
+                for name, code in header["columns"]:
+                    values = array(code)
+                    values.fromfile(f, header["rows"])
+                    columns[name] = values
+                return columns
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+
+    def write(self, instrument, period, columns):
+        path = self.path(instrument, period)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = len(next(iter(columns.values()))) if columns else 0
+        header = {"columns": [[name, values.typecode] for name, values in columns.items()], "rows": rows}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for values in columns.values():
+                values.tofile(f)
+        os.replace(tmp_path, path)
+
+
+# ----------------------------------------------------------------------
+# Chunked download
+# ----------------------------------------------------------------------
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def month_periods(from_date, to_date):
+    """Yield ``(period, first_day, last_day)`` for each calendar month touching the range."""
+    start, end = _as_date(from_date), _as_date(to_date)
+    current = start.replace(day=1)
+    while current <= end:
+        last_day = current.replace(day=calendar.monthrange(current.year, current.month)[1])
+        yield current.strftime("%Y-%m"), current, last_day
+        current = last_day + timedelta(days=1)
+
+
+def _concat(parts):
+    parts = [p for p in parts if p]
+    if not parts:
+        return {}
+    names = [name for name in parts[0] if all(name in p for p in parts)]
+    merged = {}
+    for name in names:
+        values = array(parts[0][name].typecode)
+        for part in parts:
+            values.extend(part[name])
+        merged[name] = values
+    return merged
+
+
+def _slice(columns, start_ts, end_ts):
+    time_name = _time_column(columns)
+    if time_name is None:
+        return columns
+    keep = [i for i, ts in enumerate(columns[time_name]) if start_ts <= ts <= end_ts]
+    if len(keep) == len(columns[time_name]):
+        return columns
+    return {name: array(values.typecode, (values[i] for i in keep)) for name, values in columns.items()}
+
+
+def _convert(columns, output):
+    if output == "array":
+        return columns
+    import numpy as np
+
+    arrays = {name: np.frombuffer(values, dtype=np.int64 if values.typecode == "q" else np.float64)
+              for name, values in columns.items()}
+    if output == "numpy":
+        return arrays
+    import pandas as pd
+
+    frame = pd.DataFrame(arrays)
+    time_name = _time_column(columns)
+    if time_name is not None:
+        frame[time_name] = pd.to_datetime(frame[time_name], unit="s", utc=True)
+        frame = frame.set_index(time_name)
+    return frame
+
+
+def fetch_historical(fetch, instruments, from_date, to_date, cache=None, max_workers=HISTORICAL_MAX_WORKERS,
+                     output="numpy"):
+    """
+    Download history for many instruments in month-sized chunks.
+
+    ``fetch(instrument, from_date, to_date)`` performs one REST call. Months
+    already in ``cache`` are read from disk; the missing ones are fetched on
+    a pool of ``max_workers`` threads, and every fully elapsed month that
+    returned data is written back (an empty result may be an error or
+    throttling, so it is fetched again next time). Returns ``{instrument: columns}`` where columns are NumPy
+    arrays (``output="numpy"``), a pandas DataFrame (``"pandas"``) or
+    ``array.array`` (``"array"``).
+    """
+    cache = cache or HistoricalDataCache()
+    start, end = _as_date(from_date), _as_date(to_date)
+    today = date.today()
+    if isinstance(instruments, str):
+        instruments = [instruments]
+
+    parts = {}
+    missing = []
+    for instrument in instruments:
+        for period, first_day, last_day in month_periods(start, end):
+            if first_day > today:
+                continue
+            complete = last_day < today
+            cached = cache.read(instrument, period) if complete else None
+            if cached is not None:
+                parts[(instrument, period)] = cached
+            else:
+                missing.append((instrument, period, first_day, min(last_day, today), complete))
+
+    def download(task):
+        instrument, period, first_day, last_day, complete = task
+        columns = records_to_columns(fetch(instrument, first_day.isoformat(), last_day.isoformat()))
+        if complete and columns:
+            cache.write(instrument, period, columns)
+        return (instrument, period), columns
+
+    if missing:
+        logging.info(f"Fetching {len(missing)} historical chunk(s) with {max_workers} worker(s)")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for key, columns in pool.map(download, missing):
+                parts[key] = columns
+
+    start_ts = calendar.timegm(start.timetuple())
+    end_ts = calendar.timegm(end.timetuple()) + 24 * 60 * 60 - 1
+    result = {}
+    for instrument in instruments:
+        periods = [period for period, _, _ in month_periods(start, end)]
+        columns = _concat([parts.get((instrument, period)) for period in periods])
+        result[instrument] = _convert(_slice(columns, start_ts, end_ts), output)
+    return result
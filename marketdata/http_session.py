@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from . import config
+from .metrics import LatencyHistogram
+
+# Methods that are safe to resend; POSTs are only retried for the read-only
+# endpoints listed in config.HTTP_IDEMPOTENT_POST_ENDPOINTS. PUT and DELETE
+# are order verbs here (modify/cancel), so they are not.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUS_CODES = {502, 503, 504}
+
+_lock = threading.Lock()
+_session = None
+_pooling = True
+_latency = {}
+
+
+def _build_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """The process-wide keep-alive session shared by every client."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session(config.HTTP_POOL_SIZE)
+    return _session
+
+
+def configure(pool_size=None, pooling=True):
+    """
+    Rebuild the shared session with a new pool size. ``pooling=False``
+    opens a fresh connection per request, for before/after comparisons.
+    """
+    global _session, _pooling
+    with _lock:
+        if pool_size is not None:
+            config.HTTP_POOL_SIZE = pool_size
+        if _session is not None:
+            _session.close()
+        _session = None
+        _pooling = pooling
+
+
+def endpoint_timeout(endpoint):
+    return config.HTTP_ENDPOINT_TIMEOUTS.get(endpoint, config.HTTP_TIMEOUT)
+
+
+def is_idempotent(method, endpoint):
+    return method in IDEMPOTENT_METHODS or endpoint in config.HTTP_IDEMPOTENT_POST_ENDPOINTS
+
+
+def _connect_failed(error):
+    """True when the connection could not be opened, so the request never reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # urllib3's MaxRetryError wraps the cause
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _histogram(endpoint):
+    histogram = _latency.get(endpoint)
+    if histogram is None:
+        with _lock:
+            histogram = _latency.setdefault(endpoint, LatencyHistogram())
+    return histogram
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff."""
+    cap = config.HTTP_RETRY_BACKOFF * (2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def request(method, url, endpoint=None, timeout=None, idempotent=None, **kwargs):
+    """
+    Send a request over the shared pool.
+
+    ``endpoint`` selects the timeout and latency bucket. Idempotent calls
+    are retried up to config.HTTP_MAX_RETRIES times on connection errors,
+    timeouts and 502/503/504, with jittered exponential backoff. Other calls
+    (order placement, modify, cancel) are only retried when the connection
+    could not be opened; once the request may have been sent they are not.
+    """
+    method = method.upper()
+    endpoint = endpoint or url
+    if timeout is None:
+        timeout = endpoint_timeout(endpoint)
+    if idempotent is None:
+        idempotent = is_idempotent(method, endpoint)
+    retries = config.HTTP_MAX_RETRIES
+    histogram = _histogram(endpoint)
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            if _pooling:
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+            else:
+                response = requests.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= retries or not (idempotent or _connect_failed(e)):
+                raise
+            logging.warning(f"{method} {endpoint} failed ({e}); retrying")
+        else:
+            histogram.record(time.perf_counter() - start)
+            if not idempotent or response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                return response
+            logging.warning(f"{method} {endpoint} returned {response.status_code}; retrying")
+
+        time.sleep(_backoff(attempt))
+        attempt += 1
+
+
+def get_latency_stats():
+    """Per-endpoint request latency percentiles (seconds)."""
+    return {endpoint: histogram.snapshot() for endpoint, histogram in list(_latency.items())}
+
+
+def reset_latency_stats():
+    for histogram in list(_latency.values()):
+        histogram.reset()
@@ -1,43 +1,188 @@
 import requests
 import gzip
 import json
+import logging
+import mmap
+import os
+import threading
+import time
+from collections import namedtuple
+
+from . import http_session
+from .config import INSTRUMENT_URL, INSTRUMENT_CACHE_DIR, INSTRUMENT_CACHE_TTL
+from .instrument_index import InstrumentIndex
+
+INSTRUMENT_INDEX = None
+
+SNAPSHOT_FILE = "instruments.json.gz"
+META_FILE = "instruments.meta.json"
+INDEX_FILE = "instruments.idx"
+
+_load_lock = threading.Lock()
+
+# Memoized item -> instrumentId for resolve_instruments; reset whenever the index is reloaded.
+_RESOLVE_CACHE = {}
+
+ResolvedInstruments = namedtuple("ResolvedInstruments", ["ids", "errors", "by_id"])
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temp file so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(cache_dir, meta):
+    _write_atomic(os.path.join(cache_dir, META_FILE), json.dumps(meta).encode("utf-8"))
+
+
+def _decode_snapshot(content):
+    return json.loads(gzip.decompress(content))
+
+
+def _read_snapshot(cache_dir):
+    """Load the last good snapshot from disk (mmap'd, no network)."""
+    with open(os.path.join(cache_dir, SNAPSHOT_FILE), "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return _decode_snapshot(m)
+
+
+def _download_snapshot(url, cache_dir, meta):
+    """
+    Revalidate the snapshot against the server.
+
+    Returns the parsed instrument list, or None when the server answered
+    304 Not Modified and the cached snapshot is still current.
+    """
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    logging.info("Downloading instruments...")
+    response = http_session.request("GET", url, endpoint="instruments", headers=headers, timeout=(3.05, 60))
+
+    if response.status_code == 304:
+        meta["fetched_at"] = time.time()
+        _write_meta(cache_dir, meta)
+        logging.info("Instrument master not modified; using cached snapshot.")
+        return None
+
+    response.raise_for_status()
+    data = _decode_snapshot(response.content)  # validate before replacing the snapshot
+
+    _write_atomic(os.path.join(cache_dir, SNAPSHOT_FILE), response.content)
+    _write_meta(cache_dir, {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    })
+    return data
+
+
+def _open_index(cache_dir, data=None):
+    """
+    Map the on-disk index, rebuilding it from ``data`` (or the snapshot)
+    when new data arrived or the index file is missing or unreadable.
+    """
+    global INSTRUMENT_INDEX
+
+    path = os.path.join(cache_dir, INDEX_FILE)
+    index = None
+    if data is None and os.path.exists(path):
+        try:
+            index = InstrumentIndex.load(path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Rebuilding unreadable instrument index: {e}")
+
+    if index is None:
+        if data is None:
+            data = _read_snapshot(cache_dir)
+        InstrumentIndex.from_records(data).save(path)
+        index = InstrumentIndex.load(path)
+
+    INSTRUMENT_INDEX = index
+    _RESOLVE_CACHE.clear()
+    logging.info(f"Loaded {len(INSTRUMENT_INDEX)} instruments.")
+    return INSTRUMENT_INDEX
+
+
+def load_instruments(url=INSTRUMENT_URL, cache_dir=INSTRUMENT_CACHE_DIR, ttl=INSTRUMENT_CACHE_TTL, force=False):
+    """
+    Load the instrument master through the on-disk cache.
+
+    A snapshot younger than ``ttl`` seconds is served by mmapping the
+    prebuilt index. An older one is revalidated with ETag/Last-Modified; if
+    the download fails the last good snapshot is used instead.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = _read_meta(cache_dir)
+    has_snapshot = os.path.exists(os.path.join(cache_dir, SNAPSHOT_FILE)) and meta.get("url") == url
+
+    if not has_snapshot:
+        meta = {}
+    elif not force and time.time() - meta.get("fetched_at", 0) < ttl:
+        return _open_index(cache_dir)
+
+    try:
+        data = _download_snapshot(url, cache_dir, meta)
+    except (requests.exceptions.RequestException, OSError, ValueError) as e:
+        if not has_snapshot:
+            raise
+        logging.warning(f"Instrument download failed ({e}); using last good snapshot.")
+        data = None
+
+    return _open_index(cache_dir, data)
+
 
 def fetch_and_load_instruments(url):
-    print("Downloading instruments...")
-    response = requests.get(url, timeout=15)
-    decompressed = gzip.decompress(response.content)
-    data = json.loads(decompressed)
-    
-    global INSTRUMENTS_BY_NAME, INSTRUMENTS_BY_ID
-
-    INSTRUMENTS_BY_NAME = {
-            f'{item["exchangeSegment"]}|{item["instrumentName"]}': item["instrumentId"]
-            for item in data
-        }
-    INSTRUMENTS_BY_ID = {iid: name for name, iid in INSTRUMENTS_BY_NAME.items()}
-
-    print(f"Loaded {len(INSTRUMENTS_BY_NAME)} instruments.")
-    return INSTRUMENTS_BY_NAME
+    return load_instruments(url)
+
+
+def _ensure_loaded():
+    if INSTRUMENT_INDEX is None:
+        with _load_lock:
+            if INSTRUMENT_INDEX is None:
+                load_instruments()
+    return INSTRUMENT_INDEX
+
+
+def get_instruments():
+    """Return the instrument index (a symbol -> instrumentId mapping), loading it on first use."""
+    return _ensure_loaded()
+
 
 def verify_instrument_id(symbol=None, instrument_id=None):
-    global INSTRUMENTS_BY_NAME, INSTRUMENTS_BY_ID
+    index = _ensure_loaded()
 
     if symbol and not instrument_id:
-        result = INSTRUMENTS_BY_NAME.get(symbol)
+        result = index.get(symbol)
         if not result:
             raise ValueError(f"Instrument not found for symbol: {symbol}")
-        print(f"Matched → Symbol: {symbol} | Instrument ID: {result}")
+        logging.debug(f"Matched → Symbol: {symbol} | Instrument ID: {result}")
         return result
 
     if instrument_id and not symbol:
-        symbol_from_id = INSTRUMENTS_BY_ID.get(instrument_id)
+        symbol_from_id = index.name_for(instrument_id)
         if not symbol_from_id:
             raise ValueError(f"Instrument ID {instrument_id} not found in cache.")
-        print(f"Matched → Symbol: {symbol_from_id} | Instrument ID: {instrument_id}")
+        logging.debug(f"Matched → Symbol: {symbol_from_id} | Instrument ID: {instrument_id}")
         return instrument_id
 
     if symbol and instrument_id:
-        expected_id = INSTRUMENTS_BY_NAME.get(symbol)
+        expected_id = index.get(symbol)
         if not expected_id:
             raise ValueError(f"Instrument not found for symbol: {symbol}")
 
@@ -46,12 +191,75 @@ def verify_instrument_id(symbol=None, instrument_id=None):
                 f"Instrument ID mismatch: provided={instrument_id}, expected={expected_id} for symbol {symbol}"
             )
 
-        print(f"Verified → Symbol: {symbol} | Instrument ID: {instrument_id}")
+        logging.debug(f"Verified → Symbol: {symbol} | Instrument ID: {instrument_id}")
         return instrument_id
 
     raise ValueError("Either symbol or instrument_id must be provided.")
 
 
+def _resolve_one(index, item):
+    """Return (instrumentId, None) or (None, error message) for a single id or EXCHANGE|NAME symbol."""
+    if isinstance(item, str) and item.isdigit():
+        item = int(item)
+
+    if isinstance(item, int):
+        if index.row_of(item) < 0:
+            return None, f"Instrument ID {item} not found in cache."
+        return item, None
+
+    if not isinstance(item, str):
+        return None, f"Unsupported instrument type {type(item).__name__}: {item!r}"
+
+    parts = item.split("|")
+    if len(parts) < 2:
+        return None, f"Exchange segment missing. Use format EXCHANGE|NAME, e.g. NSECM|RELIANCE. Got: {item}"
+    symbol = f"{parts[0]}|{parts[1]}"
+    instrument_id = index.get(symbol)
+    if instrument_id is None:
+        return None, f"Instrument not found for symbol: {symbol}"
+    return instrument_id, None
+
+
+def resolve_instruments(items, raise_on_error=True):
+    """
+    Resolve a batch of instrumentIds and ``EXCHANGE|NAME`` symbols in one call.
+
+    Returns ``ResolvedInstruments(ids, errors, by_id)`` where ``ids`` keeps the
+    input order, ``errors`` lists ``(item, message)`` for every unknown entry
+    and ``by_id`` maps each instrumentId back to the item it came from.
+    With ``raise_on_error`` all unknown entries are reported in one ValueError.
+    """
+    if isinstance(items, (str, int)):
+        items = [items]
+
+    index = _ensure_loaded()
+    cache = _RESOLVE_CACHE
+    ids = []
+    errors = []
+    by_id = {}
+
+    for item in items:
+        try:
+            instrument_id = cache[item]
+        except KeyError:
+            instrument_id, error = _resolve_one(index, item)
+            if error:
+                errors.append((item, error))
+                continue
+            cache[item] = instrument_id
+        except TypeError:  # unhashable input
+            errors.append((item, f"Unsupported instrument type {type(item).__name__}: {item!r}"))
+            continue
+        ids.append(instrument_id)
+        by_id.setdefault(instrument_id, item)
+
+    if errors and raise_on_error:
+        raise ValueError(
+            f"{len(errors)} instrument(s) could not be resolved: " + "; ".join(msg for _, msg in errors)
+        )
+    return ResolvedInstruments(ids, errors, by_id)
+
+
 
 
 # symbol = "011NSETEST"
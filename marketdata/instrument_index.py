@@ -0,0 +1,293 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+# Mirrors the ExchangeSegment enum in proto/marketdata.proto.
+SEGMENTS = {
+    "NONE": 0,
+    "NSECM": 1,
+    "NSEFO": 2,
+    "NSECD": 3,
+    "NSECO": 4,
+    "BSECM": 11,
+    "BSEFO": 12,
+    "BSECD": 13,
+    "BSECO": 14,
+    "NCDEX": 21,
+    "MCXFO": 31,
+}
+SEGMENT_NAMES = {code: name for name, code in SEGMENTS.items()}
+
+OPTION_NONE, OPTION_CALL, OPTION_PUT = 0, 1, 2
+_OPTION_TYPES = {"CE": OPTION_CALL, "CALL": OPTION_CALL, "3": OPTION_CALL,
+                 "PE": OPTION_PUT, "PUT": OPTION_PUT, "4": OPTION_PUT}
+
+# Keys tried, in order, when reading optional columns from the instrument dump.
+_EXPIRY_KEYS = ("expiry", "expiryDate", "contractExpiration")
+_STRIKE_KEYS = ("strikePrice", "strike")
+_LOT_SIZE_KEYS = ("lotSize", "lotsize", "marketLot")
+_OPTION_TYPE_KEYS = ("optionType", "OptionType")
+
+_EXPIRY_FORMATS = ("%Y-%m-%d", "%d%b%Y", "%d-%b-%Y", "%d-%m-%Y", "%Y%m%d")
+
+_MAGIC = b"MDIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIQ")  # magic, version, row count, name blob size
+
+# (attribute, typecode) in on-disk order; row-indexed columns first.
+_COLUMNS = (
+    ("_ids", "Q"),
+    ("_name_offsets", "I"),  # n + 1 entries
+    ("_name_order", "I"),
+    ("_segments", "B"),
+    ("_option_types", "B"),
+    ("_expiries", "i"),
+    ("_strikes", "d"),
+    ("_lot_sizes", "i"),
+)
+
+
+def _first(item, keys):
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def parse_expiry(value):
+    """Normalise an expiry (date string, YYYYMMDD int or epoch seconds) to YYYYMMDD, 0 if absent."""
+    if value in (None, "", 0):
+        return 0
+    if isinstance(value, (int, float)):
+        value = int(value)
+        if 19000101 <= value <= 29991231:
+            return value
+        if value > 10 ** 11:  # epoch milliseconds
+            value //= 1000
+        return int(datetime.fromtimestamp(value, timezone.utc).strftime("%Y%m%d"))
+    text = str(value).strip()
+    for candidate in (text, text[:10]):
+        for fmt in _EXPIRY_FORMATS:
+            try:
+                return int(datetime.strptime(candidate, fmt).strftime("%Y%m%d"))
+            except ValueError:
+                continue
+    return 0
+
+
+def _parse_option_type(value, name, strike):
+    if value is not None:
+        return _OPTION_TYPES.get(str(value).upper(), OPTION_NONE)
+    if strike > 0:
+        return _OPTION_TYPES.get(name[-2:].upper(), OPTION_NONE)
+    return OPTION_NONE
+
+
+def _pad(size):
+    return (-size) % 8
+
+
+class InstrumentIndex(Mapping):
+    """
+    Compact, read-only view of the instrument master.
+
+    Rows are sorted by instrumentId and stored column-wise in typed arrays;
+    ``EXCHANGE|NAME`` keys live in a single UTF-8 blob. The index behaves
+    like the old ``{symbol: instrumentId}`` dict and can be saved to a file
+    that any number of processes mmap and share.
+    """
+
+    def __init__(self, columns, names, buffer=None):
+        for attr, _ in _COLUMNS:
+            setattr(self, attr, columns[attr])
+        self._names = names
+        self._buffer = buffer  # keeps the mmap alive for memoryview-backed columns
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_records(cls, records):
+        """Build an index from the instrument dump (a list of dicts)."""
+        rows = sorted(
+            (int(item["instrumentId"]), f'{item["exchangeSegment"]}|{item["instrumentName"]}', item)
+            for item in records
+        )
+
+        columns = {attr: array(code) for attr, code in _COLUMNS}
+        blob = bytearray()
+        encoded = []
+        for iid, name, item in rows:
+            name_bytes = name.encode("utf-8")
+            encoded.append(name_bytes)
+            strike = float(_first(item, _STRIKE_KEYS) or 0.0)
+
+            columns["_ids"].append(iid)
+            columns["_name_offsets"].append(len(blob))
+            columns["_segments"].append(SEGMENTS.get(str(item["exchangeSegment"]), 0))
+            columns["_option_types"].append(
+                _parse_option_type(_first(item, _OPTION_TYPE_KEYS), item["instrumentName"], strike))
+            columns["_expiries"].append(parse_expiry(_first(item, _EXPIRY_KEYS)))
+            columns["_strikes"].append(strike)
+            columns["_lot_sizes"].append(int(_first(item, _LOT_SIZE_KEYS) or 0))
+            blob += name_bytes
+        columns["_name_offsets"].append(len(blob))
+        columns["_name_order"] = array("I", sorted(range(len(rows)), key=encoded.__getitem__))
+
+        return cls(columns, bytes(blob))
+
+    def save(self, path):
+        """Serialise to ``path`` (written atomically) in a layout that ``load`` can mmap."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(self), len(self._names)))
+            f.write(b"\0" * _pad(_HEADER.size))
+            for attr, _ in _COLUMNS:
+                data = memoryview(getattr(self, attr)).cast("B")
+                f.write(data)
+                f.write(b"\0" * _pad(len(data)))
+            f.write(self._names)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Map an index file into memory; pages are shared between processes."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, names_size = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            buffer.close()
+            raise ValueError(f"Not an instrument index file: {path}")
+
+        view = memoryview(buffer)
+        offset = _HEADER.size + _pad(_HEADER.size)
+        columns = {}
+        for attr, code in _COLUMNS:
+            length = count + 1 if attr == "_name_offsets" else count
+            size = length * struct.calcsize(code)
+            columns[attr] = view[offset:offset + size].cast(code)
+            offset += size + _pad(size)
+        names = view[offset:offset + names_size]
+
+        return cls(columns, names, buffer)
+
+    # ------------------------------------------------------------------
+    # Row access
+    # ------------------------------------------------------------------
+    def _name_bytes(self, row):
+        return bytes(self._names[self._name_offsets[row]:self._name_offsets[row + 1]])
+
+    def _row_of_name(self, name_bytes):
+        order = self._name_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_bytes(order[mid]) < name_bytes:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def row_of(self, instrument_id):
+        """Position of ``instrument_id`` in the id-sorted columns, or -1."""
+        row = bisect_left(self._ids, instrument_id)
+        if row < len(self._ids) and self._ids[row] == instrument_id:
+            return row
+        return -1
+
+    def name_for(self, instrument_id, default=None):
+        """Return the ``EXCHANGE|NAME`` key for an instrumentId."""
+        row = self.row_of(instrument_id)
+        if row < 0:
+            return default
+        return self._name_bytes(row).decode("utf-8")
+
+    def record(self, instrument_id):
+        """Return every indexed column for an instrumentId as a dict."""
+        row = self.row_of(instrument_id)
+        if row < 0:
+            raise KeyError(instrument_id)
+        return {
+            "instrumentId": self._ids[row],
+            "name": self._name_bytes(row).decode("utf-8"),
+            "exchangeSegment": SEGMENT_NAMES.get(self._segments[row], "NONE"),
+            "optionType": self._option_types[row],
+            "expiry": self._expiries[row],
+            "strike": self._strikes[row],
+            "lotSize": self._lot_sizes[row],
+        }
+
+    # ------------------------------------------------------------------
+    # Mapping interface: EXCHANGE|NAME -> instrumentId
+    # ------------------------------------------------------------------
+    def __getitem__(self, name):
+        name_bytes = name.encode("utf-8")
+        pos = self._row_of_name(name_bytes)
+        if pos < len(self._name_order):
+            row = self._name_order[pos]
+            if self._name_bytes(row) == name_bytes:
+                return self._ids[row]
+        raise KeyError(name)
+
+    def __iter__(self):
+        for row in self._name_order:
+            yield self._name_bytes(row).decode("utf-8")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self):
+        """All instrumentIds, ascending."""
+        return self._ids
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def find(self, segment=None, prefix="", expiry=None, option_type=None, strike=None):
+        """
+        Return instrumentIds matching every given filter.
+
+        ``segment`` plus ``prefix`` select a contiguous range of the name
+        order, e.g. ``find("NSEFO", "NIFTY", expiry="2025-05-29",
+        option_type=OPTION_CALL)``; the remaining filters are column tests.
+        """
+        if segment is not None:
+            key = f"{segment}|{prefix}".encode("utf-8")
+            start = self._row_of_name(key)
+            rows = []
+            for pos in range(start, len(self._name_order)):
+                row = self._name_order[pos]
+                if not self._name_bytes(row).startswith(key):
+                    break
+                rows.append(row)
+            rows.sort()
+        elif prefix:
+            key = prefix.encode("utf-8")
+            rows = [row for row in range(len(self)) if self._name_bytes(row).split(b"|", 1)[-1].startswith(key)]
+        else:
+            rows = range(len(self))
+
+        expiry = parse_expiry(expiry) if expiry is not None else None
+        if isinstance(option_type, str):
+            option_type = _OPTION_TYPES.get(option_type.upper(), OPTION_NONE)
+
+        result = []
+        for row in rows:
+            if expiry is not None and self._expiries[row] != expiry:
+                continue
+            if option_type is not None and self._option_types[row] != option_type:
+                continue
+            if strike is not None and self._strikes[row] != strike:
+                continue
+            result.append(self._ids[row])
+        return result
+
+    def expiries(self, segment, prefix=""):
+        """Distinct expiries (YYYYMMDD) for a segment/name prefix."""
+        return sorted({self._expiries[self.row_of(iid)] for iid in self.find(segment, prefix)} - {0})
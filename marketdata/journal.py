@@ -0,0 +1,194 @@
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from .wire import frame_payload, parse_payload, peek
+
+_FILE_MAGIC = b"MDJ1\0\0\0\0"
+# payload length, receive time (ns since epoch), MessageCode
+_RECORD = struct.Struct("<Iqi")
+_SEGMENT_PATTERN = "journal-*.mdj"
+
+
+class TickJournal:
+    """
+    Append-only recorder of raw websocket frames.
+
+    ``record`` runs on the reader thread and only stamps the frame with its
+    receive time and queues it. A writer thread strips the base64 transport
+    encoding and appends ``[length][recv_ns][MessageCode][protobuf bytes]``
+    records in batches to segment files under ``directory``, starting a new
+    segment once ``segment_bytes`` is reached.
+    """
+
+    def __init__(self, directory, segment_bytes=256 * 1024 * 1024, flush_interval=0.05, max_pending=1_000_000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = deque()
+        self._file = None
+        self._segment_size = 0
+        self._segment_index = 0
+        self._running = False
+        self._thread = None
+        self._wake = threading.Event()
+
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.segments = 0
+
+    def start(self):
+        if self._running:
+            return self
+        os.makedirs(self.directory, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, frame):
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time_ns(), frame))
+
+    def _open_segment(self):
+        if self._file:
+            self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        while True:
+            # Exclusive create: another journal on this directory may have taken the name.
+            self._segment_index += 1
+            name = f"journal-{stamp}-{os.getpid()}-{self._segment_index:06d}.mdj"
+            try:
+                self._file = open(os.path.join(self.directory, name), "xb")
+                break
+            except FileExistsError:
+                continue
+        self._file.write(_FILE_MAGIC)
+        self._segment_size = len(_FILE_MAGIC)
+        self.segments += 1
+
+    def _write_batch(self):
+        pending = self._pending
+        chunks = []
+        size = 0
+        while pending:
+            recv_ns, frame = pending.popleft()
+            try:
+                payload = frame_payload(frame)
+                message_code = peek(payload)[0]
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Journal could not decode frame: {e}")
+                continue
+
+            record_size = _RECORD.size + len(payload)
+            if self._file is None or (self._segment_size + size + record_size > self.segment_bytes
+                                      and self._segment_size + size > len(_FILE_MAGIC)):
+                self._write(chunks, size)
+                chunks, size = [], 0
+                self._open_segment()
+            chunks.append(_RECORD.pack(len(payload), recv_ns, message_code))
+            chunks.append(payload)
+            size += record_size
+            self.frames += 1
+        self._write(chunks, size)
+
+    def _write(self, chunks, size):
+        if not chunks:
+            return
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+        self._segment_size += size
+        self.bytes += size
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._write_batch()
+        self._write_batch()
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def get_stats(self):
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "segments": self.segments,
+        }
+
+
+class JournalReplay:
+    """
+    Replays journal segments through the on_message callback interface.
+
+    Segments are mmapped and read in file-name order. ``speed=1`` keeps the
+    recorded inter-arrival gaps, ``speed=N`` plays N times faster and
+    ``speed=None`` (or 0) runs as fast as the callback allows.
+    """
+
+    def __init__(self, path):
+        if os.path.isdir(path):
+            self.files = sorted(glob.glob(os.path.join(path, _SEGMENT_PATTERN)))
+        else:
+            self.files = [path]
+
+    def frames(self):
+        """Yield ``(recv_ns, message_code, payload)`` for every record, payload being the protobuf bytes."""
+        for file_name in self.files:
+            with open(file_name, "rb") as f:
+                if os.fstat(f.fileno()).st_size <= len(_FILE_MAGIC):
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if buffer[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+                        raise ValueError(f"Not a journal segment: {file_name}")
+                    pos = len(_FILE_MAGIC)
+                    end = len(buffer)
+                    while pos + _RECORD.size <= end:
+                        length, recv_ns, message_code = _RECORD.unpack_from(buffer, pos)
+                        pos += _RECORD.size
+                        if pos + length > end:
+                            break  # torn final record from an unclean shutdown
+                        yield recv_ns, message_code, buffer[pos:pos + length]
+                        pos += length
+
+    def run(self, callback, speed=1.0, decode=True):
+        """
+        Feed every recorded frame to ``callback``, as a decoded
+        MarketDataMessageBase (or raw bytes with ``decode=False``).
+        Returns the number of frames delivered.
+        """
+        count = 0
+        first_recv = None
+        started = time.perf_counter()
+        for recv_ns, _, payload in self.frames():
+            if speed:
+                if first_recv is None:
+                    first_recv = recv_ns
+                delay = (recv_ns - first_recv) / 1e9 / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            callback(parse_payload(payload) if decode else payload)
+            count += 1
+        return count
@@ -1,14 +1,24 @@
-import requests
 import logging
 import time
 
+from . import http_session
 from .Authentication import AuthClient
-from .config import API_BASE_URL, INSTRUMENT_URL
-from .instrument import fetch_and_load_instruments, verify_instrument_id
-from .websocket_stream_handler import MarketDataWebSocketClient
+from .batching import RequestCoalescer
+from .config import API_BASE_URL, HISTORICAL_MAX_WORKERS
+from .instrument import get_instruments, resolve_instruments
 
+# The websocket client, protobuf decoding, the stream-fed stores (market
+# state, order books, bars), Redis, shared memory, journaling and sharding
+# are imported where they are first used, so importing this
+# module (and constructing a client) stays cheap for REST-only processes.
+
+
+class _InstrumentsCache:
+    """Class attribute that loads the instrument master on first access."""
+
+    def __get__(self, obj, objtype=None):
+        return get_instruments()
 
-logging.basicConfig(level=logging.DEBUG)
 
 class MarketDataClient:
     def __init__(self, app_key: str, user_id: str):
@@ -17,14 +27,54 @@ class MarketDataClient:
         self.api_base_url = API_BASE_URL
         self.api_hist_base_url = API_BASE_URL 
         self.auth_client = AuthClient(app_key, user_id)
-
-        self._ensure_logged_in()
-        self.ws_client = MarketDataWebSocketClient(self.access_token)
-        self.ws_client.set_on_connect(self.on_connect)
-        self.ws_client.set_on_close(self.on_close)
+        self.access_token = None  # logged in on first use, or by warmup()
+        self._ws_client = None
         self._on_tick = None
+        self._conflator = None
+        self._listeners = []
+        self._coalescer = RequestCoalescer(self._fetch_marketfeed)
+        self._market_state = None
+        self._seed_endpoints = ()
+        self._order_books = None
+        self._bars = None
+        self._journal = None
+        self._redis_mirror = None
+        self._shared_state = None
+        self._sharded_feed = None
+        self._flatten = None
+        self._decoder = None
+        self._decode_subtypes = None
+        self._handlers = None
+        self.auth_client.add_token_listener(self._on_token)
+
+    INSTRUMENTS_CACHE = _InstrumentsCache()
 
-    INSTRUMENTS_CACHE = fetch_and_load_instruments(INSTRUMENT_URL)
+    @property
+    def ws_client(self):
+        """The websocket client, built (not connected) on first access."""
+        if self._ws_client is None:
+            from .websocket_stream_handler import MarketDataWebSocketClient
+
+            ws_client = MarketDataWebSocketClient(self.access_token or self._ensure_logged_in())
+            ws_client.set_on_connect(self.on_connect)
+            ws_client.set_on_close(self.on_close)
+            ws_client.set_on_message(self._handle_message)
+            self._ws_client = ws_client
+        return self._ws_client
+
+    def warmup(self, websocket=True, instruments=True):
+        """
+        Do the deferred start-up work now instead of on first use: log in,
+        open the HTTP pool, load the instrument master and build the
+        websocket client (it is not connected). Returns self.
+        """
+        self._ensure_logged_in()
+        http_session.get_session()
+        if instruments:
+            get_instruments()
+        if websocket:
+            self.ws_client
+        return self
 
     def _is_connected(self):
         return self.ws_client._is_connected()
@@ -35,29 +85,12 @@ class MarketDataClient:
     def on_close(self, close_status_code, close_msg):
         logging.warning(f"WebSocket closed: {close_status_code}, {close_msg}")
 
+    def resolve_instruments(self, items, raise_on_error=True):
+        """Bulk-resolve ids and EXCHANGE|NAME symbols; see instrument.resolve_instruments."""
+        return resolve_instruments(items, raise_on_error=raise_on_error)
+
     def _resolve_ids(self, items):
-        if isinstance(items, (str, int)):
-            items = [items]
-
-        resolved = []
-        for x in items:
-
-            if isinstance(x, int):
-                resolved.append(verify_instrument_id(instrument_id=x))
-
-            elif isinstance(x, str) and x.isdigit():
-                resolved.append(verify_instrument_id(instrument_id=int(x)))
-            else:
-                if isinstance(x, str):
-                    parts = x.split("|")
-                    if len(parts) >= 1:
-                        x = f"{parts[0]}|{parts[1]}"
-                    else: 
-                        raise ValueError(
-                            f"Exchange segment missing. Use format EXCHANGE|NAME, e.g. NSECM|RELIANCE. Got: {x}"
-                        )
-                resolved.append(verify_instrument_id(symbol=x))
-        return resolved
+        return resolve_instruments(items).ids
 
     @property
     def on_message(self):
@@ -66,19 +99,313 @@ class MarketDataClient:
     @on_message.setter
     def on_message(self, callback):
         self._on_tick = callback
-        self.ws_client.set_on_message(callback)
+        self._update_decode_filter()
+
+    def _handle_message(self, md_message):
+        for listener in self._listeners:
+            try:
+                listener(md_message)
+            except Exception as e:
+                logging.error(f"Internal message listener failed: {e}")
+
+        if self._handlers:
+            self._handlers.dispatch(md_message)
+
+        if self._conflator:
+            self._conflator.submit(md_message)
+        elif self._on_tick:
+            self._on_tick(self._flatten(md_message) if self._flatten else md_message)
+
+    def _deliver_conflated(self, message):
+        if self._on_tick:
+            self._on_tick(message)
+
+    # Conflation
+    def enable_conflation(self, interval=0.0, batch=False):
+        """
+        Deliver only the newest message per instrument and subtype to on_message.
+
+        Pending updates are flushed whenever the callback is free, at most
+        once every ``interval`` seconds; ``batch=True`` passes each flush as
+        a list. Incremental updates and index lists are never collapsed.
+        disable_conflation delivers whatever is still pending.
+        """
+        from .conflation import Conflator
+
+        self.disable_conflation()
+        self._conflator = Conflator(self._deliver_conflated, interval=interval, batch=batch)
+        self._conflator.start()
+        if self._decoder is not None and self._decoder.reuse:
+            # Pending messages are kept past the callback, so each needs its own object.
+            logging.warning("Conflation keeps messages; turning off fast-decode message reuse")
+            self._decoder.reuse = False
+        return self._conflator
+
+    def disable_conflation(self):
+        if self._conflator:
+            conflator, self._conflator = self._conflator, None
+            conflator.stop()
+
+    def get_conflation_stats(self):
+        """Received/collapsed/delivered counters, or None when conflation is off."""
+        return self._conflator.get_stats() if self._conflator else None
+
+    # Local market state
+    def enable_market_state(self, max_age=1.0, seed=("ltp", "quote")):
+        """
+        Serve get_ltp/get_quote from the websocket stream when possible.
+
+        Responses are rebuilt locally while every requested instrument was
+        updated (or seeded from REST) within ``max_age`` seconds; otherwise
+        the REST endpoint is called and its response refreshes the store.
+        ``seed`` names the endpoints snapshotted on subscribe_market_data.
+        """
+        from .market_state import MarketStateStore
+
+        self.disable_market_state()
+        self._market_state = MarketStateStore(max_age=max_age)
+        self._seed_endpoints = tuple(seed)
+        self._add_listener(self._market_state.update)
+        return self._market_state
+
+    def disable_market_state(self):
+        if self._market_state:
+            self._remove_listener(self._market_state.update)
+            self._market_state = None
+
+    # Redis fan-out
+    def enable_redis_mirror(self, stream="MarketDataStream", maxlen=None, publisher=None):
+        """
+        Mirror every websocket frame to a Redis Stream as raw protobuf
+        bytes (field ``data``) through a background RedisPublisher, trimmed
+        to about ``maxlen`` entries. Frames are published as received, before
+        filtering and decoding, so nothing is re-serialized on the reader
+        thread. Frames of process-mode shards are not mirrored. Returns the
+        publisher.
+        """
+        from .redis_publisher import RedisPublisher
+        from .wire import frame_payload
+
+        self.disable_redis_mirror()
+        owned = publisher is None
+        publisher = (publisher or RedisPublisher()).start()
+
+        def mirror(frame):
+            publisher.xadd(stream, frame_payload(frame), maxlen=maxlen)
+
+        self._redis_mirror = (publisher, mirror, owned)
+        self.ws_client.add_frame_listener(mirror)
+        if self._sharded_feed and not self._sharded_feed.use_processes:
+            self._sharded_feed.add_frame_listener(mirror)
+        return publisher
+
+    def disable_redis_mirror(self):
+        if self._redis_mirror:
+            publisher, mirror, owned = self._redis_mirror
+            if self._ws_client:
+                self._ws_client.remove_frame_listener(mirror)
+            if self._sharded_feed:
+                self._sharded_feed.remove_frame_listener(mirror)
+            if owned:
+                publisher.stop()
+            self._redis_mirror = None
+
+    def get_redis_stats(self):
+        return self._redis_mirror[0].get_stats() if self._redis_mirror else None
+
+    # Cross-process last-value table
+    def enable_shared_state(self, name=None):
+        """
+        Make this client the host's feeder: every LTP/touchline/index update
+        is written to a shared-memory table that other processes read with
+        SharedStateReader. Returns the SharedStateWriter.
+        """
+        from .shared_state import SharedStateWriter
+
+        self.disable_shared_state()
+        self._shared_state = SharedStateWriter(name=name)
+        self._add_listener(self._shared_state.update)
+        return self._shared_state
+
+    def disable_shared_state(self):
+        if self._shared_state:
+            self._remove_listener(self._shared_state.update)
+            self._shared_state.close()
+            self._shared_state = None
+
+    # Order books
+    def enable_order_books(self, depth=20):
+        """
+        Maintain an L2 book per instrument from IncrementalUpdateMessage and
+        MarketDepthMessage; returns the OrderBookManager.
+        """
+        from .order_book import OrderBookManager
+
+        self.disable_order_books()
+        self._order_books = OrderBookManager(depth=depth)
+        self._add_listener(self._order_books.apply)
+        return self._order_books
+
+    def disable_order_books(self):
+        if self._order_books:
+            self._remove_listener(self._order_books.apply)
+            self._order_books = None
+
+    def get_order_book(self, instrument):
+        if not self._order_books:
+            return None
+        return self._order_books.get(self._resolve_ids(instrument)[0])
+
+    # Bars
+    def enable_bars(self, timeframes=(1, 60, 300), ring_size=500, on_bar=None, ltt_scale=1):
+        """
+        Build OHLCV+OI bars for every instrument on the stream.
+
+        ``on_bar(bar)`` is called on the reader thread as each bar closes;
+        recent bars are available from get_bars(). Returns the BarAggregator.
+        """
+        from .bars import BarAggregator
+
+        self.disable_bars()
+        self._bars = BarAggregator(timeframes=timeframes, ring_size=ring_size, on_bar=on_bar, ltt_scale=ltt_scale)
+        self._add_listener(self._bars.on_message)
+        return self._bars
+
+    def disable_bars(self):
+        if self._bars:
+            self._remove_listener(self._bars.on_message)
+            self._bars = None
+
+    def get_bars(self, instrument, timeframe, count=None, include_open=True):
+        if not self._bars:
+            return []
+        return self._bars.get_bars(self._resolve_ids(instrument)[0], timeframe, count, include_open)
+
+    def _add_listener(self, listener):
+        # Copy-on-write so the reader thread can iterate without a lock.
+        self._listeners = self._listeners + [listener]
+        self._update_decode_filter()
+
+    def _remove_listener(self, listener):
+        self._listeners = [l for l in self._listeners if l != listener]
+        self._update_decode_filter()
+
+    # Typed handlers
+    def add_handler(self, subtype, handler, instruments=None, segments=None):
+        """
+        Call ``handler(body)`` for every ``subtype`` message, optionally only
+        for ``instruments`` (ids or EXCHANGE|NAME) or exchange ``segments``
+        ("NSECM", ...). Index lists and incremental updates arrive one
+        IndexData / MDEntries at a time; see HandlerRegistry. While handlers
+        are the only consumers (no on_message callback or internal
+        listener), subtypes without a handler are not decoded at all.
+        Returns a token for remove_handler.
+        """
+        from .handlers import HandlerRegistry
+
+        instrument_ids = self._resolve_ids(instruments) if instruments is not None else None
+        if self._handlers is None:
+            self._handlers = HandlerRegistry()
+        token = self._handlers.add(subtype, handler, instrument_ids=instrument_ids, segments=segments)
+        self._update_decode_filter()
+        return token
+
+    def remove_handler(self, token):
+        if self._handlers is not None:
+            self._handlers.remove(token)
+            self._update_decode_filter()
+
+    def get_handler_stats(self):
+        return self._handlers.get_stats() if self._handlers is not None else None
+
+    def _update_decode_filter(self):
+        """Narrow the decoder to handled subtypes when nothing else needs every message."""
+        handlers_only = self._handlers and not self._on_tick and not self._listeners
+        if handlers_only:
+            wanted = self._handlers.subtypes()
+            if self._decode_subtypes is not None:
+                wanted &= set(self._decode_subtypes)
+        else:
+            wanted = self._decode_subtypes
+
+        if self._decoder is not None:
+            self._decoder.set_subtypes(wanted)
+        elif wanted is not None:
+            # Handlers may keep what they are given, so do not reuse message objects here.
+            self._decoder = self.ws_client.enable_fast_decode(subtypes=wanted, reuse=False)
+
+    def _cached_request(self, name, instrument_ids):
+        store = self._market_state
+        if store:
+            cached = store.lookup(name, instrument_ids)
+            if cached is not None:
+                return cached
+
+        response = self._coalescer.request(name, instrument_ids)
+        if store:
+            store.seed(name, response)
+        return response
+
+    def _fetch_marketfeed(self, name, instrument_ids):
+        return self._send_request(f"/marketfeed/{name}", {"InstrumentIds": instrument_ids})
+
+    # Request coalescing
+    def enable_coalescing(self, window=0.002, chunk_size=None, max_workers=None):
+        """
+        Merge get_ltp/get_quote calls made from different threads within
+        ``window`` seconds into one request; each caller still gets only its
+        own instruments. ``chunk_size`` and ``max_workers`` override how long
+        lists are split (config.MARKETFEED_CHUNK_SIZE / MARKETFEED_MAX_WORKERS).
+        """
+        coalescer = self._coalescer
+        coalescer.window = window
+        if chunk_size:
+            coalescer.chunk_size = chunk_size
+        if max_workers:
+            coalescer.max_workers = max_workers
+        return coalescer
+
+    def disable_coalescing(self):
+        """Send every call on its own again (long lists are still chunked)."""
+        self._coalescer.window = 0.0
+
+    def get_coalescing_stats(self):
+        return self._coalescer.get_stats()
+
+    def _seed_market_state(self, instrument_ids):
+        payload = {"InstrumentIds": instrument_ids}
+        for name in self._seed_endpoints:
+            try:
+                self._market_state.seed(name, self._send_request(f"/marketfeed/{name}", payload))
+            except Exception as e:
+                logging.warning(f"Could not seed market state from /marketfeed/{name}: {e}")
 
     def _ensure_logged_in(self):
         self.access_token = self.auth_client.get_access_token()
+        return self.access_token
+
+    def _on_token(self, token):
+        """Token listener: later requests and the next websocket reconnect use the new token."""
+        self.access_token = token
+        if self._ws_client:
+            self._ws_client.set_access_token(token)
+        if self._sharded_feed:
+            self._sharded_feed.set_access_token(token)
 
     def _send_request(self, endpoint, payload):
         url = f"{self.api_base_url}{endpoint}"
+        token = self.access_token or self._ensure_logged_in()
         headers = {
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
             "Accept": "*/*"
         }
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_session.request("POST", url, endpoint=endpoint, json=payload, headers=headers)
+        if response.status_code == 401:
+            logging.warning("Access token expired. Refreshing token and retrying...")
+            self.access_token = self.auth_client.refresh_access_token(token)
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            response = http_session.request("POST", url, endpoint=endpoint, json=payload, headers=headers)
         if response.status_code == 200:
             return response.json()
         else:
@@ -87,8 +414,7 @@ class MarketDataClient:
     # LTP
     def get_ltp(self, instrument):
         instrument_ids = self._resolve_ids(instrument)
-        payload = {"InstrumentIds": instrument_ids}
-        return self._send_request("/marketfeed/ltp", payload)
+        return self._cached_request("ltp", instrument_ids)
 
     # Option Chain (symbol only, no ID conversion needed)
     def get_option_chain(self, symbol, expiry_date):
@@ -98,8 +424,7 @@ class MarketDataClient:
     # Quote
     def get_quote(self, instrument):
         instrument_ids = self._resolve_ids(instrument)
-        payload = {"InstrumentIds": instrument_ids}
-        return self._send_request("/marketfeed/quote", payload)
+        return self._cached_request("quote", instrument_ids)
 
     # Historical Data
     def get_historical_data(self, instrument, from_date, to_date):
@@ -110,29 +435,212 @@ class MarketDataClient:
         }
         return self._send_request("/marketfeed/historicalData", payload)
 
+    def get_historical_bulk(self, instruments, from_date, to_date, output="numpy", max_workers=None,
+                            cache_dir=None):
+        """
+        Backfill many instruments at once through the local columnar cache.
+
+        The range is split into calendar months fetched concurrently; months
+        already on disk are not requested again. Returns ``{instrument:
+        columns}`` as NumPy arrays, a pandas DataFrame (``output="pandas"``)
+        or ``array.array`` (``output="array"``).
+        """
+        from .historical import HistoricalDataCache, fetch_historical
+
+        return fetch_historical(
+            self.get_historical_data,
+            instruments,
+            from_date,
+            to_date,
+            cache=HistoricalDataCache(cache_dir) if cache_dir else None,
+            max_workers=max_workers or HISTORICAL_MAX_WORKERS,
+            output=output,
+        )
+
+    def enable_dispatch(self, workers=1, queue_size=10000, overflow="block", ordered=True, use_processes=False,
+                        callback=None):
+        """
+        Hand decoding and callbacks to a worker pool; see MarketDataWebSocketClient.enable_dispatch.
+
+        Worker processes call ``callback`` (default: on_message) directly,
+        bypassing client-side features such as conflation. It is pickled
+        into each worker, so it must be a module-level function, not a
+        method of this client; ValueError otherwise.
+        """
+        return self.ws_client.enable_dispatch(
+            workers=workers,
+            queue_size=queue_size,
+            overflow=overflow,
+            ordered=ordered,
+            use_processes=use_processes,
+            callback=(callback or self._on_tick) if use_processes else None,
+        )
+
+    def get_dispatch_stats(self):
+        return self.ws_client.get_dispatch_stats()
+
+    def enable_sharding(self, shards=4, use_processes=False, callback=None, output=None, dead_after=10.0):
+        """
+        Spread subscriptions over ``shards`` websocket connections instead of
+        the single ws_client; see ShardedFeed. In thread mode messages go
+        through the usual on_message path. With ``use_processes`` each shard
+        decodes in its own process and calls ``callback`` (default:
+        on_message, which must then be picklable) and/or fills ``output``.
+        Current subscriptions move to the shards.
+        """
+        from .sharded_feed import ShardedFeed
+
+        self.disable_sharding()
+        if use_processes:
+            callback = callback or self._on_tick
+        else:
+            callback = callback or self._handle_message
+        self._sharded_feed = ShardedFeed(
+            self.access_token or self._ensure_logged_in(),
+            shards=shards,
+            callback=callback,
+            output=output,
+            use_processes=use_processes,
+            ws_url=self.ws_client.ws_url,
+            dead_after=dead_after,
+        )
+        if self._redis_mirror and not use_processes:
+            self._sharded_feed.add_frame_listener(self._redis_mirror[1])
+        active = self.ws_client.subscriptions.active()
+        if active:
+            self.ws_client.unsubscribe(active, force=True)
+            self._sharded_feed.subscribe(active)
+        return self._sharded_feed
+
+    def disable_sharding(self):
+        if self._sharded_feed:
+            self._sharded_feed.stop()
+            self._sharded_feed = None
+
+    def get_sharding_stats(self):
+        return self._sharded_feed.get_stats() if self._sharded_feed else None
+
+    def enable_recording(self, directory, segment_bytes=256 * 1024 * 1024, flush_interval=0.05):
+        """Journal every raw websocket frame to ``directory``; see TickJournal."""
+        from .journal import TickJournal
+
+        self.disable_recording()
+        self._journal = TickJournal(directory, segment_bytes=segment_bytes, flush_interval=flush_interval).start()
+        self.ws_client.set_recorder(self._journal)
+        return self._journal
+
+    def disable_recording(self):
+        if self._journal:
+            self._ws_client.set_recorder(None)
+            self._journal.close()
+            self._journal = None
+
+    def get_recording_stats(self):
+        return self._journal.get_stats() if self._journal else None
+
+    def replay(self, path, speed=1.0):
+        """
+        Feed a recorded journal through the same path as live messages
+        (listeners, conflation and on_message). ``speed=None`` replays as
+        fast as possible. Returns the number of messages replayed.
+        """
+        from .journal import JournalReplay
+
+        return JournalReplay(path).run(self._handle_message, speed=speed)
+
+    def get_http_stats(self):
+        """Per-endpoint REST latency percentiles from the shared session layer."""
+        return http_session.get_latency_stats()
+
+    def get_auth_stats(self):
+        """Login count, seconds until the token expires and whether the background refresh is running."""
+        return self.auth_client.get_stats()
+
     def connect_ws(self):
+        if self._sharded_feed:
+            self._sharded_feed.start()
+            return
         if not self._is_connected():
             self.ws_client.start()
             while not self._is_connected():
                 time.sleep(0.1)
 
     def stop_websocket(self):
-        if self.ws_client:
-            self.ws_client.stop()
+        self.disable_conflation()
+        self.disable_recording()
+        self.disable_sharding()
+        if self._ws_client:
+            self._ws_client.stop()
             logging.info("WebSocket stopped.")
 
+    def close(self):
+        """Stop the websocket, background publishers and the token refresh thread."""
+        self.stop_websocket()
+        self.disable_redis_mirror()
+        self.disable_shared_state()
+        self.auth_client.remove_token_listener(self._on_token)
+        self.auth_client.close()
+
     def subscribe_market_data(self, instrument):
+        """
+        Subscribe to instruments. Subscriptions are reference counted and
+        replayed after every reconnect; made while disconnected, they are
+        sent once the connection opens.
+        """
         instrument_ids = self._resolve_ids(instrument)
-        if self._is_connected():
-            self.ws_client.subscribe(instrument_ids)
-            logging.info(f"Subscribed to: {instrument_ids}")
-        else:
-            logging.error("WebSocket is not connected. Cannot subscribe.")
+        (self._sharded_feed or self.ws_client).subscribe(instrument_ids)
+        logging.info(f"Subscribed to: {instrument_ids}")
+        if self._market_state:
+            self._seed_market_state(instrument_ids)
 
-    def unsubscribe_market_data(self, instrument):
+    def unsubscribe_market_data(self, instrument, force=False):
         instrument_ids = self._resolve_ids(instrument)
-        if self._is_connected():
-            self.ws_client.unsubscribe(instrument_ids)
-            logging.info(f"Unsubscribed from: {instrument_ids}")
-        else:
-            logging.error("WebSocket is not connected. Cannot unsubscribe.")
+        (self._sharded_feed or self.ws_client).unsubscribe(instrument_ids, force=force)
+        logging.info(f"Unsubscribed from: {instrument_ids}")
+
+    def get_subscriptions(self):
+        """Active instrumentIds, in subscription order."""
+        if self._sharded_feed:
+            return self._sharded_feed.active()
+        return self.ws_client.subscriptions.active()
+
+    def get_reconnect_stats(self):
+        return self.ws_client.get_reconnect_stats()
+
+    def enable_fast_decode(self, instruments=None, subtypes=None, flat=False, reuse=False):
+        """
+        Drop frames outside ``instruments`` / ``subtypes`` before they are
+        parsed; see wire.FastDecoder. With ``flat`` on_message gets
+        TickTuple / TouchLineTuple for the hot subtypes (listeners and
+        conflation still see messages). ``reuse=True`` parses every frame
+        into one message object, which is only safe when nothing keeps a
+        message past its callback; it is ignored while conflation is on.
+        """
+        from .wire import flatten
+
+        if reuse and self._conflator:
+            logging.warning("Conflation keeps messages; fast-decode message reuse stays off")
+            reuse = False
+        instrument_ids = self._resolve_ids(instruments) if instruments is not None else None
+        self._flatten = flatten if flat else None
+        self._decode_subtypes = subtypes
+        self._decoder = self.ws_client.enable_fast_decode(instrument_ids, subtypes, reuse=reuse)
+        self._update_decode_filter()
+        return self._decoder
+
+    def disable_fast_decode(self):
+        self._flatten = None
+        self._decode_subtypes = None
+        self._decoder = None
+        self.ws_client.disable_fast_decode()
+        self._update_decode_filter()
+
+    def enable_stream_stats(self, prometheus_port=None, prometheus_addr="127.0.0.1"):
+        """Per-subtype latency histograms and counters for the websocket path; see StreamStats."""
+        return self.ws_client.enable_stats(prometheus_port, prometheus_addr)
+
+    def disable_stream_stats(self):
+        self.ws_client.disable_stats()
+
+    def get_stream_stats(self):
+        return self.ws_client.get_stats()
@@ -0,0 +1,169 @@
+import threading
+import time
+
+from .proto import marketdata_pb2
+from .utils import find_instrument_items, instrument_id_of_item, replace_instrument_items
+from .wire import SUBTYPE_FIELDS
+
+# Identify the instrument rather than describe its market; never written onto records.
+_IDENTITY_FIELDS = {"InstrumentID", "ExchangeSegment", "ExchangeInstrumentID", "InstrumentName"}
+
+# Repeated PriceDepthLevel fields of TouchLineDataMessage and MarketDepthMessage.
+_DEPTH_FIELDS = ("BestBidLevel", "BestAskLevel")
+_LEVEL_FIELDS = ("Price", "Qty", "Orders")
+
+
+def _scalar_fields(subtype):
+    """The market fields of a MarketDataMessageBase subtype, as declared in the .proto."""
+    descriptor = marketdata_pb2.MarketDataMessageBase.DESCRIPTOR.fields_by_name[subtype].message_type
+    return tuple(field.name for field in descriptor.fields
+                 if field.name not in _IDENTITY_FIELDS and field.message_type is None)
+
+
+# Stream subtype -> fields copied onto REST records under the same key. The
+# REST ltp/quote records use the protobuf field names (LTP, LTQ, LTT, ...).
+_SUBTYPE_FIELDS = {SUBTYPE_FIELDS[number]: _scalar_fields(SUBTYPE_FIELDS[number]) for number in (500, 501, 502, 506)}
+_DEPTH_SUBTYPES = ("TouchLineDataMessage", "MarketDepthMessage")
+
+# IndexData field -> record key; index records carry the last value as LTP.
+_INDEX_FIELDS = (("Last", "LTP"), ("Open", "Open"), ("High", "High"), ("Low", "Low"),
+                 ("Close", "Close"), ("TimeStamp", "TimeStamp"))
+
+
+def _levels(levels):
+    return [{name: getattr(level, name) for name in _LEVEL_FIELDS} for level in levels]
+
+
+class MarketStateStore:
+    """
+    In-process last-value cache fed by the websocket stream.
+
+    REST snapshots (``seed``) provide the record layout of each endpoint's
+    response; live ``TickDataMessage``, ``TickData``,
+    ``TouchLineDataMessage``, ``MarketDepthMessage`` and ``IndexDataMessage``
+    updates are written onto those records under their protobuf field names,
+    so ``lookup`` can rebuild an LTP or quote response locally while every
+    requested instrument has been updated within ``max_age`` seconds. A
+    record that carries ``BestBidLevel``/``BestAskLevel`` (a quote) also
+    needs its levels to be that fresh, from the snapshot or from touchline
+    or depth messages; otherwise the fresh LTP would go out next to stale
+    depth.
+    """
+
+    def __init__(self, max_age=1.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._fields = {}       # instrumentId -> latest stream fields
+        self._updated = {}      # instrumentId -> time.monotonic() of last update
+        self._depth = {}        # instrumentId -> {"BestBidLevel": [...], "BestAskLevel": [...]}
+        self._depth_updated = {}  # instrumentId -> time.monotonic() of last depth update
+        self._records = {}      # endpoint -> {instrumentId: (record, fields present, seeded at, has depth)}
+        self._templates = {}    # endpoint -> (payload, path)
+
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype == "IndexDataMessage":
+            data = md_message.IndexDataMessage.IndexData
+            fields = {name: getattr(data, attr) for attr, name in _INDEX_FIELDS}
+            self._store(data.InstrumentID, fields)
+            return
+
+        names = _SUBTYPE_FIELDS.get(subtype)
+        if names is None:
+            return
+        body = getattr(md_message, subtype)
+        depth = None
+        if subtype in _DEPTH_SUBTYPES:
+            depth = {name: _levels(getattr(body, name)) for name in _DEPTH_FIELDS}
+        self._store(body.InstrumentID, {name: getattr(body, name) for name in names}, depth)
+
+    def _store(self, instrument_id, fields, depth=None):
+        with self._lock:
+            now = time.monotonic()
+            current = self._fields.get(instrument_id)
+            if current is None:
+                self._fields[instrument_id] = fields
+            else:
+                current.update(fields)
+            self._updated[instrument_id] = now
+            if depth is not None:
+                self._depth[instrument_id] = depth
+                self._depth_updated[instrument_id] = now
+
+    def seed(self, endpoint, response):
+        """Remember the layout and records of a REST response for ``endpoint``."""
+        path, items = find_instrument_items(response)
+        if path is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._templates[endpoint] = (response, path)
+            records = self._records.setdefault(endpoint, {})
+            for item in items:
+                if "LTP" not in item:
+                    continue
+                has_depth = any(name in item for name in _DEPTH_FIELDS)
+                records[instrument_id_of_item(item)] = (item, frozenset(item), now, has_depth)
+
+    def lookup(self, endpoint, instrument_ids):
+        """Return a locally built response for ``endpoint``, or None if any instrument is stale or unseen."""
+        now = time.monotonic()
+        with self._lock:
+            template = self._templates.get(endpoint)
+            records = self._records.get(endpoint)
+            if template is None or records is None:
+                self.misses += 1
+                return None
+
+            items = []
+            for instrument_id in instrument_ids:
+                entry = records.get(instrument_id)
+                if entry is None:
+                    self.misses += 1
+                    return None
+                record, keys, seeded_at, has_depth = entry
+                updated = self._updated.get(instrument_id, 0.0)
+                depth_updated = self._depth_updated.get(instrument_id, 0.0)
+                if now - max(seeded_at, updated) > self.max_age or (
+                        has_depth and now - max(seeded_at, depth_updated) > self.max_age):
+                    self.misses += 1
+                    return None
+
+                record = dict(record)
+                if updated > seeded_at:
+                    for field, value in self._fields[instrument_id].items():
+                        if field in keys:
+                            record[field] = value
+                if has_depth and depth_updated > seeded_at:
+                    for field, levels in self._depth[instrument_id].items():
+                        if field in keys:
+                            record[field] = [dict(level) for level in levels]
+                items.append(record)
+
+            self.hits += 1
+            payload, path = template
+        return replace_instrument_items(payload, path, items)
+
+    def get_fields(self, instrument_id):
+        """Latest raw stream fields for an instrument (LTP, LTQ, LTT, ...)."""
+        with self._lock:
+            return dict(self._fields.get(instrument_id, {}))
+
+    def get_depth(self, instrument_id):
+        """Latest best bid/ask levels seen on touchline or depth messages, as (bids, asks)."""
+        with self._lock:
+            depth = self._depth.get(instrument_id)
+        if depth is None:
+            return None
+        return tuple([(level["Price"], level["Qty"], level["Orders"]) for level in depth[name]]
+                     for name in _DEPTH_FIELDS)
+
+    def get_stats(self):
+        return {
+            "instruments": len(self._fields),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
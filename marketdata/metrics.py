@@ -0,0 +1,264 @@
+import threading
+import time
+
+_SUB_BITS = 5
+_SUB_BUCKETS = 1 << _SUB_BITS
+
+
+def _bucket_index(value):
+    if value < 2 * _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - _SUB_BITS - 1
+    return shift * _SUB_BUCKETS + (value >> shift)
+
+
+def _bucket_value(index):
+    if index < 2 * _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return (index - shift * _SUB_BUCKETS) << shift
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of durations.
+
+    Values are recorded in seconds and bucketed in nanoseconds with 32
+    sub-buckets per power of two (about 3% relative error), so recording is
+    O(1) and memory stays bounded however many samples are taken.
+    """
+
+    def __init__(self):
+        self._counts = []
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        value = int(seconds * 1e9)
+        if value < 0:
+            value = 0
+        index = _bucket_index(value)
+        with self._lock:
+            counts = self._counts
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, pct):
+        """Duration in seconds at percentile ``pct`` (0-100)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, int(round(self.count * pct / 100.0)))
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= target:
+                    return min(_bucket_value(index), self.max) / 1e9
+            return self.max / 1e9
+
+    def reset(self):
+        with self._lock:
+            self._counts = []
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = 0
+
+    def snapshot(self):
+        """Count, mean, min/max and p50/p90/p99/p99.9, all durations in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1e9 if self.count else 0.0,
+            "min": (self.min or 0) / 1e9,
+            "max": self.max / 1e9,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+
+# ----------------------------------------------------------------------
+# Streaming path instrumentation
+# ----------------------------------------------------------------------
+STAGES = ("exchange_to_recv", "recv_to_decoded", "decoded_to_callback")
+
+# Exchange feeds stamp time as Unix time or seconds since 1980-01-01 (NSE/BSE),
+# in seconds, milliseconds, microseconds or nanoseconds.
+_TIMESTAMP_SCALES = (1, 1_000, 1_000_000, 1_000_000_000)
+_TIMESTAMP_OFFSETS = (0, 315532800)
+_TIMESTAMP_TOLERANCE = 30 * 24 * 60 * 60
+
+
+def detect_timestamp_unit(value, now=None):
+    """
+    Return ``(scale, offset)`` such that ``value / scale + offset`` is Unix
+    seconds close to ``now``, or None if no combination is plausible.
+    """
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    for scale in _TIMESTAMP_SCALES:
+        for offset in _TIMESTAMP_OFFSETS:
+            if abs(value / scale + offset - now) <= _TIMESTAMP_TOLERANCE:
+                return scale, offset
+    return None
+
+
+def _exchange_time(md_message, subtype):
+    """The exchange timestamp carried by a message, or 0 if it has none."""
+    if subtype == "TickData":
+        return md_message.TickData.LTT
+    if subtype == "IndexDataMessage":
+        return md_message.IndexDataMessage.IndexData.TimeStamp
+    if subtype == "IndexDataListMessage":
+        items = md_message.IndexDataListMessage.IndexDataList
+        return items[0].TimeStamp if items else 0
+    if subtype == "IncrementalUpdateMessage" or subtype is None:
+        return 0
+    body = getattr(md_message, subtype)
+    return body.TimeStamp or body.LTT
+
+
+class StreamStats:
+    """
+    Per-subtype latency histograms and counters for the websocket path.
+
+    Stages are exchange timestamp -> socket receive (wall clock, so it
+    includes clock skew), receive -> decoded and decoded -> callback
+    returned. The exchange timestamp unit is detected per subtype from the
+    first stamped message.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counts = {}
+            self._units = {}
+            self.messages = 0
+            self.bytes = 0
+            self.parse_errors = 0
+            self.callback_errors = 0
+            self.started = time.monotonic()
+            self._last_rates = (self.started, 0, 0, 0, 0)
+
+    def _stage_histograms(self, subtype):
+        histograms = self._histograms.get(subtype)
+        if histograms is None:
+            with self._lock:
+                histograms = self._histograms.setdefault(subtype, tuple(LatencyHistogram() for _ in STAGES))
+                self._counts.setdefault(subtype, 0)
+        return histograms
+
+    def received(self, size):
+        self.messages += 1
+        self.bytes += size
+
+    def record(self, md_message, recv_wall_ns, recv_ns, decoded_ns, done_ns):
+        """Record one delivered message; the *_ns arguments are perf_counter_ns() readings."""
+        subtype = md_message.WhichOneof("subtype")
+        to_recv, to_decoded, to_callback = self._stage_histograms(subtype)
+        with self._lock:  # dispatch workers record concurrently
+            self._counts[subtype] += 1
+
+        stamp = _exchange_time(md_message, subtype)
+        if stamp:
+            unit = self._units.get(subtype, False)
+            if unit is False:
+                unit = self._units[subtype] = detect_timestamp_unit(stamp, recv_wall_ns / 1e9)
+            if unit is not None:
+                scale, offset = unit
+                to_recv.record(recv_wall_ns / 1e9 - (stamp / scale + offset))
+        to_decoded.record((decoded_ns - recv_ns) / 1e9)
+        to_callback.record((done_ns - decoded_ns) / 1e9)
+
+    def get_stats(self):
+        """Snapshot of counters, per-second rates since the previous snapshot and per-subtype percentiles."""
+        now = time.monotonic()
+        counters = (self.messages, self.bytes, self.parse_errors, self.callback_errors)
+        last_time, *last_counters = self._last_rates
+        elapsed = max(now - last_time, 1e-9)
+        self._last_rates = (now,) + counters
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "parse_errors": self.parse_errors,
+            "callback_errors": self.callback_errors,
+            "per_second": {
+                name: (value - last) / elapsed
+                for name, value, last in zip(("messages", "bytes", "parse_errors", "callback_errors"),
+                                             counters, last_counters)
+            },
+            "subtypes": {
+                subtype: dict(
+                    {"messages": self._counts.get(subtype, 0),
+                     "timestamp_unit": self._units.get(subtype) or None},
+                    **{stage: histogram.snapshot() for stage, histogram in zip(STAGES, histograms)}
+                )
+                for subtype, histograms in list(self._histograms.items())
+            },
+        }
+
+    def prometheus(self, prefix="marketdata_stream"):
+        """Prometheus text exposition of the counters and latency summaries."""
+        lines = []
+        for name, value in (("messages", self.messages), ("bytes", self.bytes),
+                            ("parse_errors", self.parse_errors), ("callback_errors", self.callback_errors)):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+
+        lines.append(f"# TYPE {prefix}_subtype_messages_total counter")
+        for subtype, count in list(self._counts.items()):
+            lines.append(f'{prefix}_subtype_messages_total{{subtype="{subtype}"}} {count}')
+
+        lines.append(f"# TYPE {prefix}_latency_seconds summary")
+        for subtype, histograms in list(self._histograms.items()):
+            for stage, histogram in zip(STAGES, histograms):
+                labels = f'subtype="{subtype}",stage="{stage}"'
+                for quantile in (0.5, 0.9, 0.99, 0.999):
+                    lines.append(f'{prefix}_latency_seconds{{{labels},quantile="{quantile}"}} '
+                                 f"{histogram.percentile(quantile * 100):.9f}")
+                lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {histogram.total / 1e9:.9f}")
+                lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(stats, port=9108, addr="127.0.0.1"):
+    """
+    Serve ``stats.prometheus()`` at ``http://addr:port/metrics`` from a
+    daemon thread. Returns the server; call ``shutdown()`` to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = stats.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
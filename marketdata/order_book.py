@@ -0,0 +1,245 @@
+from array import array
+
+# FIX MDUpdateAction / MDEntryType values used in MDEntries.
+ACTION_NEW, ACTION_CHANGE, ACTION_DELETE = 0, 1, 2
+ENTRY_BID, ENTRY_ASK = 0, 1
+
+
+class BookSide:
+    """
+    One side of a price-level book held in fixed-size parallel arrays.
+
+    Level 0 is the best price. Inserts and deletes shift the arrays with a
+    single slice assignment; the running quantity total is kept up to date
+    so depth and imbalance reads are O(1).
+    """
+
+    __slots__ = ("prices", "sizes", "orders", "levels", "total", "capacity")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.prices = array("d", bytes(8 * capacity))
+        self.sizes = array("q", bytes(8 * capacity))
+        self.orders = array("i", bytes(4 * capacity))
+        self.levels = 0
+        self.total = 0
+
+    def clear(self):
+        for i in range(self.levels):
+            self.prices[i] = 0.0
+            self.sizes[i] = 0
+            self.orders[i] = 0
+        self.levels = 0
+        self.total = 0
+
+    def insert(self, index, price, size, orders=0):
+        n = self.levels
+        if index > n:
+            index = n
+        if index >= self.capacity:
+            return
+        if n == self.capacity:
+            self.total -= self.sizes[n - 1]
+            n -= 1
+        if index < n:
+            self.prices[index + 1:n + 1] = self.prices[index:n]
+            self.sizes[index + 1:n + 1] = self.sizes[index:n]
+            self.orders[index + 1:n + 1] = self.orders[index:n]
+        self.prices[index] = price
+        self.sizes[index] = size
+        self.orders[index] = orders
+        self.levels = n + 1
+        self.total += size
+
+    def change(self, index, price, size, orders=0):
+        if index >= self.levels:
+            self.insert(index, price, size, orders)
+            return
+        self.total += size - self.sizes[index]
+        self.prices[index] = price
+        self.sizes[index] = size
+        self.orders[index] = orders
+
+    def delete(self, index):
+        n = self.levels
+        if index >= n:
+            return
+        self.total -= self.sizes[index]
+        if index < n - 1:
+            self.prices[index:n - 1] = self.prices[index + 1:n]
+            self.sizes[index:n - 1] = self.sizes[index + 1:n]
+            self.orders[index:n - 1] = self.orders[index + 1:n]
+        self.prices[n - 1] = 0.0
+        self.sizes[n - 1] = 0
+        self.orders[n - 1] = 0
+        self.levels = n - 1
+
+    def index_of(self, price):
+        """Level holding ``price``, or -1; used when an entry carries no position."""
+        for i in range(self.levels):
+            if self.prices[i] == price:
+                return i
+        return -1
+
+    def load(self, depth_levels):
+        """
+        Replace the side with the first ``capacity`` PriceDepthLevel entries;
+        returns True if those differed from the side.
+        """
+        changed = min(len(depth_levels), self.capacity) != self.levels
+        total = 0
+        n = 0
+        for level in depth_levels:
+            if n == self.capacity:
+                break
+            if not changed and (self.prices[n] != level.Price or self.sizes[n] != level.Qty):
+                changed = True
+            self.prices[n] = level.Price
+            self.sizes[n] = level.Qty
+            self.orders[n] = level.Orders
+            total += level.Qty
+            n += 1
+        for i in range(n, self.levels):
+            self.prices[i] = 0.0
+            self.sizes[i] = 0
+            self.orders[i] = 0
+        self.levels = n
+        self.total = total
+        return changed
+
+    def to_list(self):
+        return [(self.prices[i], self.sizes[i], self.orders[i]) for i in range(self.levels)]
+
+
+class OrderBook:
+    """L2 book for one instrument built from IncrementalUpdateMessage entries."""
+
+    __slots__ = ("instrument_id", "bids", "asks", "updates", "snapshots", "resyncs")
+
+    def __init__(self, instrument_id, depth=20):
+        self.instrument_id = instrument_id
+        self.bids = BookSide(depth)
+        self.asks = BookSide(depth)
+        self.updates = 0
+        self.snapshots = 0
+        self.resyncs = 0
+
+    def apply_entry(self, action, entry_type, position, price, size):
+        """
+        Apply one MDEntries update. ``position`` is the 1-based MDEntryPosition;
+        when it is 0 the level is located by price instead.
+        """
+        if entry_type == ENTRY_BID:
+            side = self.bids
+        elif entry_type == ENTRY_ASK:
+            side = self.asks
+        else:
+            return
+
+        index = position - 1 if position > 0 else side.index_of(price)
+        if action == ACTION_NEW:
+            if index < 0:
+                index = self._insertion_point(side, price, entry_type == ENTRY_BID)
+            side.insert(index, price, size)
+        elif action == ACTION_CHANGE:
+            if index >= 0:
+                side.change(index, price, size)
+        elif action == ACTION_DELETE:
+            if index >= 0:
+                side.delete(index)
+        self.updates += 1
+
+    @staticmethod
+    def _insertion_point(side, price, descending):
+        for i in range(side.levels):
+            if (price > side.prices[i]) if descending else (price < side.prices[i]):
+                return i
+        return side.levels
+
+    def apply_snapshot(self, depth_message):
+        """Reset from a full MarketDepthMessage; counts a resync when the incremental book had drifted."""
+        bids_changed = self.bids.load(depth_message.BestBidLevel)
+        asks_changed = self.asks.load(depth_message.BestAskLevel)
+        if self.snapshots and (bids_changed or asks_changed):
+            self.resyncs += 1
+        self.snapshots += 1
+
+    # ------------------------------------------------------------------
+    # O(1) reads
+    # ------------------------------------------------------------------
+    def best_bid(self):
+        bids = self.bids
+        return (bids.prices[0], bids.sizes[0]) if bids.levels else None
+
+    def best_ask(self):
+        asks = self.asks
+        return (asks.prices[0], asks.sizes[0]) if asks.levels else None
+
+    def spread(self):
+        if self.bids.levels and self.asks.levels:
+            return self.asks.prices[0] - self.bids.prices[0]
+        return None
+
+    def mid(self):
+        if self.bids.levels and self.asks.levels:
+            return (self.asks.prices[0] + self.bids.prices[0]) / 2
+        return None
+
+    def depth(self):
+        """Number of populated (bid, ask) levels."""
+        return self.bids.levels, self.asks.levels
+
+    def total_quantity(self):
+        return self.bids.total, self.asks.total
+
+    def imbalance(self):
+        """(bid qty - ask qty) / (bid qty + ask qty) across all levels, in [-1, 1]."""
+        total = self.bids.total + self.asks.total
+        return (self.bids.total - self.asks.total) / total if total else 0.0
+
+    def top_imbalance(self):
+        """Imbalance of the best level only."""
+        if not (self.bids.levels and self.asks.levels):
+            return 0.0
+        bid, ask = self.bids.sizes[0], self.asks.sizes[0]
+        return (bid - ask) / (bid + ask) if bid + ask else 0.0
+
+    def snapshot(self):
+        return {"bids": self.bids.to_list(), "asks": self.asks.to_list()}
+
+
+class OrderBookManager:
+    """Keeps an OrderBook per InstrumentID and routes stream messages to it."""
+
+    def __init__(self, depth=20):
+        self.depth = depth
+        self.books = {}
+
+    def book(self, instrument_id):
+        book = self.books.get(instrument_id)
+        if book is None:
+            book = self.books[instrument_id] = OrderBook(instrument_id, self.depth)
+        return book
+
+    def get(self, instrument_id):
+        return self.books.get(instrument_id)
+
+    def apply(self, md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype == "IncrementalUpdateMessage":
+            books = self.books
+            for entry in md_message.IncrementalUpdateMessage.MDEntriesList:
+                book = books.get(entry.InstrumentID) or self.book(entry.InstrumentID)
+                book.apply_entry(entry.MDUpdateAction, entry.MDEntryType, entry.MDEntryPosition,
+                                 entry.MDEntryPrice, entry.MDEntrySize)
+        elif subtype == "MarketDepthMessage":
+            depth = md_message.MarketDepthMessage
+            self.book(depth.InstrumentID).apply_snapshot(depth)
+
+    def get_stats(self):
+        return {
+            "books": len(self.books),
+            "updates": sum(book.updates for book in self.books.values()),
+            "snapshots": sum(book.snapshots for book in self.books.values()),
+            "resyncs": sum(book.resyncs for book in self.books.values()),
+        }
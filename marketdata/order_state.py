@@ -0,0 +1,343 @@
+import json
+import logging
+import threading
+
+from .utils import instrument_id_of_item
+
+# Record fields as the gateway may spell them in order, position and trade responses.
+_CONTAINER_KEYS = ("data", "Data", "orders", "Orders", "positions", "Positions", "trades", "Trades",
+                   "result", "Result")
+BLITZ_ORDER_KEYS = ("BlitzOrderId", "blitzOrderId", "BlitzOrderID")
+EXCHANGE_ORDER_KEYS = ("exchangeOrderId", "ExchangeOrderId", "ExchangeOrderID")
+STRATEGY_KEYS = ("strategyId", "StrategyId", "StrategyID", "strategy", "Strategy")
+STATUS_KEYS = ("orderStatus", "OrderStatus", "status", "Status")
+TRADE_KEYS = ("tradeId", "TradeId", "TradeID", "exchangeTradeId", "ExchangeTradeId", "ExchangeTradeID")
+NET_QUANTITY_KEYS = ("netQty", "NetQty", "netQuantity", "NetQuantity", "quantity", "Quantity")
+CLOSED_STATUSES = {"FILLED", "COMPLETE", "COMPLETED", "CANCELLED", "CANCELED", "REJECTED", "EXPIRED"}
+
+
+def record_field(record, keys):
+    """The first of ``keys`` present in ``record``, or None."""
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def find_records(payload):
+    """The list of records in an orders/positions/trades response body."""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for key in _CONTAINER_KEYS:
+            if key in payload:
+                return find_records(payload[key])
+    return []
+
+
+def is_open_order(order):
+    status = record_field(order, STATUS_KEYS)
+    return status is None or str(status).upper() not in CLOSED_STATUSES
+
+
+def _trade_key(trade):
+    key = record_field(trade, TRADE_KEYS)
+    if key is not None:
+        return key
+    return json.dumps(trade, sort_keys=True, default=str)
+
+
+class OrderStateBook:
+    """
+    Local view of orders, positions and fills kept in step with Blitz-API.
+
+    Orders are indexed by BlitzOrderId and exchangeOrderId, open orders,
+    positions and fills by instrument, so every lookup is a dict access.
+    ``reconcile_*`` diff a full server listing against the book and touch
+    only the records that changed; an unchanged response body is skipped
+    before it is even parsed. ``apply_*`` fold in the results of
+    place/modify/cancel calls and pushed updates between polls. An order
+    is only dropped when it was in the previous orders listing and is
+    missing from the current one, so an order placed since the last poll
+    survives a listing that does not show it yet.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._orders = {}           # BlitzOrderId -> order record
+        self._by_exchange = {}      # exchangeOrderId -> BlitzOrderId
+        self._listed = set()        # BlitzOrderIds in the last orders listing
+        self._open = {}             # instrumentId -> {BlitzOrderId: order record}
+        self._positions = {}        # instrumentId -> position record
+        self._trades = {}           # trade key -> trade record
+        self._fills = {}            # instrumentId -> [trade record]
+        self._last_text = {}        # listing -> response_text of the last reconcile
+        self._redis = None
+
+        self.reconciles = 0
+        self.unchanged = 0
+        self.updates = 0
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+    def _resolve(self, order):
+        blitz_id = record_field(order, BLITZ_ORDER_KEYS)
+        if blitz_id is None:
+            exchange_id = record_field(order, EXCHANGE_ORDER_KEYS)
+            if exchange_id is not None:
+                blitz_id = self._by_exchange.get(str(exchange_id))
+        return None if blitz_id is None else str(blitz_id)
+
+    def _unindex(self, blitz_id, order):
+        exchange_id = record_field(order, EXCHANGE_ORDER_KEYS)
+        if exchange_id is not None and self._by_exchange.get(str(exchange_id)) == blitz_id:
+            del self._by_exchange[str(exchange_id)]
+        open_orders = self._open.get(instrument_id_of_item(order))
+        if open_orders is not None:
+            open_orders.pop(blitz_id, None)
+            if not open_orders:
+                del self._open[instrument_id_of_item(order)]
+
+    def _put_order(self, blitz_id, order):
+        previous = self._orders.get(blitz_id)
+        if previous is not None:
+            self._unindex(blitz_id, previous)
+        self._orders[blitz_id] = order
+        exchange_id = record_field(order, EXCHANGE_ORDER_KEYS)
+        if exchange_id is not None:
+            self._by_exchange[str(exchange_id)] = blitz_id
+        if is_open_order(order):
+            self._open.setdefault(instrument_id_of_item(order), {})[blitz_id] = order
+        self.updates += 1
+
+    def apply_order(self, order, replace=False):
+        """Merge an order record (or replace it with ``replace``); returns its BlitzOrderId or None."""
+        with self._lock:
+            blitz_id = self._resolve(order)
+            if blitz_id is None:
+                return None
+            current = self._orders.get(blitz_id)
+            if current is not None and not replace:
+                merged = dict(current)
+                merged.update(order)
+                order = merged
+            self._put_order(blitz_id, order)
+            return blitz_id
+
+    def apply_placed(self, order_data, result):
+        """Record an order from a successful place_order/modify_order request and its response."""
+        if result.get("status_code") != 200:
+            return None
+        response = result.get("response_json")
+        data = response.get("data", response) if isinstance(response, dict) else None
+        order = dict(order_data)
+        if isinstance(data, dict):
+            order.update(data)
+        return self.apply_order(order)
+
+    def apply_cancelled(self, instrument_id, exchange_order_id, result):
+        """Mark an order cancelled after a successful cancel_order request."""
+        if result.get("status_code") != 200:
+            return None
+        with self._lock:
+            blitz_id = self._by_exchange.get(str(exchange_order_id))
+            if blitz_id is None:
+                return None
+            order = dict(self._orders[blitz_id])
+            status_key = next((key for key in STATUS_KEYS if key in order), STATUS_KEYS[0])
+            order[status_key] = "CANCELLED"
+            self._put_order(blitz_id, order)
+            return blitz_id
+
+    def reconcile_orders(self, result):
+        """Diff a get_orders result against the book; returns counts of added/changed/removed orders."""
+        records = self._listing("orders", result)
+        if records is None:
+            return {"added": 0, "changed": 0, "removed": 0}
+        added = changed = 0
+        with self._lock:
+            # One key lookup per record; records without a BlitzOrderId are resolved by exchangeOrderId.
+            key = next((key for key in BLITZ_ORDER_KEYS if key in records[0]), None) if records else None
+            ids = [str(order[key]) if key in order else self._resolve(order) for order in records]
+            current = self._orders.get
+            for blitz_id, order in [(blitz_id, order) for blitz_id, order in zip(ids, records)
+                                    if blitz_id is not None and current(blitz_id) != order]:
+                if current(blitz_id) is None:
+                    added += 1
+                else:
+                    changed += 1
+                self._put_order(blitz_id, order)
+            seen = set(ids)
+            seen.discard(None)
+            removed = [blitz_id for blitz_id in self._listed - seen if blitz_id in self._orders]
+            for blitz_id in removed:
+                self._unindex(blitz_id, self._orders.pop(blitz_id))
+            self._listed = seen
+        return {"added": added, "changed": changed, "removed": len(removed)}
+
+    def get_order(self, blitz_order_id=None, exchange_order_id=None):
+        """An order by BlitzOrderId or exchangeOrderId, or None."""
+        with self._lock:
+            if blitz_order_id is None and exchange_order_id is not None:
+                blitz_order_id = self._by_exchange.get(str(exchange_order_id))
+            if blitz_order_id is None:
+                return None
+            order = self._orders.get(str(blitz_order_id))
+            return dict(order) if order is not None else None
+
+    def get_open_orders(self, instrument_id=None):
+        """Open orders for one instrument, or all of them."""
+        with self._lock:
+            if instrument_id is None:
+                return [dict(order) for orders in self._open.values() for order in orders.values()]
+            return [dict(order) for order in self._open.get(int(instrument_id), {}).values()]
+
+    # ------------------------------------------------------------------
+    # Positions and fills
+    # ------------------------------------------------------------------
+    def apply_position(self, position):
+        instrument_id = instrument_id_of_item(position)
+        if instrument_id is None:
+            return
+        with self._lock:
+            self._positions[instrument_id] = position
+            self.updates += 1
+
+    def reconcile_positions(self, result):
+        """Diff a get_positions result against the book."""
+        records = self._listing("positions", result)
+        if records is None:
+            return {"added": 0, "changed": 0, "removed": 0}
+        added = changed = 0
+        with self._lock:
+            seen = set()
+            for position in records:
+                instrument_id = instrument_id_of_item(position)
+                if instrument_id is None:
+                    continue
+                seen.add(instrument_id)
+                current = self._positions.get(instrument_id)
+                if current == position:
+                    continue
+                if current is None:
+                    added += 1
+                else:
+                    changed += 1
+                self._positions[instrument_id] = position
+                self.updates += 1
+            removed = [instrument_id for instrument_id in self._positions if instrument_id not in seen]
+            for instrument_id in removed:
+                del self._positions[instrument_id]
+        return {"added": added, "changed": changed, "removed": len(removed)}
+
+    def get_position(self, instrument_id):
+        with self._lock:
+            position = self._positions.get(int(instrument_id))
+            return dict(position) if position is not None else None
+
+    def get_net_position(self, instrument_id):
+        """Net quantity held in an instrument, 0 when flat or unknown."""
+        with self._lock:
+            position = self._positions.get(int(instrument_id))
+        if position is None:
+            return 0
+        quantity = record_field(position, NET_QUANTITY_KEYS)
+        if quantity is None:
+            return 0
+        return quantity if isinstance(quantity, (int, float)) else float(quantity)
+
+    def apply_trade(self, trade):
+        """Add a fill; returns False if it was already in the book."""
+        key = _trade_key(trade)
+        with self._lock:
+            if key in self._trades:
+                return False
+            self._trades[key] = trade
+            self._fills.setdefault(instrument_id_of_item(trade), []).append(trade)
+            self.updates += 1
+            return True
+
+    def reconcile_trades(self, result):
+        """Add fills from a get_trades result that the book has not seen; trades are append-only."""
+        records = self._listing("trades", result)
+        if records is None:
+            return {"added": 0, "changed": 0, "removed": 0}
+        added = sum(1 for trade in records if self.apply_trade(trade))
+        return {"added": added, "changed": 0, "removed": 0}
+
+    def get_fills(self, instrument_id):
+        with self._lock:
+            return list(self._fills.get(int(instrument_id), ()))
+
+    # ------------------------------------------------------------------
+    # Listings and pushed updates
+    # ------------------------------------------------------------------
+    def _listing(self, name, result):
+        """Records of a successful listing, or None if it failed or is unchanged since the last one."""
+        if result.get("status_code") != 200:
+            return None
+        text = result.get("response_text")
+        with self._lock:
+            self.reconciles += 1
+            if text and self._last_text.get(name) == text:
+                self.unchanged += 1
+                return None
+            self._last_text[name] = text
+        payload = result.get("response_json")
+        if payload is None and text:
+            try:
+                payload = json.loads(text)
+            except ValueError:
+                return None
+        return find_records(payload)
+
+    def apply_update(self, update):
+        """
+        Apply one pushed update: ``{"type": "order"|"position"|"trade",
+        "data": record}``; a bare record is taken as an order.
+        """
+        kind = update.get("type") if "data" in update else "order"
+        record = update.get("data", update)
+        if kind == "order":
+            self.apply_order(record)
+        elif kind == "position":
+            self.apply_position(record)
+        elif kind == "trade":
+            self.apply_trade(record)
+        else:
+            logging.warning(f"Ignoring order state update of type {kind!r}")
+
+    def attach_redis(self, redis_client, channel):
+        """Apply JSON updates published on a Redis channel from a background thread."""
+        self.detach_redis()
+
+        def on_message(message):
+            try:
+                self.apply_update(json.loads(message["data"]))
+            except (ValueError, TypeError, AttributeError) as e:
+                logging.error(f"Bad order state update on {channel}: {e}")
+
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: on_message})
+        self._redis = (pubsub, pubsub.run_in_thread(sleep_time=0.1, daemon=True))
+        logging.info(f"Order state book listening on Redis channel {channel}")
+
+    def detach_redis(self):
+        if self._redis:
+            pubsub, thread = self._redis
+            thread.stop()
+            pubsub.close()
+            self._redis = None
+
+    def get_stats(self):
+        return {
+            "orders": len(self._orders),
+            "open_orders": sum(len(orders) for orders in self._open.values()),
+            "positions": len(self._positions),
+            "trades": len(self._trades),
+            "reconciles": self.reconciles,
+            "unchanged": self.unchanged,
+            "updates": self.updates,
+        }
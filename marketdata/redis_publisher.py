@@ -0,0 +1,166 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+from . import config
+from .metrics import LatencyHistogram
+
+try:
+    import msgpack
+except ImportError:  # only needed for encoding="msgpack"
+    msgpack = None
+
+_PUBLISH = 0
+_XADD = 1
+_STOP = object()
+
+
+def encode(data, encoding="json"):
+    """
+    Payload bytes/str for ``data``: bytes pass through, protobuf messages
+    are serialized, and everything else is JSON (or msgpack) encoded.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    if hasattr(data, "SerializeToString"):
+        return data.SerializeToString()
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise ImportError("encoding='msgpack' requires msgpack: pip install msgpack")
+        return msgpack.packb(data, use_bin_type=True)
+    if encoding == "json":
+        return json.dumps(data)
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+
+class RedisPublisher:
+    """
+    Publishes to Redis from a background thread.
+
+    ``publish`` and ``xadd`` encode on the caller's thread (so later
+    mutation of the data, or reuse of a protobuf object, cannot leak into
+    the payload) and enqueue without blocking; when the queue is full the
+    message is dropped and counted. The worker sends messages in pipelines
+    of up to ``batch_size``, flushing a partial batch after
+    ``flush_interval`` seconds. Latency is measured from enqueue to the
+    pipeline round trip completing.
+    """
+
+    def __init__(self, redis_client=None, url=None, batch_size=None, flush_interval=None, queue_size=None,
+                 stream_maxlen=None):
+        if redis_client is None:
+            import redis
+
+            redis_client = redis.Redis.from_url(url or config.REDIS_URL)
+        self.redis_client = redis_client
+        self.batch_size = batch_size or config.REDIS_PUBLISH_BATCH_SIZE
+        self.flush_interval = config.REDIS_PUBLISH_INTERVAL if flush_interval is None else flush_interval
+        self.stream_maxlen = config.REDIS_STREAM_MAXLEN if stream_maxlen is None else stream_maxlen
+
+        self._queue = queue.Queue(maxsize=queue_size or config.REDIS_PUBLISH_QUEUE_SIZE)
+        self._thread = None
+        self._latency = LatencyHistogram()
+
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued and stop the worker."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def publish(self, channel, data, encoding="json"):
+        """Queue a PUBLISH. Returns False if the message was dropped."""
+        return self._enqueue((_PUBLISH, channel, encode(data, encoding), None, time.perf_counter()))
+
+    def xadd(self, stream, data, encoding="json", maxlen=None, field="data"):
+        """Queue an XADD of ``{field: payload}``, trimmed to roughly ``maxlen`` entries (0 disables trimming)."""
+        maxlen = self.stream_maxlen if maxlen is None else maxlen
+        return self._enqueue((_XADD, stream, {field: encode(data, encoding)}, maxlen, time.perf_counter()))
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return batch
+        deadline = time.perf_counter() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _send(self, batch):
+        pipe = self.redis_client.pipeline(transaction=False)
+        for kind, target, payload, maxlen, _ in batch:
+            if kind == _PUBLISH:
+                pipe.publish(target, payload)
+            else:
+                pipe.xadd(target, payload, maxlen=maxlen or None, approximate=True)
+        try:
+            pipe.execute()
+        except Exception as e:
+            self.failed += len(batch)
+            logging.error(f"Failed to publish {len(batch)} message(s) to Redis: {e}")
+            return
+        now = time.perf_counter()
+        for item in batch:
+            self._latency.record(now - item[4])
+        self.published += len(batch)
+        self.batches += 1
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            if batch:
+                self._send(batch)
+            if stopping:
+                return
+
+    def get_stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "published": self.published,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "latency": self._latency.snapshot(),
+        }
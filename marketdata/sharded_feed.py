@@ -0,0 +1,385 @@
+import hashlib
+import logging
+import multiprocessing
+import queue as queue_module
+import threading
+import time
+from bisect import bisect
+
+from .subscriptions import SubscriptionRegistry
+from .websocket_stream_handler import MarketDataWebSocketClient
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring; each node owns ``replicas`` virtual points."""
+
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._points = []
+        self._owners = []
+        self._nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        self._rebuild()
+
+    def remove(self, node):
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        self._rebuild()
+
+    def _rebuild(self):
+        points = sorted((_hash(f"{node}:{i}"), node) for node in self._nodes for i in range(self.replicas))
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key):
+        if not self._points:
+            return None
+        pos = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[pos]
+
+    @property
+    def nodes(self):
+        return set(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+# ----------------------------------------------------------------------
+# Shards
+# ----------------------------------------------------------------------
+class _ThreadShard:
+    """A websocket connection in this process; messages go to ``deliver``."""
+
+    def __init__(self, shard_id, access_token, ws_url, deliver):
+        self.shard_id = shard_id
+        self.messages = 0
+        self.client = MarketDataWebSocketClient(access_token, ws_url=ws_url)
+        self.client.set_on_message(self._on_message)
+        self._deliver = deliver
+
+    def _on_message(self, md_message):
+        self.messages += 1
+        self._deliver(md_message)
+
+    def start(self):
+        self.client.start()
+
+    def stop(self):
+        self.client.stop()
+
+    def subscribe(self, instrument_ids):
+        self.client.subscribe(instrument_ids)
+
+    def unsubscribe(self, instrument_ids):
+        self.client.unsubscribe(instrument_ids, force=True)
+
+    def set_access_token(self, access_token):
+        self.client.set_access_token(access_token)
+
+    def reset(self):
+        self.client.subscriptions.clear()
+
+    def add_frame_listener(self, listener):
+        self.client.add_frame_listener(listener)
+
+    def remove_frame_listener(self, listener):
+        self.client.remove_frame_listener(listener)
+
+    def alive(self, dead_after):
+        client = self.client
+        if not (client.thread and client.thread.is_alive()):
+            return False
+        down_since = client._disconnected_at
+        return down_since is None or time.monotonic() - down_since < dead_after
+
+    def restart(self):
+        if not (self.client.thread and self.client.thread.is_alive()):
+            self.client.reconnect = True
+            self.client.start()
+
+
+def _run_process_shard(access_token, ws_url, control, callback, output, messages, down_since):
+    """
+    Worker-process entry point: own a connection, decode locally, deliver to
+    callback/output. ``down_since`` is set to the wall-clock time the
+    connection dropped (0 while connected) for the parent's health check.
+    """
+    def on_message(md_message):
+        with messages.get_lock():
+            messages.value += 1
+        if callback is not None:
+            callback(md_message)
+        if output is not None:
+            # The generated message classes are not picklable; ship the wire payload.
+            output.put(md_message.SerializeToString())
+
+    client = MarketDataWebSocketClient(access_token, ws_url=ws_url)
+    client.set_on_message(on_message)
+    client.start()
+    while True:
+        disconnected_at = client._disconnected_at
+        down_since.value = time.time() - (time.monotonic() - disconnected_at) if disconnected_at else 0.0
+        try:
+            command, argument = control.get(timeout=0.5)
+        except queue_module.Empty:
+            continue
+        if command == "token":
+            client.set_access_token(argument)
+        elif command == "subscribe":
+            client.subscribe(argument)
+        elif command == "unsubscribe":
+            client.unsubscribe(argument, force=True)
+        elif command == "stop":
+            client.stop()
+            return
+
+
+class _ProcessShard:
+    """A websocket connection owned by a worker process, which also decodes and runs the callback."""
+
+    def __init__(self, shard_id, access_token, ws_url, callback, output):
+        self.shard_id = shard_id
+        self._args = (access_token, ws_url)
+        self._callback = callback
+        self._output = output
+        self._messages = multiprocessing.Value("Q", 0)
+        self._down_since = multiprocessing.Value("d", 0.0)
+        self._process = None
+        self._control = None
+
+    @property
+    def messages(self):
+        return self._messages.value
+
+    def start(self):
+        self._control = multiprocessing.Queue()
+        self._down_since.value = 0.0
+        self._process = multiprocessing.Process(
+            target=_run_process_shard,
+            args=self._args + (self._control, self._callback, self._output, self._messages, self._down_since),
+            daemon=True,
+        )
+        self._process.start()
+
+    def stop(self, timeout=5):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._control.put(("stop", None))
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+
+    def subscribe(self, instrument_ids):
+        self._control.put(("subscribe", list(instrument_ids)))
+
+    def unsubscribe(self, instrument_ids):
+        self._control.put(("unsubscribe", list(instrument_ids)))
+
+    def set_access_token(self, access_token):
+        # For the next worker started, and for the running worker's next reconnect.
+        self._args = (access_token, self._args[1])
+        if self._process is not None and self._process.is_alive():
+            self._control.put(("token", access_token))
+
+    def reset(self):
+        pass  # a replacement process starts with no subscriptions
+
+    def alive(self, dead_after):
+        if self._process is None or not self._process.is_alive():
+            return False
+        down_since = self._down_since.value
+        return not down_since or time.time() - down_since < dead_after
+
+    def restart(self):
+        # A worker that stayed disconnected is replaced as well as one that exited.
+        self.stop()
+        self.start()
+
+
+# ----------------------------------------------------------------------
+# Feed
+# ----------------------------------------------------------------------
+class ShardedFeed:
+    """
+    Spreads subscriptions over ``shards`` websocket connections.
+
+    Instruments are placed on a consistent-hash ring, so adding or losing a
+    shard moves only that shard's share. A monitor thread takes shards that
+    died (process exited, or disconnected longer than ``dead_after``
+    seconds) out of the ring, moves their instruments to the survivors and
+    puts them back once they are running again.
+
+    In thread mode every shard decodes on its own reader thread and calls
+    ``callback`` under one lock, so the callback sees a single merged
+    stream. With ``use_processes`` each shard runs in a worker process that
+    decodes and calls ``callback`` there (it must be picklable), and/or puts
+    protobuf payloads on ``output`` (a multiprocessing.Queue; decode them
+    with wire.parse_payload); this is the mode that scales decode across
+    cores.
+    """
+
+    def __init__(self, access_token, shards=4, callback=None, output=None, use_processes=False, ws_url=None,
+                 dead_after=10.0, check_interval=1.0, replicas=64):
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        self.callback = callback
+        self.output = output
+        self.use_processes = use_processes
+        self.dead_after = dead_after
+        self.check_interval = check_interval
+
+        if use_processes:
+            self._shards = [_ProcessShard(i, access_token, ws_url, callback, output) for i in range(shards)]
+        else:
+            self._shards = [_ThreadShard(i, access_token, ws_url, self._deliver) for i in range(shards)]
+        self._ring = HashRing(range(shards), replicas=replicas)
+        self._registry = SubscriptionRegistry()
+        self._assigned = {shard.shard_id: set() for shard in self._shards}
+        self._lock = threading.RLock()
+        self._deliver_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._monitor = None
+        self._started = False
+        self.rebalances = 0
+
+    def _deliver(self, md_message):
+        with self._deliver_lock:
+            if self.callback is not None:
+                self.callback(md_message)
+            if self.output is not None:
+                try:
+                    self.output.put_nowait(md_message)
+                except queue_module.Full:
+                    logging.warning("Sharded feed output queue full; dropping message")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        for shard in self._shards:
+            shard.start()
+        self._started = True
+        self._stop_event.clear()
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+        self._rebalance()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._monitor:
+            self._monitor.join(self.check_interval + 1)
+            self._monitor = None
+        for shard in self._shards:
+            shard.stop()
+            self._assigned[shard.shard_id] = set()
+        self._started = False
+
+    def set_access_token(self, access_token):
+        """Token for every shard's next (re)connect."""
+        for shard in self._shards:
+            shard.set_access_token(access_token)
+
+    def add_frame_listener(self, listener):
+        """Call ``listener(frame)`` with every raw frame of every shard (thread mode only)."""
+        if self.use_processes:
+            raise ValueError("Raw frames stay in the shard processes; frame listeners need thread mode")
+        for shard in self._shards:
+            shard.add_frame_listener(listener)
+
+    def remove_frame_listener(self, listener):
+        if not self.use_processes:
+            for shard in self._shards:
+                shard.remove_frame_listener(listener)
+
+    def _watch(self):
+        while not self._stop_event.wait(self.check_interval):
+            changed = False
+            for shard in self._shards:
+                alive = shard.alive(self.dead_after)
+                in_ring = shard.shard_id in self._ring.nodes
+                if in_ring and not alive:
+                    logging.warning(f"Shard {shard.shard_id} is down; moving its instruments")
+                    with self._lock:
+                        self._ring.remove(shard.shard_id)
+                        self._assigned[shard.shard_id] = set()
+                        shard.reset()
+                    shard.restart()
+                    changed = True
+                elif not in_ring and alive:
+                    logging.info(f"Shard {shard.shard_id} is back; rebalancing")
+                    with self._lock:
+                        self._ring.add(shard.shard_id)
+                    changed = True
+                elif not alive:
+                    shard.restart()
+            if changed:
+                self._rebalance()
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def subscribe(self, instrument_ids):
+        """Subscriptions made before start() are sent when the shards start."""
+        if self._registry.add(instrument_ids) and self._started:
+            self._rebalance()
+
+    def unsubscribe(self, instrument_ids, force=False):
+        if self._registry.remove(instrument_ids, force=force) and self._started:
+            self._rebalance()
+
+    def active(self):
+        return self._registry.active()
+
+    def shard_for(self, instrument_id):
+        return self._ring.node_for(instrument_id)
+
+    def _rebalance(self):
+        """Diff the ring's placement of every active instrument against what each shard holds."""
+        with self._lock:
+            desired = {shard.shard_id: set() for shard in self._shards}
+            for instrument_id in self._registry.active():
+                shard_id = self._ring.node_for(instrument_id)
+                if shard_id is not None:
+                    desired[shard_id].add(instrument_id)
+
+            for shard in self._shards:
+                current = self._assigned[shard.shard_id]
+                target = desired[shard.shard_id]
+                removed = sorted(current - target)
+                added = sorted(target - current)
+                if removed:
+                    shard.unsubscribe(removed)
+                if added:
+                    shard.subscribe(added)
+                self._assigned[shard.shard_id] = target
+            self.rebalances += 1
+
+    def get_stats(self):
+        return {
+            "instruments": len(self._registry),
+            "rebalances": self.rebalances,
+            "shards": [
+                {
+                    "shard": shard.shard_id,
+                    "alive": shard.alive(self.dead_after),
+                    "in_ring": shard.shard_id in self._ring.nodes,
+                    "instruments": len(self._assigned[shard.shard_id]),
+                    "messages": shard.messages,
+                }
+                for shard in self._shards
+            ],
+        }
@@ -0,0 +1,255 @@
+"""
+Host-wide last-value table in shared memory.
+
+One feeder process owns the websocket and writes every update into a
+fixed-layout table; any number of strategy processes attach and read it:
+
+    # feeder
+    client = MarketDataClient(app_key, user_id)
+    client.enable_shared_state()
+    client.connect_ws()
+    client.subscribe_market_data([...])
+
+    # strategy process
+    table = SharedStateReader()
+    table.ltp("NSECM|RELIANCE")
+"""
+import logging
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from . import config
+from .instrument import get_instruments, resolve_instruments
+
+_MAGIC = b"MDLVT1\0\0"
+# magic, slot count, slot size, writer pid
+_HEADER = struct.Struct("<8sQQQ")
+_HEADER_SIZE = 64
+
+# One slot per instrument-index row. ``seq`` is a seqlock counter: odd while
+# the writer is mid-update, bumped twice per update.
+FIELDS = (
+    ("seq", "Q"),
+    ("InstrumentID", "Q"),
+    ("UpdatedNs", "q"),
+    ("TimeStamp", "q"),
+    ("LTP", "d"),
+    ("LTQ", "q"),
+    ("LTT", "q"),
+    ("ATP", "d"),
+    ("VTT", "q"),
+    ("TBQ", "q"),
+    ("TSQ", "q"),
+    ("Open", "d"),
+    ("High", "d"),
+    ("Low", "d"),
+    ("Close", "d"),
+    ("OI", "q"),
+    ("BidPrice", "d"),
+    ("BidQty", "q"),
+    ("AskPrice", "d"),
+    ("AskQty", "q"),
+)
+_SLOT = struct.Struct("<" + "".join(code for _, code in FIELDS))
+SLOT_SIZE = _SLOT.size
+_OFFSETS = {name: i * 8 for i, (name, _) in enumerate(FIELDS)}
+_FIELD_NAMES = tuple(name for name, _ in FIELDS[1:])
+
+_SEQ = struct.Struct("<Q")
+_STAMP = struct.Struct("<Qq")             # InstrumentID, UpdatedNs
+_TICK = struct.Struct("<dqq")             # LTP, LTQ, LTT
+_TOUCHLINE = struct.Struct("<qdqqdqqqddddqdqdq")  # TimeStamp .. AskQty
+_INDEX_OHLC = struct.Struct("<dddd")      # Open, High, Low, Close
+_LTP = struct.Struct("<d")
+_TIMESTAMP = struct.Struct("<q")
+
+_SPINS = 16  # busy retries before a reader starts yielding
+
+_TICK_SUBTYPES = ("TickData", "TickDataMessage")
+_TOUCHLINE_SUBTYPES = ("TouchLineDataMessage", "MarketDepthMessage")
+
+
+def _table_size(slots):
+    return _HEADER_SIZE + slots * SLOT_SIZE
+
+
+def _attach(name):
+    """Attach to an existing segment without registering it with this process's resource tracker."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class SharedStateWriter:
+    """
+    Feeder side of the table: creates the segment and applies decoded
+    messages to it. Register ``update`` as a MarketDataClient listener.
+    """
+
+    def __init__(self, name=None, index=None):
+        self.name = name or config.SHARED_STATE_NAME
+        self.index = index if index is not None else get_instruments()
+        self.slots = len(self.index)
+        size = _table_size(self.slots)
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a feeder that did not shut down cleanly.
+            logging.warning(f"Replacing stale shared state segment {self.name}")
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self._buffer = self._shm.buf
+        self._buffer[:size] = bytes(size)
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, self.slots, SLOT_SIZE, os.getpid())
+
+        self.updates = 0
+        self.unindexed = 0
+
+    def _begin(self, instrument_id):
+        row = self.index.row_of(instrument_id)
+        if row < 0:
+            self.unindexed += 1
+            return -1
+        base = _HEADER_SIZE + row * SLOT_SIZE
+        buffer = self._buffer
+        _SEQ.pack_into(buffer, base, _SEQ.unpack_from(buffer, base)[0] + 1)
+        _STAMP.pack_into(buffer, base + 8, instrument_id, time.time_ns())
+        return base
+
+    def _end(self, base):
+        buffer = self._buffer
+        _SEQ.pack_into(buffer, base, _SEQ.unpack_from(buffer, base)[0] + 1)
+        self.updates += 1
+
+    def update(self, md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype in _TICK_SUBTYPES:
+            body = getattr(md_message, subtype)
+            base = self._begin(body.InstrumentID)
+            if base < 0:
+                return
+            _TICK.pack_into(self._buffer, base + _OFFSETS["LTP"], body.LTP, body.LTQ, body.LTT)
+            if subtype == "TickDataMessage":
+                _TIMESTAMP.pack_into(self._buffer, base + _OFFSETS["TimeStamp"], body.TimeStamp)
+            self._end(base)
+        elif subtype in _TOUCHLINE_SUBTYPES:
+            body = getattr(md_message, subtype)
+            base = self._begin(body.InstrumentID)
+            if base < 0:
+                return
+            bid = body.BestBidLevel[0] if body.BestBidLevel else None
+            ask = body.BestAskLevel[0] if body.BestAskLevel else None
+            _TOUCHLINE.pack_into(
+                self._buffer, base + _OFFSETS["TimeStamp"],
+                body.TimeStamp, body.LTP, body.LTQ, body.LTT, body.ATP, body.VTT, body.TBQ, body.TSQ,
+                body.Open, body.High, body.Low, body.Close, body.OI,
+                bid.Price if bid else 0.0, bid.Qty if bid else 0,
+                ask.Price if ask else 0.0, ask.Qty if ask else 0,
+            )
+            self._end(base)
+        elif subtype == "IndexDataMessage":
+            self._update_index(md_message.IndexDataMessage.IndexData)
+        elif subtype == "IndexDataListMessage":
+            for index_data in md_message.IndexDataListMessage.IndexDataList:
+                self._update_index(index_data)
+
+    def _update_index(self, index_data):
+        base = self._begin(index_data.InstrumentID)
+        if base < 0:
+            return
+        buffer = self._buffer
+        _TIMESTAMP.pack_into(buffer, base + _OFFSETS["TimeStamp"], index_data.TimeStamp)
+        _LTP.pack_into(buffer, base + _OFFSETS["LTP"], index_data.Last)
+        _INDEX_OHLC.pack_into(buffer, base + _OFFSETS["Open"],
+                              index_data.Open, index_data.High, index_data.Low, index_data.Close)
+        self._end(base)
+
+    def close(self, unlink=True):
+        if self._shm is None:
+            return
+        self._buffer.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+    def get_stats(self):
+        return {"slots": self.slots, "updates": self.updates, "unindexed": self.unindexed}
+
+
+class SharedStateReader:
+    """
+    Read-only view of a table created by SharedStateWriter.
+
+    Reads are lock-free: a slot is copied and accepted only if its sequence
+    counter was even and unchanged across the copy, otherwise the copy is
+    retried. Instruments are located through the same instrument index the
+    feeder uses, so both sides must share the instrument cache.
+    """
+
+    def __init__(self, name=None, index=None, retries=10000):
+        self.name = name or config.SHARED_STATE_NAME
+        self.index = index if index is not None else get_instruments()
+        self.retries = retries
+        self._shm = _attach(self.name)
+        self._buffer = self._shm.buf.toreadonly()
+        magic, self.slots, slot_size, self.writer_pid = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or slot_size != SLOT_SIZE:
+            self.close()
+            raise ValueError(f"{self.name} is not a compatible shared state table")
+        if self.slots != len(self.index):
+            logging.warning(f"Shared state has {self.slots} slots but the local instrument index has "
+                            f"{len(self.index)}; is the instrument cache out of date?")
+
+    def _base(self, instrument):
+        if not isinstance(instrument, int):
+            instrument = resolve_instruments([instrument]).ids[0]
+        row = self.index.row_of(instrument)
+        if row < 0 or row >= self.slots:
+            return -1, instrument
+        return _HEADER_SIZE + row * SLOT_SIZE, instrument
+
+    def _read(self, base):
+        buffer = self._buffer
+        for attempt in range(self.retries):
+            values = _SLOT.unpack_from(buffer, base)
+            seq = values[0]
+            if not seq & 1 and _SEQ.unpack_from(buffer, base)[0] == seq:
+                return values
+            if attempt >= _SPINS:
+                time.sleep(0)  # the writer may be descheduled mid-update; let it run
+        raise TimeoutError(f"Shared state slot at offset {base} kept changing during read")
+
+    def get(self, instrument):
+        """Latest values for an instrument as a dict, or None if it has not been written."""
+        base, instrument_id = self._base(instrument)
+        if base < 0:
+            return None
+        values = self._read(base)
+        if values[1] != instrument_id:
+            return None
+        return dict(zip(_FIELD_NAMES, values[1:]))
+
+    def get_many(self, instruments):
+        return {instrument: self.get(instrument) for instrument in instruments}
+
+    def ltp(self, instrument):
+        values = self.get(instrument)
+        return values["LTP"] if values else None
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._buffer.release()
+        self._shm.close()
+        self._shm = None
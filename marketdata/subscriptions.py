@@ -0,0 +1,72 @@
+import threading
+
+from . import config
+
+
+def chunked(items, size):
+    """Split ``items`` into lists of at most ``size``."""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class SubscriptionRegistry:
+    """
+    Reference-counted set of subscribed instrumentIds.
+
+    ``add`` and ``remove`` return only the ids whose state actually changed,
+    so repeated subscribes are not re-sent and an instrument stays
+    subscribed until every subscriber has released it. ``active`` lists
+    everything that must be replayed after a reconnect, in subscription
+    order.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or config.WS_SUBSCRIBE_CHUNK
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, instrument_ids):
+        added = []
+        with self._lock:
+            for instrument_id in instrument_ids:
+                count = self._counts.get(instrument_id, 0)
+                self._counts[instrument_id] = count + 1
+                if count == 0:
+                    added.append(instrument_id)
+        return added
+
+    def remove(self, instrument_ids, force=False):
+        """Release ids; with ``force`` drop them regardless of their reference count."""
+        removed = []
+        with self._lock:
+            for instrument_id in instrument_ids:
+                count = self._counts.get(instrument_id)
+                if count is None:
+                    continue
+                if force or count <= 1:
+                    del self._counts[instrument_id]
+                    removed.append(instrument_id)
+                else:
+                    self._counts[instrument_id] = count - 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def active(self):
+        with self._lock:
+            return list(self._counts)
+
+    def refcount(self, instrument_id):
+        return self._counts.get(instrument_id, 0)
+
+    def chunks(self, instrument_ids=None):
+        """``instrument_ids`` (default: every active id) split into subscribe-frame sized lists."""
+        return chunked(self.active() if instrument_ids is None else instrument_ids, self.chunk_size)
+
+    def __contains__(self, instrument_id):
+        return instrument_id in self._counts
+
+    def __len__(self):
+        return len(self._counts)
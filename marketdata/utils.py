@@ -6,3 +6,57 @@ def json_response(response):
         return response.json()
     except json.JSONDecodeError:
         return {"error": "Failed to decode JSON"}
+
+
+INSTRUMENT_ID_KEYS = ("instrumentId", "InstrumentId", "InstrumentID", "instrument_id")
+_CONTAINER_KEYS = ("data", "Data", "result", "Result", "response")
+
+
+def instrument_id_of_item(item):
+    """Return the instrumentId of a REST record, or None."""
+    if not isinstance(item, dict):
+        return None
+    for key in INSTRUMENT_ID_KEYS:
+        value = item.get(key)
+        if value not in (None, ""):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _is_item_list(value):
+    return isinstance(value, list) and bool(value) and instrument_id_of_item(value[0]) is not None
+
+
+def find_instrument_items(payload):
+    """
+    Locate the per-instrument records in a /marketfeed response.
+
+    Returns ``(path, items)`` where ``path`` is the tuple of keys leading to
+    the list of records, or ``(None, None)`` if the shape is not recognised.
+    """
+    if _is_item_list(payload):
+        return (), payload
+    if not isinstance(payload, dict):
+        return None, None
+    keys = [k for k in _CONTAINER_KEYS if k in payload] + [k for k in payload if k not in _CONTAINER_KEYS]
+    for key in keys:
+        value = payload[key]
+        if _is_item_list(value):
+            return (key,), value
+        if isinstance(value, dict):
+            for inner_key, inner in value.items():
+                if _is_item_list(inner):
+                    return (key, inner_key), inner
+    return None, None
+
+
+def replace_instrument_items(payload, path, items):
+    """Copy ``payload`` with the record list at ``path`` replaced by ``items``."""
+    if not path:
+        return items
+    result = dict(payload)
+    result[path[0]] = replace_instrument_items(payload[path[0]], path[1:], items)
+    return result
@@ -1,18 +1,21 @@
 import websocket
 import threading
-import base64
 import time
 import json
 import logging
+import random
+from . import config
 from .config import Web_Base_URL
-from .proto import marketdata_pb2
-
-logging.basicConfig(level=logging.INFO)
+from .dispatch import BLOCK, FrameDispatcher
+from .metrics import LatencyHistogram, StreamStats, start_metrics_server
+from .subscriptions import SubscriptionRegistry
+from .wire import FastDecoder, flatten, frame_payload, parse_payload
 
 class MarketDataWebSocketClient:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, ws_url=None):
         self.access_token = access_token
-        self.web_base_url = f"{Web_Base_URL}{self.access_token}"
+        self.ws_url = ws_url or Web_Base_URL
+        self.web_base_url = f"{self.ws_url}{self.access_token}"
 
         self.ws = None
         self.thread = None
@@ -27,6 +30,29 @@ class MarketDataWebSocketClient:
         self.on_connect_callback = None
         self.on_close_callback = None
 
+        self._dispatcher = None
+        self._recorder = None
+        self._frame_listeners = ()
+        self._stats = None
+        self._metrics_server = None
+        self._decoder = None
+        self._flat = False
+
+        self.subscriptions = SubscriptionRegistry()
+        self._stop_event = threading.Event()
+        self._opened = False
+        self._disconnected_at = None
+        self._last_message_at = None
+        self._gap_started_at = None
+        self.reconnects = 0
+        self.reconnect_latency = LatencyHistogram()  # disconnect -> connection re-established
+        self.data_gap = LatencyHistogram()           # last message before disconnect -> first after
+
+    def set_access_token(self, access_token):
+        """Use a new token from the next (re)connect on; an open connection is left as is."""
+        self.access_token = access_token
+        self.web_base_url = f"{self.ws_url}{access_token}"
+
     def set_on_message(self, callback):
         self.on_message_callback = callback
 
@@ -38,21 +64,187 @@ class MarketDataWebSocketClient:
 
     def on_open(self, ws):
         self.connected = True   #  mark connected
+        self._opened = True
+        if self._disconnected_at is not None:
+            self.reconnects += 1
+            self.reconnect_latency.record(time.monotonic() - self._disconnected_at)
+            self._disconnected_at = None
+        logging.info("WebSocket connection established.")
+        self._replay_subscriptions()
         if self.on_connect_callback:
             self.on_connect_callback()
-        logging.info("WebSocket connection established.")
+
+    def _replay_subscriptions(self):
+        active = self.subscriptions.active()
+        if not active:
+            return
+        for chunk in self.subscriptions.chunks(active):
+            self.ws.send(json.dumps({"action": "subscribe", "instrumentIds": chunk}))
+        logging.info(f"Replayed {len(active)} subscription(s)")
+
+    def enable_dispatch(self, workers=1, queue_size=10000, overflow=BLOCK, ordered=True, use_processes=False,
+                        callback=None):
+        """
+        Decode and deliver messages on a worker pool instead of the reader thread.
+
+        ``overflow`` is one of "block", "drop_oldest" or "conflate". With
+        ``use_processes`` the callback (default: the current on_message
+        callback) is sent to each worker process, so it must be a picklable,
+        module-level function; ValueError otherwise.
+        """
+        self.disable_dispatch()
+        if use_processes:
+            callback = callback or self.on_message_callback
+        else:
+            callback = self._deliver
+        self._dispatcher = FrameDispatcher(
+            callback,
+            workers=workers,
+            queue_size=queue_size,
+            overflow=overflow,
+            ordered=ordered,
+            use_processes=use_processes,
+        )
+        self._dispatcher.stats = self._stats
+        self._dispatcher.start()
+        return self._dispatcher
+
+    def disable_dispatch(self):
+        if self._dispatcher:
+            self._dispatcher.stop()
+            self._dispatcher = None
+
+    def get_dispatch_stats(self):
+        """Queue depth, drop/conflation counters and worker error counts, or None when dispatch is off."""
+        return self._dispatcher.get_stats() if self._dispatcher else None
+
+    def set_recorder(self, recorder):
+        """Hand every raw frame to ``recorder.record(frame)`` before decoding (None to stop)."""
+        self._recorder = recorder
+
+    def add_frame_listener(self, listener):
+        """Call ``listener(frame)`` with every raw frame, before filtering and decoding."""
+        # Copy-on-write so the reader thread can iterate without a lock.
+        self._frame_listeners = self._frame_listeners + (listener,)
+
+    def remove_frame_listener(self, listener):
+        self._frame_listeners = tuple(l for l in self._frame_listeners if l != listener)
+
+    def enable_fast_decode(self, instrument_ids=None, subtypes=None, flat=False, reuse=False):
+        """
+        Decode through a wire.FastDecoder: frames for instruments or subtypes
+        outside the filters are dropped before parsing (also ahead of
+        dispatch). With ``reuse=True`` one message object is reused, so
+        callbacks must copy anything they keep. With ``flat`` the callback receives TickTuple /
+        TouchLineTuple for TickData and TouchLineDataMessage.
+        """
+        self._decoder = FastDecoder(instrument_ids, subtypes, reuse=reuse)
+        self._flat = flat
+        return self._decoder
+
+    def disable_fast_decode(self):
+        self._decoder = None
+        self._flat = False
+
+    def enable_stats(self, prometheus_port=None, prometheus_addr="127.0.0.1"):
+        """
+        Start collecting StreamStats, optionally serving them for Prometheus
+        at ``http://prometheus_addr:prometheus_port/metrics``. With dispatch
+        enabled, worker threads record the decode (including time queued),
+        callback and end-to-end latencies; worker processes only add to the
+        dispatcher's counters, so only receive counters are collected then.
+        """
+        if self._stats is None:
+            self._stats = StreamStats()
+        if self._dispatcher is not None:
+            self._dispatcher.stats = self._stats
+        if prometheus_port is not None and self._metrics_server is None:
+            self._metrics_server = start_metrics_server(self._stats, prometheus_port, prometheus_addr)
+        return self._stats
+
+    def disable_stats(self):
+        self._stats = None
+        if self._dispatcher is not None:
+            self._dispatcher.stats = None
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server.server_close()
+            self._metrics_server = None
+
+    def get_stats(self):
+        """StreamStats snapshot, or None when stats are disabled."""
+        return self._stats.get_stats() if self._stats else None
+
+    def _deliver(self, md_message):
+        if self.on_message_callback:
+            self.on_message_callback(flatten(md_message) if self._flat else md_message)
 
     def on_message(self, ws, message):
+        now = time.monotonic()
+        if self._gap_started_at is not None:
+            self.data_gap.record(now - self._gap_started_at)
+            self._gap_started_at = None
+        self._last_message_at = now
+
+        stats = self._stats
+        if stats is not None:
+            recv_wall_ns = time.time_ns()
+            recv_ns = time.perf_counter_ns()
+            stats.received(len(message))
+
+        if self._recorder:
+            self._recorder.record(message)
+        for listener in self._frame_listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logging.error(f"Frame listener failed: {e}")
+
+        decoder = self._decoder
+        if self._dispatcher:
+            if decoder is not None:
+                message = self._select(decoder, message)
+                if message is None:
+                    return
+            if stats is not None:
+                self._dispatcher.submit(message, recv_wall_ns, recv_ns)
+            else:
+                self._dispatcher.submit(message)
+            return
+
         try:
-            decoded = base64.b64decode(message)
-            md_message = marketdata_pb2.MarketDataMessageBase()
-            md_message.ParseFromString(decoded)
+            if decoder is not None:
+                md_message = decoder.decode(message)
+                if md_message is None:
+                    return
+            else:
+                md_message = parse_payload(frame_payload(message))
+        except Exception as e:
+            if stats is not None:
+                stats.parse_errors += 1
+            logging.error(f"Failed to parse WebSocket message: {e}")
+            return
 
-            if self.on_message_callback:
-                self.on_message_callback(md_message)
+        if stats is not None:
+            decoded_ns = time.perf_counter_ns()
+        if self.on_message_callback:
+            try:
+                self.on_message_callback(flatten(md_message) if self._flat else md_message)
+            except Exception as e:
+                if stats is not None:
+                    stats.callback_errors += 1
+                logging.error(f"Message callback raised: {e}")
+        if stats is not None:
+            stats.record(md_message, recv_wall_ns, recv_ns, decoded_ns, time.perf_counter_ns())
 
+    def _select(self, decoder, message):
+        try:
+            return decoder.select(message)
         except Exception as e:
+            if self._stats is not None:
+                self._stats.parse_errors += 1
             logging.error(f"Failed to parse WebSocket message: {e}")
+            return None
 
     def on_error(self, ws, error):
         self.connected = False   #  mark disconnected
@@ -65,10 +257,46 @@ class MarketDataWebSocketClient:
         if self.on_close_callback:
             self.on_close_callback(close_status_code, close_msg)
 
-        if self.reconnect:
-            logging.info("Reconnecting in 5 seconds...")
-            time.sleep(5)
-            self.start()
+    def _run(self):
+        """Connection loop: reconnects with jittered exponential backoff until stop()."""
+        delay = config.WS_RECONNECT_INITIAL
+        while True:
+            self.ws = websocket.WebSocketApp(
+                self.web_base_url,
+                on_open=self.on_open,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close
+            )
+            self._opened = False
+            # The timeout only bounds the reader's select() so a close() from
+            # stop() is noticed; pings are still sent by _send_heartbeat.
+            self.ws.run_forever(ping_timeout=1)
+            self.connected = False
+
+            if not self.reconnect or self._stop_event.is_set():
+                return
+            if self._disconnected_at is None:
+                self._disconnected_at = time.monotonic()
+                if self._last_message_at is not None:
+                    self._gap_started_at = self._last_message_at
+            if self._opened:
+                delay = config.WS_RECONNECT_INITIAL
+
+            wait = random.uniform(delay / 2, delay)
+            logging.info(f"Reconnecting in {wait:.2f} seconds...")
+            if self._stop_event.wait(wait):
+                return
+            delay = min(delay * 2, config.WS_RECONNECT_MAX)
+
+    def get_reconnect_stats(self):
+        """Reconnect count plus reconnect-duration and data-gap percentiles (seconds)."""
+        return {
+            "reconnects": self.reconnects,
+            "subscriptions": len(self.subscriptions),
+            "reconnect_latency": self.reconnect_latency.snapshot(),
+            "data_gap": self.data_gap.snapshot(),
+        }
 
     def _is_connected(self):
         
@@ -88,38 +316,33 @@ class MarketDataWebSocketClient:
             time.sleep(self.ping_interval)
 
     def _send_subscription_message(self, action, instrument_ids):
-        msg = {"action": action, "instrumentIds": instrument_ids}
-
-        if self._is_connected():
-            self.ws.send(json.dumps(msg))
-            logging.info(f"{action.capitalize()} message sent: {msg}")
-        else:
-            logging.error("WebSocket is not connected. Cannot send subscription.")
+        if not instrument_ids:
+            return
+        if not self._is_connected():
+            logging.info(f"WebSocket is not connected; {action} of {len(instrument_ids)} instrument(s) "
+                         "will be applied on connect.")
+            return
+        for chunk in self.subscriptions.chunks(instrument_ids):
+            self.ws.send(json.dumps({"action": action, "instrumentIds": chunk}))
+        logging.info(f"{action.capitalize()} message sent for {len(instrument_ids)} instrument(s)")
 
     def subscribe(self, instrument_ids):
-        self._send_subscription_message("subscribe", instrument_ids)
+        """Subscribe, sending only ids that were not already active; remembered for reconnects."""
+        self._send_subscription_message("subscribe", self.subscriptions.add(instrument_ids))
 
-    def unsubscribe(self, instrument_ids):
-        self._send_subscription_message("unsubscribe", instrument_ids)
+    def unsubscribe(self, instrument_ids, force=False):
+        """Release ids; they are unsubscribed once no subscriber holds them (or at once with ``force``)."""
+        self._send_subscription_message("unsubscribe", self.subscriptions.remove(instrument_ids, force=force))
 
     def start(self):
-        if self._is_connected():
+        if self._is_connected() or (self.thread and self.thread.is_alive()):
             logging.info("WebSocket already running.")
             return
 
-        self.ws = websocket.WebSocketApp(
-            self.web_base_url,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close
-        )
-
-        #  Ensure only one thread
-        if not self.thread or not self.thread.is_alive():
-            self.thread = threading.Thread(target=self.ws.run_forever)
-            self.thread.daemon = False
-            self.thread.start()
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = False
+        self.thread.start()
 
         #  Heartbeat starts once only
         if not self._heartbeat_thread or not self._heartbeat_thread.is_alive():
@@ -130,9 +353,11 @@ class MarketDataWebSocketClient:
     def stop(self):
         self.reconnect = False
         self.connected = False
+        self._stop_event.set()
         if self.ws:
             try:
                 self.ws.close()
             except:
                 pass
+        self.disable_dispatch()
         logging.info("WebSocket client stopped.")
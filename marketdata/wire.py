@@ -0,0 +1,315 @@
+"""
+Protobuf wire-format helpers for looking inside a MarketDataMessageBase
+frame without building message objects.
+"""
+import re
+from binascii import a2b_base64
+from collections import namedtuple
+from operator import attrgetter
+
+from .proto import marketdata_pb2
+
+# MarketDataMessageBase oneof field numbers -> subtype names.
+SUBTYPE_FIELDS = {
+    500: "TickDataMessage",
+    501: "TouchLineDataMessage",
+    502: "MarketDepthMessage",
+    503: "IndexDataMessage",
+    504: "IndexDataListMessage",
+    505: "IncrementalUpdateMessage",
+    506: "TickData",
+}
+SUBTYPE_NUMBERS = {name: number for number, name in SUBTYPE_FIELDS.items()}
+
+# Path of field numbers from the subtype body down to its InstrumentID.
+# Index lists and incremental updates carry many instruments and have no
+# single id.
+_INSTRUMENT_PATHS = {
+    500: (10,),
+    501: (10,),
+    502: (10,),
+    503: (1, 10),
+    506: (1,),
+}
+
+_MESSAGE_CODE_FIELD = 1
+
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip(buf, pos, wire_type):
+    if wire_type == 0:
+        while buf[pos] & 0x80:
+            pos += 1
+        return pos + 1
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = _read_varint(buf, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported wire type {wire_type}")
+
+
+def _find_field(buf, start, end, field_number):
+    """Return the value (varint) or (start, end) span (length-delimited) of the first matching field."""
+    pos = start
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        number, wire_type = key >> 3, key & 7
+        if number == field_number:
+            if wire_type == 0:
+                return _read_varint(buf, pos)[0]
+            if wire_type == 2:
+                length, pos = _read_varint(buf, pos)
+                return pos, pos + length
+            return None
+        pos = _skip(buf, pos, wire_type)
+    return None
+
+
+def peek(payload):
+    """
+    Return ``(message_code, subtype_field, instrument_id)`` for a decoded frame.
+
+    Only the tags on the path to each value are read, so this is far cheaper
+    than ``ParseFromString``. Missing values come back as 0.
+    """
+    buf = memoryview(payload)
+    end = len(buf)
+    pos = 0
+    message_code = 0
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        number, wire_type = key >> 3, key & 7
+        if number == _MESSAGE_CODE_FIELD and wire_type == 0:
+            message_code, pos = _read_varint(buf, pos)
+            continue
+        if number in SUBTYPE_FIELDS and wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            return message_code, number, _instrument_id(buf, pos, pos + length, number)
+        pos = _skip(buf, pos, wire_type)
+    return message_code, 0, 0
+
+
+def _instrument_id(buf, start, end, subtype_field):
+    path = _INSTRUMENT_PATHS.get(subtype_field)
+    if not path:
+        return 0
+    for field_number in path[:-1]:
+        span = _find_field(buf, start, end, field_number)
+        if not isinstance(span, tuple):
+            return 0
+        start, end = span
+    value = _find_field(buf, start, end, path[-1])
+    return value if isinstance(value, int) else 0
+
+
+def frame_payload(frame):
+    """Protobuf payload of a websocket frame: text frames are base64, binary frames are the payload itself."""
+    if isinstance(frame, str):
+        return a2b_base64(frame)
+    return frame
+
+
+def parse_payload(payload):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.ParseFromString(payload)
+    return md_message
+
+
+def instrument_id_of(md_message, subtype=None):
+    """InstrumentID carried by a decoded message, or 0 for multi-instrument subtypes."""
+    subtype = subtype or md_message.WhichOneof("subtype")
+    if subtype is None or subtype in ("IndexDataListMessage", "IncrementalUpdateMessage"):
+        return 0
+    body = getattr(md_message, subtype)
+    if subtype == "IndexDataMessage":
+        return body.IndexData.InstrumentID
+    return body.InstrumentID
+
+
+# ----------------------------------------------------------------------
+# Fast decode path
+# ----------------------------------------------------------------------
+TickTuple = namedtuple("TickTuple", ["InstrumentID", "ExchangeSegment", "LTP", "LTQ", "LTT"])
+TouchLineTuple = namedtuple("TouchLineTuple", [
+    "InstrumentID", "ExchangeSegment", "TimeStamp", "LTP", "LTQ", "LTT", "ATP", "VTT", "TBQ", "TSQ",
+    "Open", "High", "Low", "Close", "OI", "BidPrice", "BidQty", "AskPrice", "AskQty",
+])
+_new_tuple = tuple.__new__
+_tick_fields = attrgetter(*TickTuple._fields)
+_touchline_fields = attrgetter(*TouchLineTuple._fields[:-4])
+_NO_LEVEL = (0.0, 0)
+
+
+def flatten(md_message):
+    """
+    TickData and TouchLineDataMessage as a TickTuple / TouchLineTuple
+    (best bid/ask from level 0, zero when absent); any other subtype is
+    returned unchanged. Unlike messages, the tuples are immutable and
+    picklable, so they can be kept or sent to other processes as is.
+    """
+    subtype = md_message.WhichOneof("subtype")
+    if subtype == "TickData":
+        return _new_tuple(TickTuple, _tick_fields(md_message.TickData))
+    if subtype == "TouchLineDataMessage":
+        body = md_message.TouchLineDataMessage
+        bids = body.BestBidLevel
+        asks = body.BestAskLevel
+        bid = (bids[0].Price, bids[0].Qty) if len(bids) else _NO_LEVEL
+        ask = (asks[0].Price, asks[0].Qty) if len(asks) else _NO_LEVEL
+        return _new_tuple(TouchLineTuple, _touchline_fields(body) + bid + ask)
+    return md_message
+
+
+def encode_varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _tag_byte(field_number):
+    """First byte of the (two-byte) tag of a length-delimited subtype field."""
+    return bytes([(field_number << 3 | 2) & 0x7F | 0x80])
+
+
+# Serializers write fields in field-number order, so a frame starts with the
+# optional MessageCode/ID/MessageSize varints, the subtype tag and length,
+# and then (for single-instrument subtypes) the InstrumentID path.
+# Matching that prefix in C is much cheaper than walking it in Python;
+# anything that does not fit falls back to peek(). Groups 1-6 pair a tag
+# byte with the InstrumentID varint bytes; group 7 is the tag of an index
+# list or incremental update, whose entries may be for several instruments.
+_V = rb"[\x80-\xff]*[\x00-\x7f]"
+_HEADER = re.compile(
+    (rb"(?:\x08V)?(?:\x10V)?(?:\x18V)?(?:"
+     rb"([\xa2\xaa\xb2])\x1fV\x50(V)"                     # 500-502: InstrumentID = 10
+     rb"|(\xd2)\x1fV\x08(V)"                              # 506: InstrumentID = 1
+     rb"|(\xba)\x1fV\x0aV\x50(V)"                         # 503: IndexData.InstrumentID
+     rb"|([\xc2\xca])\x1f)"                              # 504, 505: no single instrument
+     ).replace(b"V", _V),
+    re.DOTALL,
+)
+_LIST_GROUP = 7
+# Just the envelope and subtype tag, for filtering by subtype alone.
+_TAG_HEADER = re.compile(rb"(?:\x08V)?(?:\x10V)?(?:\x18V)?([\xa2\xaa\xb2\xba\xc2\xca\xd2])\x1f".replace(b"V", _V),
+                         re.DOTALL)
+# base64 characters decoded to peek at a text frame (36 payload bytes)
+_HEAD_CHARS = 48
+# Frame prefixes used to memoize filter decisions, in bytes and base64
+# characters: 18 bytes hold the whole header of the usual single-instrument
+# frame, 6 bytes the MessageCode and subtype tag.
+_KEY_SIZES = {_HEADER: (18, 24), _TAG_HEADER: (6, 8)}
+_MAX_DECISIONS = 1 << 17
+
+
+class FastDecoder:
+    """
+    Selective decoder for the websocket hot path.
+
+    ``select`` drops frames whose subtype is not in ``subtypes`` or whose
+    InstrumentID is not in ``instrument_ids`` by matching the raw frame
+    prefix, decoding only the first few base64 characters of text frames;
+    index lists and incremental updates carry many instruments and are
+    never dropped by id. Binary
+    frames skip base64 entirely. Decisions are memoized per frame prefix
+    whenever the header fits inside it, so a repeat instrument costs one
+    dict lookup. ``decode`` parses what is left into one reused
+    MarketDataMessageBase (``reuse=False`` allocates per frame), so a
+    returned message is only valid until the next call.
+    """
+
+    def __init__(self, instrument_ids=None, subtypes=None, reuse=True):
+        self.reuse = reuse
+        self._message = marketdata_pb2.MarketDataMessageBase()
+        self._tags = None
+        self._interest = None
+        self.set_subtypes(subtypes)
+        self.set_interest(instrument_ids)
+        self.decoded = 0
+        self.filtered = 0
+        self.fallbacks = 0
+
+    def set_subtypes(self, subtypes):
+        """Replace the subtype filter; None accepts every subtype."""
+        self._tags = None if subtypes is None else {_tag_byte(SUBTYPE_NUMBERS[name]) for name in subtypes}
+        self._reset_decisions()
+
+    def set_interest(self, instrument_ids):
+        """Replace the instrument filter; None accepts every instrument."""
+        self._interest = None if instrument_ids is None else {encode_varint(i) for i in instrument_ids}
+        self._reset_decisions()
+
+    def _reset_decisions(self):
+        # Without an instrument filter only the tag matters, so a much shorter prefix is a good key.
+        self._header = _HEADER if self._interest is not None else _TAG_HEADER
+        self._key_bytes, self._key_chars = _KEY_SIZES[self._header]
+        self._decisions = {}
+
+    def _wanted(self, tag, instrument):
+        if self._tags is not None and tag not in self._tags:
+            return False
+        return instrument is None or self._interest is None or instrument in self._interest
+
+    def _classify(self, frame, text, key):
+        header = self._header
+        match = header.match(a2b_base64(frame[:_HEAD_CHARS]) if text else frame)
+        if match is None:
+            self.fallbacks += 1
+            _, field, instrument_id = peek(frame_payload(frame))
+            return self._wanted(_tag_byte(field) if field else None,
+                                encode_varint(instrument_id) if instrument_id else None)
+
+        group = match.lastindex
+        if header is _TAG_HEADER or group == _LIST_GROUP:
+            wanted = self._wanted(match.group(group), None)
+        else:
+            wanted = self._wanted(match.group(group - 1), match.group(group))
+        if match.end() <= self._key_bytes:
+            if len(self._decisions) >= _MAX_DECISIONS:
+                self._decisions = {}
+            self._decisions[key] = wanted
+        return wanted
+
+    def select(self, frame):
+        """The frame's protobuf payload, or None if the filters drop it."""
+        if self._tags is None and self._interest is None:
+            return frame_payload(frame)
+
+        text = isinstance(frame, str)
+        key = frame[:self._key_chars] if text else frame[:self._key_bytes]
+        wanted = self._decisions.get(key)
+        if wanted is None:
+            wanted = self._classify(frame, text, key)
+        if not wanted:
+            self.filtered += 1
+            return None
+        return a2b_base64(frame) if text else frame
+
+    def decode(self, frame):
+        """Parsed message for a wanted frame, or None if it was filtered out."""
+        payload = self.select(frame)
+        if payload is None:
+            return None
+        md_message = self._message if self.reuse else marketdata_pb2.MarketDataMessageBase()
+        md_message.ParseFromString(payload)
+        self.decoded += 1
+        return md_message
+
+    def get_stats(self):
+        return {"decoded": self.decoded, "filtered": self.filtered, "fallbacks": self.fallbacks}
@@ -8,16 +8,20 @@ setup(
     long_description_content_type="text/markdown",
     author="Your Name",
     author_email="your.email@example.com",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=[
         'requests',
         'websocket-client',
         'protobuf',
     ],
+    extras_require={
+        'historical': ['numpy', 'pandas'],
+        'async': ['aiohttp'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6'
+    python_requires='>=3.8'
 )
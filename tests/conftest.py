@@ -0,0 +1,14 @@
+import contextlib
+
+from benchmarks.standins import standins
+
+_standins = contextlib.ExitStack()
+
+
+def pytest_configure(config):
+    # Before collection: marketdata.config reads the MARKETDATA_* overrides when it is first imported.
+    _standins.enter_context(standins(feed_args=("--subtypes", "tick", "--rate", 200)))
+
+
+def pytest_unconfigure(config):
+    _standins.close()
@@ -0,0 +1,52 @@
+import asyncio
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID
+from marketdata.aio import AsyncBlitzAPIClient, AsyncMarketDataClient
+from marketdata.utils import instrument_id_of_item
+from marketdata.wire import instrument_id_of
+
+INSTRUMENT_IDS = [BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + 1]
+
+
+def test_async_market_data_client():
+    async def run():
+        async with AsyncMarketDataClient("test-app", "test-user") as client:
+            assert client.access_token
+            ltp = await client.get_ltp(INSTRUMENT_IDS)
+            assert [instrument_id_of_item(item) for item in ltp["data"]] == INSTRUMENT_IDS
+            quote = await client.get_quote(INSTRUMENT_IDS)
+            assert [instrument_id_of_item(item) for item in quote["data"]] == INSTRUMENT_IDS
+            chain = await client.get_option_chain("NIFTY", "2024-01-25")
+            assert chain["status"] == "success"
+            history = await client.get_historical_data(INSTRUMENT_IDS[0], "2024-01-01", "2024-01-02")
+            assert history["data"]
+
+            received = []
+            stream = client.stream([BASE_INSTRUMENT_ID], reconnect=False)
+            async for md_message in stream:
+                received.append(md_message)
+                if len(received) == 3:
+                    break
+            await stream.aclose()
+            assert {instrument_id_of(md_message) for md_message in received} == {BASE_INSTRUMENT_ID}
+
+    asyncio.run(asyncio.wait_for(run(), 30))
+
+
+def test_async_blitz_api_client():
+    async def run():
+        async with AsyncBlitzAPIClient("test-app", "test-user") as client:
+            order = {"instrumentId": INSTRUMENT_IDS[0], "side": "BUY", "quantity": 1, "price": 100.0,
+                     "orderType": "LIMIT"}
+            placed = await client.place_order(order)
+            assert placed["status_code"] == 200
+            exchange_order_id = placed["response_json"]["data"]["exchangeOrderId"]
+
+            modified = await client.modify_order(dict(order, exchangeOrderId=exchange_order_id, price=101.0))
+            assert modified["status_code"] == 200
+            cancelled = await client.cancel_order(INSTRUMENT_IDS[0], exchange_order_id)
+            assert cancelled["status_code"] == 200
+            for listing in (client.get_orders, client.get_positions, client.get_trades):
+                assert (await listing())["response_json"]["status"] == "success"
+
+    asyncio.run(asyncio.wait_for(run(), 30))
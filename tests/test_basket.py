@@ -0,0 +1,28 @@
+import time
+
+from benchmarks.rest_stub import RestStub
+from benchmarks.standins import free_port
+from marketdata.blitz_api_client import BlitzAPIClient
+
+
+def test_basket_resends_every_leg_after_token_expiry():
+    stub = RestStub(port=free_port(), token_ttl=1.0, login_latency=0.2).start()
+    try:
+        url = f"http://127.0.0.1:{stub.port}"
+        client = BlitzAPIClient("test-app", "test-user")
+        client.api_base_url = f"{url}/md-api/"
+        client.auth_client.auth_base_url = f"{url}/api_gateway/v1"
+        client.auth_client.auto_refresh = False
+        client.warmup()
+        time.sleep(1.1)  # let the token expire
+
+        orders = [{"instrumentId": i, "side": "BUY", "quantity": 1, "price": 100.0, "orderType": "LIMIT"}
+                  for i in range(10)]
+        basket = client.place_many(orders, max_workers=10)
+
+        assert [result["status_code"] for result in basket["results"]] == [200] * 10
+        assert basket["succeeded"] == 10
+        assert basket["token_refreshed"]
+        assert stub.logins == 2
+    finally:
+        stub.stop()
@@ -0,0 +1,90 @@
+import threading
+
+from marketdata.conflation import Conflator
+from marketdata.proto import marketdata_pb2
+
+
+def tick(instrument_id, ltp):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.TickData.InstrumentID = instrument_id
+    md_message.TickData.LTP = ltp
+    return md_message
+
+
+def touchline(instrument_id, ltp):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.TouchLineDataMessage.InstrumentID = instrument_id
+    md_message.TouchLineDataMessage.LTP = ltp
+    return md_message
+
+
+def incremental(instrument_id, size):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.IncrementalUpdateMessage.MDEntriesList.add(InstrumentID=instrument_id, MDEntrySize=size)
+    return md_message
+
+
+def index_list(*instrument_ids):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    for instrument_id in instrument_ids:
+        md_message.IndexDataListMessage.IndexDataList.add(InstrumentID=instrument_id)
+    return md_message
+
+
+def test_latest_value_wins_per_instrument_and_subtype():
+    delivered = []
+    conflator = Conflator(delivered.append)
+    for ltp in (1.0, 2.0, 3.0):
+        conflator.submit(tick(1, ltp))
+        conflator.submit(touchline(1, ltp + 10))
+    conflator.submit(tick(2, 5.0))
+
+    assert conflator.flush() == 3
+    assert [(m.WhichOneof("subtype"), getattr(m, m.WhichOneof("subtype")).LTP) for m in delivered] == [
+        ("TickData", 3.0), ("TouchLineDataMessage", 13.0), ("TickData", 5.0)]
+    assert conflator.get_stats() == {"received": 7, "collapsed": 4, "delivered": 3, "pending": 0,
+                                     "callback_errors": 0}
+
+
+def test_lists_and_increments_pass_through_unchanged():
+    delivered = []
+    conflator = Conflator(delivered.append, batch=True)
+    messages = [incremental(1, 10), incremental(1, 20), index_list(1, 2), tick(1, 1.0), index_list(1, 2)]
+    for md_message in messages:
+        conflator.submit(md_message)
+    conflator.flush()
+    assert len(delivered) == 1
+    assert [m is original for m, original in zip(delivered[0], messages)] == [True] * 5
+    assert conflator.collapsed == 0
+
+
+def test_stop_flushes_pending_unless_asked_not_to():
+    delivered = []
+    conflator = Conflator(delivered.append)
+    conflator.submit(tick(1, 1.0))
+    conflator.stop(flush=False)
+    assert delivered == [] and conflator.get_stats()["pending"] == 1
+    conflator.stop()
+    assert [m.TickData.LTP for m in delivered] == [1.0]
+
+
+def test_delivery_thread_collapses_while_the_callback_is_busy():
+    release = threading.Event()
+    first = threading.Event()
+    delivered = []
+
+    def slow(md_message):
+        delivered.append(md_message.TickData.LTP)
+        first.set()
+        release.wait(5)
+
+    conflator = Conflator(slow)
+    conflator.start()
+    conflator.submit(tick(1, 1.0))
+    assert first.wait(5)
+    for ltp in (2.0, 3.0, 4.0):
+        conflator.submit(tick(1, ltp))
+    release.set()
+    conflator.stop()
+    assert delivered == [1.0, 4.0]
+    assert conflator.collapsed == 2
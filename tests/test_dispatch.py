@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from marketdata.dispatch import BLOCK, CONFLATE, DROP_OLDEST, FrameDispatcher, FrameRing, _STOP
+from marketdata.proto import marketdata_pb2
+
+
+def depth_frame(instrument_id, seq):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.MarketDepthMessage.InstrumentID = instrument_id
+    md_message.MarketDepthMessage.TimeStamp = seq
+    return md_message.SerializeToString()
+
+
+def incremental_frame(entries):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    for instrument_id, seq in entries:
+        md_message.IncrementalUpdateMessage.MDEntriesList.add(InstrumentID=instrument_id, MDEntrySize=seq)
+    return md_message.SerializeToString()
+
+
+def test_sharded_dispatch_keeps_per_instrument_order():
+    seen = {}
+    lock = threading.Lock()
+
+    def callback(md_message):
+        subtype = md_message.WhichOneof("subtype")
+        if subtype == "MarketDepthMessage":
+            updates = [(md_message.MarketDepthMessage.InstrumentID, md_message.MarketDepthMessage.TimeStamp)]
+        else:
+            updates = [(entry.InstrumentID, entry.MDEntrySize)
+                       for entry in md_message.IncrementalUpdateMessage.MDEntriesList]
+        with lock:
+            for instrument_id, seq in updates:
+                seen.setdefault(instrument_id, []).append(seq)
+
+    dispatcher = FrameDispatcher(callback, workers=4, queue_size=100000)
+    dispatcher.start()
+    instruments = range(1, 9)
+    seq = 0
+    expected = {instrument_id: [] for instrument_id in instruments}
+    for round_number in range(200):
+        if round_number % 3 == 0:
+            entries = []
+            for instrument_id in instruments:
+                seq += 1
+                entries.append((instrument_id, seq))
+                expected[instrument_id].append(seq)
+            dispatcher.submit(incremental_frame(entries))
+        else:
+            for instrument_id in instruments:
+                seq += 1
+                expected[instrument_id].append(seq)
+                dispatcher.submit(depth_frame(instrument_id, seq))
+
+    deadline = time.monotonic() + 10
+    while sum(map(len, seen.values())) < seq and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dispatcher.stop()
+    assert seen == expected
+    assert dispatcher.get_stats()["parse_errors"] == 0
+
+
+def test_block_waits_for_space():
+    ring = FrameRing(2, BLOCK)
+    ring.put(1)
+    ring.put(2)
+    putter = threading.Thread(target=ring.put, args=(3,))
+    putter.start()
+    time.sleep(0.1)
+    assert putter.is_alive() and len(ring) == 2
+    assert ring.get() == 1
+    putter.join(1)
+    assert not putter.is_alive()
+    assert [ring.get(), ring.get()] == [2, 3]
+    assert ring.dropped == 0
+
+
+def test_drop_oldest_evicts_head():
+    ring = FrameRing(2, DROP_OLDEST)
+    for item in (1, 2, 3):
+        ring.put(item)
+    assert ring.dropped == 1
+    assert [ring.get(), ring.get()] == [2, 3]
+
+
+def test_conflate_replaces_in_place_and_keeps_unkeyed_items():
+    ring = FrameRing(3, CONFLATE)
+    ring.put("a1", key="a")
+    ring.put("b1", key="b")
+    ring.put("a2", key="a")
+    ring.put("list")
+    assert ring.conflated == 1
+    assert [ring.get(), ring.get(), ring.get()] == ["a2", "b1", "list"]
+
+    ring.put("c", key="c")
+    ring.put("d", key="d")
+    ring.put("e", key="e")
+    ring.put("f", key="f")  # full of distinct keys: the head goes
+    assert ring.dropped == 1
+    assert [ring.get(), ring.get(), ring.get()] == ["d", "e", "f"]
+    ring.close()
+    assert ring.get() is _STOP
+
+
+def test_process_mode_rejects_unpicklable_callbacks():
+    class Client:
+        def __init__(self):
+            self.lock = threading.Lock()
+
+        def on_tick(self, message):
+            pass
+
+    for callback in (None, lambda message: None, Client().on_tick):
+        with pytest.raises(ValueError):
+            FrameDispatcher(callback, workers=2, use_processes=True)
+
+
+def test_thread_workers_record_stream_stats():
+    from marketdata.websocket_stream_handler import MarketDataWebSocketClient
+
+    delivered = []
+    client = MarketDataWebSocketClient("test-token")
+    client.set_on_message(lambda md_message: (time.sleep(0.002), delivered.append(md_message)))
+    client.enable_dispatch(workers=2)
+    client.enable_stats()
+    try:
+        frames = [depth_frame(instrument_id, seq) for seq in range(10) for instrument_id in (1, 2)]
+        frames.append(incremental_frame([(1, 10), (2, 10)]))
+        for frame in frames:
+            client.on_message(None, frame)
+        deadline = time.monotonic() + 5
+        while len(delivered) < 22 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(delivered) == 22  # the incremental frame reaches both workers
+
+        stats = client.get_stats()
+        assert stats["messages"] == 21
+        depth = stats["subtypes"]["MarketDepthMessage"]
+        assert depth["messages"] == 20
+        assert depth["recv_to_decoded"]["count"] == 20
+        assert depth["decoded_to_callback"]["count"] == 20
+        assert depth["decoded_to_callback"]["p50"] >= 0.001
+        assert stats["subtypes"]["IncrementalUpdateMessage"]["messages"] == 2
+    finally:
+        client.disable_dispatch()
@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from marketdata.historical import _normalize_iso, records_to_columns, to_epoch
+
+IST_0915 = 1704080700  # 2024-01-01 09:15:00+05:30
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2024-01-01 09:15:00.123+0530", IST_0915),
+    ("2024-01-01T09:15:00+05:30", IST_0915),
+    ("2024-01-01T03:45:00Z", IST_0915),
+    ("2024-01-01T09:15:00.1234567+05:30", IST_0915),
+    ("2024-01-01T03:45:00", IST_0915),
+    ("2024-01-01", 1704067200),
+])
+def test_to_epoch(text, expected):
+    assert to_epoch(text) == expected
+
+
+def test_timestamps_are_normalized_for_older_pythons():
+    assert _normalize_iso("2024-01-01 09:15:00.123+0530") == "2024-01-01 09:15:00.123000+05:30"
+    assert _normalize_iso("2024-01-01T03:45:00Z") == "2024-01-01T03:45:00+00:00"
+    assert _normalize_iso("2024-01-01T09:15:00.1234567-0400") == "2024-01-01T09:15:00.123456-04:00"
+    assert _normalize_iso("2024-01-01") == "2024-01-01"
+
+
+def test_unparseable_columns_are_dropped_with_a_warning(caplog):
+    payload = {"data": [{"timestamp": "2024-01-01 09:15:00+0530", "close": 1.5, "symbol": "ABC"}]}
+    with caplog.at_level(logging.WARNING):
+        columns = records_to_columns(payload)
+    assert list(columns) == ["timestamp", "close"]
+    assert list(columns["timestamp"]) == [IST_0915]
+    assert "symbol" in caplog.text
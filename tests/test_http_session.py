@@ -0,0 +1,71 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from marketdata import config, http_session
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self):
+        self.server.hits.append((self.command, self.path))
+        if self.path == "/slow":
+            time.sleep(0.5)
+        self.send_response(503 if self.path == "/unavailable" else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(config, "HTTP_RETRY_BACKOFF", 0.001)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_reads_are_retried_order_verbs_are_not(server):
+    httpd, base = server
+    assert http_session.request("GET", base + "/unavailable").status_code == 503
+    assert http_session.request("POST", base + "/unavailable", endpoint="/marketfeed/ltp").status_code == 503
+    assert len(httpd.hits) == 6
+
+    for method in ("POST", "PUT", "DELETE"):
+        httpd.hits.clear()
+        assert http_session.request(method, base + "/unavailable", endpoint="orders/x").status_code == 503
+        assert len(httpd.hits) == 1, method
+
+
+def test_order_verbs_are_not_resent_after_a_read_timeout(server):
+    httpd, base = server
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        http_session.request("PUT", base + "/slow", endpoint="orders/modifyOrder", timeout=(1, 0.1))
+    time.sleep(0.5)
+    assert len(httpd.hits) == 1
+
+
+def test_order_verbs_are_retried_when_the_connection_fails(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(config, "HTTP_RETRY_BACKOFF", 0.001)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # nothing listening once closed
+    attempts = []
+    send = http_session.get_session().request
+    monkeypatch.setattr(http_session.get_session(), "request",
+                        lambda *args, **kwargs: attempts.append(1) or send(*args, **kwargs))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_session.request("POST", f"http://127.0.0.1:{port}/orders", endpoint="orders/placeOrder")
+    assert len(attempts) == 3
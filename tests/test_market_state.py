@@ -0,0 +1,97 @@
+import time
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID
+from marketdata.market_data import MarketDataClient
+from marketdata.market_state import MarketStateStore
+from marketdata.proto import marketdata_pb2
+
+INSTRUMENT = BASE_INSTRUMENT_ID + 7
+
+
+def decoded(subtype, **fields):
+    """A MarketDataMessageBase as the websocket client hands it to listeners."""
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    body = getattr(md_message, subtype)
+    bids = fields.pop("bids", ())
+    asks = fields.pop("asks", ())
+    for name, value in fields.items():
+        setattr(body, name, value)
+    for levels, name in ((bids, "BestBidLevel"), (asks, "BestAskLevel")):
+        for price, qty, orders in levels:
+            getattr(body, name).add(Price=price, Qty=qty, Orders=orders)
+    return marketdata_pb2.MarketDataMessageBase.FromString(md_message.SerializeToString())
+
+
+def test_ltp_and_quote_follow_the_stream_until_stale():
+    client = MarketDataClient("test-app", "test-user")
+    store = client.enable_market_state(max_age=0.3)
+    try:
+        first = client.get_ltp([INSTRUMENT])  # REST; seeds the ltp layout
+        client.get_quote([INSTRUMENT])
+        assert store.misses == 2
+
+        store.update(decoded("TickData", InstrumentID=INSTRUMENT, LTP=123.5, LTQ=7, LTT=1000))
+        ltp = client.get_ltp([INSTRUMENT])
+        assert store.hits == 1
+        assert ltp["status"] == first["status"]
+        assert ltp["data"] == [dict(first["data"][0], LTP=123.5, LTQ=7, LTT=1000)]
+
+        store.update(decoded("TouchLineDataMessage", InstrumentID=INSTRUMENT, LTP=124.0, LTQ=3, LTT=1001,
+                             Open=120.0, High=125.0, Low=119.0, Close=121.0, OI=50, ATP=122.0))
+        record = client.get_quote([INSTRUMENT])["data"][0]
+        assert store.hits == 2
+        assert (record["LTP"], record["LTQ"], record["High"], record["Close"], record["OI"]) == (124.0, 3, 125.0,
+                                                                                               121.0, 50)
+        assert "ATP" not in record  # only the keys the REST record has are written
+
+        time.sleep(0.4)
+        refreshed = client.get_ltp([INSTRUMENT])  # stale: back to REST, which re-seeds
+        assert store.hits == 2 and store.misses == 3
+        assert refreshed["data"][0]["LTP"] != 124.0
+    finally:
+        client.close()
+
+
+def test_quote_depth_is_served_from_touchline_and_depth_messages():
+    store = MarketStateStore(max_age=0.3)
+    level = {"Price": 99.0, "Qty": 1, "Orders": 1}
+    store.seed("quote", {"status": "success", "data": [
+        {"instrumentId": INSTRUMENT, "LTP": 100.0, "BestBidLevel": [level], "BestAskLevel": [level]}]})
+    time.sleep(0.4)
+    assert store.lookup("quote", [INSTRUMENT]) is None  # snapshot depth too old
+
+    store.update(decoded("TickDataMessage", InstrumentID=INSTRUMENT, LTP=101.0))
+    assert store.lookup("quote", [INSTRUMENT]) is None  # fresh LTP, stale depth
+
+    store.update(decoded("MarketDepthMessage", InstrumentID=INSTRUMENT, LTP=101.5,
+                         bids=[(101.0, 10, 2), (100.5, 20, 3)], asks=[(102.0, 5, 1)]))
+    record = store.lookup("quote", [INSTRUMENT])["data"][0]
+    assert record["LTP"] == 101.5
+    assert record["BestBidLevel"] == [{"Price": 101.0, "Qty": 10, "Orders": 2},
+                                      {"Price": 100.5, "Qty": 20, "Orders": 3}]
+    assert record["BestAskLevel"] == [{"Price": 102.0, "Qty": 5, "Orders": 1}]
+    assert store.get_depth(INSTRUMENT) == ([(101.0, 10, 2), (100.5, 20, 3)], [(102.0, 5, 1)])
+
+    store.update(decoded("TouchLineDataMessage", InstrumentID=INSTRUMENT, LTP=102.0,
+                         bids=[(101.5, 4, 1)], asks=[(102.5, 6, 1)]))
+    record = store.lookup("quote", [INSTRUMENT])["data"][0]
+    assert record["BestBidLevel"] == [{"Price": 101.5, "Qty": 4, "Orders": 1}]
+
+    time.sleep(0.2)
+    store.update(decoded("TickData", InstrumentID=INSTRUMENT, LTP=103.0))
+    time.sleep(0.2)
+    assert store.lookup("quote", [INSTRUMENT]) is None  # depth last seen 0.4s ago
+
+
+def test_index_updates_and_unseen_instruments():
+    store = MarketStateStore(max_age=1.0)
+    store.seed("ltp", {"data": [{"instrumentId": INSTRUMENT, "LTP": 1.0, "Open": 1.0}]})
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    md_message.IndexDataMessage.IndexData.InstrumentID = INSTRUMENT
+    md_message.IndexDataMessage.IndexData.Last = 22000.5
+    md_message.IndexDataMessage.IndexData.Open = 21900.0
+    store.update(md_message)
+    assert store.lookup("ltp", [INSTRUMENT])["data"] == [{"instrumentId": INSTRUMENT, "LTP": 22000.5,
+                                                          "Open": 21900.0}]
+    assert store.lookup("ltp", [INSTRUMENT, INSTRUMENT + 1]) is None
+    assert store.lookup("quote", [INSTRUMENT]) is None
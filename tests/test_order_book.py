@@ -0,0 +1,83 @@
+from marketdata.order_book import (ACTION_CHANGE, ACTION_DELETE, ACTION_NEW, ENTRY_ASK, ENTRY_BID, OrderBook,
+                                   OrderBookManager)
+from marketdata.proto import marketdata_pb2
+
+
+def depth_message(instrument_id, bids, asks):
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    body = md_message.MarketDepthMessage
+    body.InstrumentID = instrument_id
+    for price, qty in bids:
+        body.BestBidLevel.add(Price=price, Qty=qty, Orders=1)
+    for price, qty in asks:
+        body.BestAskLevel.add(Price=price, Qty=qty, Orders=1)
+    return md_message
+
+
+def test_apply_entry_by_position():
+    book = OrderBook(1, depth=3)
+    book.apply_entry(ACTION_NEW, ENTRY_BID, 1, 100.0, 10)
+    book.apply_entry(ACTION_NEW, ENTRY_BID, 1, 100.5, 5)   # new best pushes 100.0 to level 2
+    book.apply_entry(ACTION_NEW, ENTRY_ASK, 1, 101.0, 7)
+    assert book.snapshot() == {"bids": [(100.5, 5, 0), (100.0, 10, 0)], "asks": [(101.0, 7, 0)]}
+
+    book.apply_entry(ACTION_CHANGE, ENTRY_BID, 2, 100.0, 12)
+    assert book.total_quantity() == (17, 7)
+    book.apply_entry(ACTION_DELETE, ENTRY_BID, 1, 0.0, 0)
+    assert book.best_bid() == (100.0, 12)
+    assert book.spread() == 1.0 and book.mid() == 100.5
+
+    for position, price in ((2, 99.5), (3, 99.0), (4, 98.5)):  # the fourth falls off a depth-3 side
+        book.apply_entry(ACTION_NEW, ENTRY_BID, position, price, 1)
+    assert book.depth() == (3, 1)
+    assert book.total_quantity() == (14, 7)
+
+
+def test_apply_entry_by_price():
+    book = OrderBook(1)
+    for price in (100.0, 101.0, 99.0):
+        book.apply_entry(ACTION_NEW, ENTRY_BID, 0, price, 1)
+        book.apply_entry(ACTION_NEW, ENTRY_ASK, 0, price + 5, 1)
+    assert [level[0] for level in book.bids.to_list()] == [101.0, 100.0, 99.0]
+    assert [level[0] for level in book.asks.to_list()] == [104.0, 105.0, 106.0]
+
+    book.apply_entry(ACTION_CHANGE, ENTRY_BID, 0, 100.0, 9)
+    book.apply_entry(ACTION_DELETE, ENTRY_ASK, 0, 104.0, 0)
+    book.apply_entry(ACTION_DELETE, ENTRY_ASK, 0, 123.0, 0)  # unknown price: ignored
+    assert book.bids.to_list()[1] == (100.0, 9, 0)
+    assert book.best_ask() == (105.0, 1)
+    assert book.updates == 9
+
+
+def test_snapshot_resyncs_compare_only_the_levels_kept():
+    book = OrderBook(1, depth=2)
+    levels = [(100.0, 1), (99.5, 2), (99.0, 3)]
+    book.apply_snapshot(depth_message(1, levels, []).MarketDepthMessage)
+    assert book.snapshot()["bids"] == [(100.0, 1, 1), (99.5, 2, 1)]
+    assert (book.snapshots, book.resyncs) == (1, 0)
+
+    # Same top two levels, a different third: the book has not drifted.
+    book.apply_snapshot(depth_message(1, levels[:2] + [(98.0, 9)], []).MarketDepthMessage)
+    assert (book.snapshots, book.resyncs) == (2, 0)
+
+    book.apply_entry(ACTION_CHANGE, ENTRY_BID, 1, 100.0, 4)  # drifts from the feed
+    book.apply_snapshot(depth_message(1, levels, []).MarketDepthMessage)
+    assert (book.snapshots, book.resyncs) == (3, 1)
+    assert book.best_bid() == (100.0, 1)
+
+
+def test_manager_routes_increments_and_snapshots():
+    manager = OrderBookManager(depth=5)
+    md_message = marketdata_pb2.MarketDataMessageBase()
+    for instrument_id, entry_type, price in ((1, ENTRY_BID, 100.0), (2, ENTRY_ASK, 50.0), (1, ENTRY_ASK, 101.0)):
+        md_message.IncrementalUpdateMessage.MDEntriesList.add(
+            MDUpdateAction=ACTION_NEW, MDEntryType=entry_type, InstrumentID=instrument_id,
+            MDEntryPrice=price, MDEntrySize=3, MDEntryPosition=1)
+    manager.apply(md_message)
+    manager.apply(depth_message(3, [(10.0, 1)], [(10.5, 1)]))
+
+    assert manager.get(1).spread() == 1.0
+    assert manager.get(2).best_ask() == (50.0, 3)
+    assert manager.get(3).mid() == 10.25
+    assert manager.get(4) is None
+    assert manager.get_stats() == {"books": 3, "updates": 3, "snapshots": 1, "resyncs": 0}
@@ -0,0 +1,66 @@
+import json
+
+from marketdata.order_state import OrderStateBook
+
+
+def listing(records):
+    text = json.dumps({"status": "success", "data": records})
+    return {"status_code": 200, "response_text": text, "response_json": None}
+
+
+def order(blitz_id, status="OPEN", price=100.0, instrument_id=11):
+    return {"BlitzOrderId": blitz_id, "exchangeOrderId": f"X{blitz_id}", "instrumentId": instrument_id,
+            "orderStatus": status, "price": price}
+
+
+def test_reconcile_orders_counts_and_unchanged_skip():
+    book = OrderStateBook()
+    assert book.reconcile_orders(listing([order(1), order(2)])) == {"added": 2, "changed": 0, "removed": 0}
+    assert book.reconcile_orders(listing([order(1), order(2)])) == {"added": 0, "changed": 0, "removed": 0}
+    assert book.get_stats()["unchanged"] == 1
+
+    result = book.reconcile_orders(listing([order(1, price=101.0), order(3)]))
+    assert result == {"added": 1, "changed": 1, "removed": 1}
+    assert book.get_order(2) is None
+    assert book.get_order(exchange_order_id="X1")["price"] == 101.0
+    assert sorted(o["BlitzOrderId"] for o in book.get_open_orders(11)) == [1, 3]
+
+    book.reconcile_orders({"status_code": 500, "response_text": "oops", "response_json": None})
+    assert book.get_order(1) is not None
+
+
+def test_orders_placed_between_polls_survive_a_listing_without_them():
+    book = OrderStateBook()
+    book.reconcile_orders(listing([order(1)]))
+    placed = book.apply_placed({"instrumentId": 11, "price": 99.0},
+                               {"status_code": 200, "response_json": {"data": order(7)}})
+    assert placed == "7"
+
+    assert book.reconcile_orders(listing([order(1, price=100.5)]))["removed"] == 0
+    assert book.get_order(7) is not None
+    book.reconcile_orders(listing([order(1, price=100.5), order(7)]))
+    assert book.reconcile_orders(listing([order(1, price=100.5)]))["removed"] == 1
+    assert book.get_order(7) is None
+
+
+def test_apply_cancelled_closes_the_order():
+    book = OrderStateBook()
+    book.reconcile_orders(listing([order(1), order(2)]))
+    assert book.apply_cancelled(11, "X1", {"status_code": 400}) is None
+    assert book.apply_cancelled(11, "X9", {"status_code": 200}) is None
+    assert book.apply_cancelled(11, "X1", {"status_code": 200}) == "1"
+    assert book.get_order(1)["orderStatus"] == "CANCELLED"
+    assert [o["BlitzOrderId"] for o in book.get_open_orders(11)] == [2]
+
+
+def test_trades_are_deduplicated():
+    book = OrderStateBook()
+    fills = [{"tradeId": "T1", "instrumentId": 11, "qty": 5}, {"tradeId": "T2", "instrumentId": 11, "qty": 3}]
+    assert book.reconcile_trades(listing(fills))["added"] == 2
+    assert book.reconcile_trades(listing(fills + [{"tradeId": "T3", "instrumentId": 12, "qty": 1}]))["added"] == 1
+    assert book.apply_trade({"tradeId": "T2", "instrumentId": 11, "qty": 3}) is False
+    assert [fill["tradeId"] for fill in book.get_fills(11)] == ["T1", "T2"]
+    assert len(book.get_fills(12)) == 1
+    # Without a trade id, identical records are the same fill.
+    assert book.apply_trade({"instrumentId": 13, "qty": 1}) is True
+    assert book.apply_trade({"qty": 1, "instrumentId": 13}) is False
@@ -0,0 +1,46 @@
+import base64
+import random
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID, build_frame
+from marketdata.market_data import MarketDataClient
+
+
+class _Publisher:
+    def __init__(self):
+        self.entries = []
+        self.stopped = False
+
+    def start(self):
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+    def xadd(self, stream, data, maxlen=None):
+        self.entries.append((stream, data, maxlen))
+        return True
+
+
+def test_mirror_publishes_raw_frame_payloads():
+    client = MarketDataClient("test-app", "test-user")
+    client.access_token = "test-token"
+    publisher = _Publisher()
+    client.enable_redis_mirror(stream="md", maxlen=100, publisher=publisher)
+    received = []
+    client.on_message = received.append
+    try:
+        rng = random.Random(1)
+        text = build_frame("touchline", BASE_INSTRUMENT_ID, rng)
+        binary = build_frame("tick", BASE_INSTRUMENT_ID, rng, binary=True)
+        client.ws_client.on_message(None, text.decode())
+        client.ws_client.on_message(None, binary)
+
+        assert publisher.entries == [("md", base64.b64decode(text), 100), ("md", binary, 100)]
+        assert len(received) == 2
+
+        client.disable_redis_mirror()
+        client.ws_client.on_message(None, binary)
+        assert len(publisher.entries) == 2
+        assert not publisher.stopped  # not ours to stop
+    finally:
+        client.close()
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID
+from marketdata.sharded_feed import HashRing, ShardedFeed
+from marketdata.wire import instrument_id_of
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_hash_ring_placement_is_stable_and_moves_only_the_lost_share():
+    keys = range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + 2000)
+    ring = HashRing(range(4))
+    placement = {key: ring.node_for(key) for key in keys}
+    assert placement == {key: HashRing(range(4)).node_for(key) for key in keys}
+    assert all(300 < list(placement.values()).count(node) < 700 for node in range(4))
+
+    ring.remove(2)
+    moved = {key for key in keys if ring.node_for(key) != placement[key]}
+    assert moved == {key for key in keys if placement[key] == 2}
+    assert all(ring.node_for(key) != 2 for key in moved)
+
+    ring.add(2)
+    assert {key: ring.node_for(key) for key in keys} == placement
+    assert HashRing().node_for(1) is None
+
+
+class _Received:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def __call__(self, md_message):
+        instrument_id = instrument_id_of(md_message)
+        with self.lock:
+            self.counts[instrument_id] = self.counts.get(instrument_id, 0) + 1
+
+    def seen(self, instrument_ids):
+        with self.lock:
+            return all(self.counts.get(i) for i in instrument_ids)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+def test_lost_shard_moves_to_survivors_and_replacement_gets_its_subscriptions(monkeypatch):
+    instrument_ids = list(range(BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + 12))
+    received = _Received()
+    feed = ShardedFeed("test-token", shards=3, callback=received, dead_after=0.5, check_interval=0.1)
+    feed.subscribe(instrument_ids)
+    feed.start()
+    try:
+        def held(shard):
+            return sorted(shard.client.subscriptions.active())
+
+        def placed(shard_id):
+            return sorted(i for i in instrument_ids if feed.shard_for(i) == shard_id)
+
+        assert wait_for(lambda: received.seen(instrument_ids))
+        for shard in feed._shards:
+            assert held(shard) == placed(shard.shard_id)
+
+        victim = feed._shards[feed.shard_for(instrument_ids[0])]
+        lost = placed(victim.shard_id)
+        assert lost
+        restart = victim.restart
+        monkeypatch.setattr(victim, "restart", lambda: None)  # the replacement is slow to come up
+        victim.client.stop()
+        victim.client.thread.join(5)
+
+        assert wait_for(lambda: victim.shard_id not in feed._ring.nodes)
+        assert held(victim) == []
+        survivors = [shard for shard in feed._shards if shard is not victim]
+        assert sorted(i for shard in survivors for i in held(shard)) == instrument_ids
+        received.reset()
+        assert wait_for(lambda: received.seen(lost))  # served by the survivors now
+
+        restart()  # the replacement comes up and is put back in the ring
+        assert wait_for(lambda: held(victim) == lost)
+        before = victim.messages
+        assert wait_for(lambda: victim.messages > before)
+        for shard in survivors:
+            assert held(shard) == placed(shard.shard_id)
+        stats = feed.get_stats()
+        assert stats["instruments"] == len(instrument_ids)
+        assert all(shard["in_ring"] for shard in stats["shards"])
+    finally:
+        feed.stop()
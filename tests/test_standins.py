@@ -0,0 +1,26 @@
+import queue
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID
+from marketdata.market_data import MarketDataClient
+from marketdata.utils import instrument_id_of_item
+from marketdata.wire import instrument_id_of
+
+
+def test_login_ltp_and_feed_subscription():
+    client = MarketDataClient("test-app", "test-user")
+    try:
+        assert client.auth_client.get_access_token()
+
+        instrument_ids = [BASE_INSTRUMENT_ID, BASE_INSTRUMENT_ID + 1]
+        ltp = client.get_ltp(instrument_ids)
+        assert [instrument_id_of_item(item) for item in ltp["data"]] == instrument_ids
+
+        received = queue.Queue()
+        client.on_message = received.put
+        client.connect_ws()
+        client.subscribe_market_data([BASE_INSTRUMENT_ID])
+        md_message = received.get(timeout=10)
+        assert md_message.WhichOneof("subtype") == "TickData"
+        assert instrument_id_of(md_message) == BASE_INSTRUMENT_ID
+    finally:
+        client.close()
@@ -0,0 +1,28 @@
+import json
+import subprocess
+import sys
+
+from marketdata.blitz_api_client import BlitzAPIClient
+
+CHECK = """
+import json, sys
+from marketdata import BlitzAPIClient, MarketDataClient
+MarketDataClient("test-app", "test-user")
+BlitzAPIClient("test-app", "test-user")
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_clients_import_and_construct_without_the_stream_stack():
+    modules = set(json.loads(subprocess.run([sys.executable, "-c", CHECK], check=True, capture_output=True,
+                                            text=True).stdout))
+    for lazy in ("google.protobuf", "marketdata.wire", "marketdata.dispatch", "marketdata.handlers",
+                 "marketdata.websocket_stream_handler", "marketdata.market_state", "marketdata.order_book",
+                 "marketdata.bars", "redis", "websocket"):
+        assert lazy not in modules, lazy
+
+
+def test_redis_stats_do_not_build_the_publisher():
+    client = BlitzAPIClient("test-app", "test-user")
+    assert client.get_redis_stats() is None
+    assert client._redis_publisher is None and client._redis_client is None
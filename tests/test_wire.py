@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from benchmarks.feed_server import BASE_INSTRUMENT_ID, SUBTYPES, build_frame
+from marketdata.wire import SUBTYPE_NUMBERS, FastDecoder, frame_payload, parse_payload, peek
+
+WANTED = BASE_INSTRUMENT_ID + 1
+OTHER = BASE_INSTRUMENT_ID + 2
+LISTS = ("IndexDataListMessage", "IncrementalUpdateMessage")
+
+
+def frames(instrument_id, binary):
+    """One real feed frame per subtype (500-506), as the websocket client receives it."""
+    rng = random.Random(instrument_id)
+    out = {}
+    for name, (field, _) in SUBTYPES.items():
+        frame = build_frame(name, instrument_id, rng, now_ms=1700000000000, binary=binary)
+        out[field] = frame if binary else frame.decode()
+    return out
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_decode_matches_parse_payload_for_every_subtype(binary):
+    decoder = FastDecoder(reuse=False)
+    for field, frame in frames(WANTED, binary).items():
+        payload = frame_payload(frame)
+        assert decoder.select(frame) == payload
+        md_message = decoder.decode(frame)
+        assert md_message.WhichOneof("subtype") == field
+        assert md_message == parse_payload(payload)
+        assert peek(payload)[1] == SUBTYPE_NUMBERS[field]
+    assert decoder.get_stats()["decoded"] == len(SUBTYPES)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_instrument_filter_passes_lists_through(binary):
+    decoder = FastDecoder(instrument_ids=[WANTED], reuse=False)
+    for _ in range(2):  # the second pass is answered from the memoized decisions
+        for field, frame in frames(WANTED, binary).items():
+            assert decoder.decode(frame) == parse_payload(frame_payload(frame)), field
+        for field, frame in frames(OTHER, binary).items():
+            if field in LISTS:
+                assert decoder.decode(frame) == parse_payload(frame_payload(frame)), field
+            else:
+                assert decoder.select(frame) is None, field
+    assert decoder.get_stats()["filtered"] == 2 * (len(SUBTYPES) - len(LISTS))
+    assert decoder.get_stats()["fallbacks"] == 0
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_subtype_filter(binary):
+    wanted = {"TickData", "IncrementalUpdateMessage"}
+    for instrument_ids in (None, [WANTED]):
+        decoder = FastDecoder(instrument_ids=instrument_ids, subtypes=wanted)
+        for field, frame in frames(WANTED, binary).items():
+            md_message = decoder.decode(frame)
+            if field in wanted:
+                assert md_message.WhichOneof("subtype") == field
+            else:
+                assert md_message is None, field
+
+
+def test_interest_changes_take_effect():
+    decoder = FastDecoder(instrument_ids=[WANTED])
+    frame = frames(OTHER, binary=False)["TickData"]
+    assert decoder.select(frame) is None
+    decoder.set_interest([WANTED, OTHER])
+    assert decoder.select(frame) is not None
+    decoder.set_interest(None)
+    decoder.set_subtypes(["TouchLineDataMessage"])
+    assert decoder.select(frame) is None
+
+
+def test_reuse_false_returns_independent_messages():
+    ticks = [frames(i, binary=True)["TickData"] for i in (WANTED, OTHER)]
+    decoder = FastDecoder(reuse=False)
+    first, second = decoder.decode(ticks[0]), decoder.decode(ticks[1])
+    assert first is not second
+    assert (first.TickData.InstrumentID, second.TickData.InstrumentID) == (WANTED, OTHER)
+
+    decoder = FastDecoder(reuse=True)
+    first, second = decoder.decode(ticks[0]), decoder.decode(ticks[1])
+    assert first is second and first.TickData.InstrumentID == OTHER